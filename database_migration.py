@@ -16,7 +16,7 @@ from google.cloud import secretmanager
 
 logger = get_logger(__name__)
 
-TABLES_TO_COPY = ["platform_new_path", "platform_new_training"]
+TABLES_TO_COPY = ["platform_new_path", "platform_new_training", "platform_new_pathtraining"]
 
 PROJECT_ID = os.environ.get("TF_VAR_project_id") # Project id var is already set for the terraform project
 if not PROJECT_ID:
@@ -149,4 +149,11 @@ resource "google_secret_manager_secret" "USERNAME_ADC" {
     auto {}
   }
   depends_on = [google_project_service.secret_manager]
-}
\ No newline at end of file
+}
+
+# Allow the App Engine default service account to sign the URLs of the content files through the IAM API
+resource "google_service_account_iam_member" "appengine_sign_urls" {
+  service_account_id = "projects/${var.project_id}/serviceAccounts/${var.project_id}@appspot.gserviceaccount.com"
+  role               = "roles/iam.serviceAccountTokenCreator"
+  member             = "serviceAccount:${var.project_id}@appspot.gserviceaccount.com"
+}
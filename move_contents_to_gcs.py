@@ -1,48 +1,71 @@
-import os
-import subprocess
-from dotenv import load_dotenv
-
 """
     Move content files from local directory to GCS bucket.
     Content files are scraped files from the original website and used to generate the content of the new website.
+    Only the new files and the files whose content changed since the last run are uploaded, in parallel.
     Args:
-        local_directory (str): Local directory to move files from
-        bucket_name (str): GCS bucket name
+        --source (str): Local directory to move files from
+        --bucket (str): GCS bucket name, defaults to the BUCKET_NAME environment variable
+        --bucket-dir (str): Local directory standing in for the bucket, e.g. for tests
+        --workers (int): Maximum number of parallel uploads
+        --full: Compare every file against the bucket instead of trusting the local manifest
+        --dry-run: Only list the files which would be uploaded
     Raises:
         Exception: If local directory does not exist
     """
 
+import argparse
+import os
+from dotenv import load_dotenv
+from platform_new.buckets import get_bucket
+from platform_new.content_sync import sync_directory_to_bucket
+
 load_dotenv()
 BUCKET_NAME = os.getenv('BUCKET_NAME')
 
-def move_files_to_gcs(local_directory, bucket_name):
+
+def move_files_to_gcs(local_directory, bucket_name, bucket_directory=None, workers=8, full=False, dry_run=False):
     # Ensure the local directory exists
     if not os.path.exists(local_directory):
         raise Exception(f"Local directory {local_directory} does not exist.")
 
-    # List files in the GCS bucket
-    existing_files = subprocess.check_output(['gsutil', 'ls', f'gs://{bucket_name}/']).decode().splitlines()
-    existing_files = [os.path.basename(file) for file in existing_files]
+    bucket = get_bucket(bucket_name=bucket_name, bucket_directory=bucket_directory)
+    report = sync_directory_to_bucket(
+        local_directory=local_directory,
+        bucket=bucket,
+        workers=workers,
+        full=full,
+        dry_run=dry_run,
+    )
 
-    # Get local files
-    local_files = os.listdir(local_directory)
+    if not report.uploaded:
+        print("No new files to move.")
+    elif dry_run:
+        print(f"{len(report.uploaded)} files would be moved: {', '.join(sorted(report.uploaded))}")
+    else:
+        print(f"Successfully moved {len(report.uploaded)} files from {local_directory} to {bucket.name}")
 
-    # Filter out files that already exist in GCS
-    files_to_move = [file for file in local_files if file not in existing_files]
+    if report.failed:
+        print(f"An error occurred for {len(report.failed)} files: {', '.join(sorted(report.failed))}")
 
-    if not files_to_move:
-        print("No new files to move.")
-        return
 
-    # Construct the gsutil command
-    command = ['gsutil', '-m', 'cp'] + [os.path.join(local_directory, file) for file in files_to_move] + [f'gs://{bucket_name}/']
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Upload the new and changed content files to the bucket")
+    parser.add_argument('--source', default='platform_new/contents')
+    parser.add_argument('--bucket', default=BUCKET_NAME)
+    parser.add_argument('--bucket-dir', default=None)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--full', action='store_true')
+    parser.add_argument('--dry-run', action='store_true')
+    return parser.parse_args()
 
-    try:
-        # Execute the command
-        subprocess.run(command, check=True)
-        print(f"Successfully moved files from {local_directory} to gs://{bucket_name}/")
-    except subprocess.CalledProcessError as e:
-        print(f"An error occurred: {e}")
 
 if __name__ == "__main__":
-    move_files_to_gcs('platform_new/contents', BUCKET_NAME)
+    arguments = parse_arguments()
+    move_files_to_gcs(
+        arguments.source,
+        arguments.bucket,
+        bucket_directory=arguments.bucket_dir,
+        workers=arguments.workers,
+        full=arguments.full,
+        dry_run=arguments.dry_run,
+    )
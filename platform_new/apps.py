@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PlatformNewConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'  # type: ignore
     name = 'platform_new'
+
+    def ready(self):
+        # Register the signal handlers recording tombstones for deleted rows
+        from . import signals  # noqa: F401
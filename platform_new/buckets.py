@@ -0,0 +1,265 @@
+import base64
+from abc import ABC, abstractmethod
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from urllib.parse import quote, urlencode
+import google.auth
+import google.auth.transport.requests
+from google.cloud import storage
+
+
+class Bucket(ABC):
+    """
+    Minimal object-store interface used to deliver and synchronise the content files.
+    Implemented by GCSBucket for Google Cloud Storage and by LocalDirectoryBucket as a local stand-in.
+    """
+    name: str
+
+    @abstractmethod
+    def generate_signed_url(self, object_name: str, expiration: timedelta) -> str:
+        """
+        Generate a short-lived URL granting read access to an object.
+
+        Args:
+            object_name: Name of the object in the bucket
+            expiration: Lifetime of the URL
+
+        Returns:
+            Signed URL of the object
+        """
+
+    @abstractmethod
+    def object_exists(self, object_name: str) -> bool:
+        """
+        Check whether an object exists in the bucket.
+
+        Args:
+            object_name: Name of the object in the bucket
+
+        Returns:
+            True if the object exists
+        """
+
+    @abstractmethod
+    def list_object_md5s(self) -> dict[str, str]:
+        """
+        List the objects of the bucket with their MD5 hashes.
+
+        Returns:
+            Dictionary object name -> hexadecimal MD5 hash
+        """
+
+    @abstractmethod
+    def get_object_md5(self, object_name: str) -> str | None:
+        """
+        Get the MD5 hash of a single object.
+
+        Args:
+            object_name: Name of the object in the bucket
+
+        Returns:
+            Hexadecimal MD5 hash, or None if the object does not exist
+        """
+
+    @abstractmethod
+    def upload(self, file_path: str, object_name: str, md5: str) -> None:
+        """
+        Upload a local file, the object only becoming visible once completely and correctly transferred.
+
+        Args:
+            file_path: Path of the local file
+            object_name: Name of the object in the bucket
+            md5: Hexadecimal MD5 hash of the local file, checked against the uploaded object
+
+        Raises:
+            IOError: If the uploaded object does not match the local file
+        """
+
+    @abstractmethod
+    def copy(self, source_object_name: str, object_name: str) -> None:
+        """
+        Copy an object within the bucket, without transferring its bytes from the local machine.
+
+        Args:
+            source_object_name: Name of the existing object
+            object_name: Name of the new object
+        """
+
+
+def compute_md5(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the MD5 hash of a file by chunks.
+
+    Args:
+        file_path: Path of the file
+        chunk_size: Number of bytes read at once
+
+    Returns:
+        Hexadecimal MD5 hash
+    """
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GCSBucket(Bucket):
+    """Google Cloud Storage bucket, authenticated with the application default credentials."""
+
+    # Uploads are chunked by this size, which makes them resumable: a network error only retries the failed chunk
+    upload_chunk_size = 8 * 1024 * 1024
+
+    def __init__(self, name: str):
+        self.name = name
+        self.credentials, project_id = google.auth.default()
+        self.client = storage.Client(project=project_id, credentials=self.credentials)
+        self.bucket = self.client.bucket(name)
+
+    def generate_signed_url(self, object_name: str, expiration: timedelta) -> str:
+        blob = self.bucket.blob(object_name)
+        if hasattr(self.credentials, 'sign_bytes'):
+            return blob.generate_signed_url(version='v4', expiration=expiration, method='GET')
+
+        # Credentials without a private key (e.g. the App Engine default service account) sign through the IAM API,
+        # which requires the service account email and a fresh access token
+        if not self.credentials.valid:
+            self.credentials.refresh(google.auth.transport.requests.Request())
+        return blob.generate_signed_url(
+            version='v4',
+            expiration=expiration,
+            method='GET',
+            service_account_email=self.credentials.service_account_email,
+            access_token=self.credentials.token,
+        )
+
+    def object_exists(self, object_name: str) -> bool:
+        return self.bucket.blob(object_name).exists()
+
+    def list_object_md5s(self) -> dict[str, str]:
+        return {
+            blob.name: _base64_to_hex(blob.md5_hash)
+            for blob in self.client.list_blobs(self.bucket, fields='items(name,md5Hash),nextPageToken')
+            if blob.md5_hash
+        }
+
+    def get_object_md5(self, object_name: str) -> str | None:
+        blob = self.bucket.get_blob(object_name)
+        if blob is None or not blob.md5_hash:
+            return None
+        return _base64_to_hex(blob.md5_hash)
+
+    def upload(self, file_path: str, object_name: str, md5: str) -> None:
+        blob = self.bucket.blob(object_name, chunk_size=self.upload_chunk_size)
+        # The checksum is verified once the resumable upload completes, a mismatch deletes the object and raises
+        blob.upload_from_filename(file_path, checksum='md5')
+        if blob.md5_hash and _base64_to_hex(blob.md5_hash) != md5:
+            raise IOError(f"Uploaded object {object_name} does not match the local file {file_path}")
+
+    def copy(self, source_object_name: str, object_name: str) -> None:
+        self.bucket.copy_blob(self.bucket.blob(source_object_name), self.bucket, object_name)
+
+
+class LocalDirectoryBucket(Bucket):
+    """
+    Local directory standing in for an object-store bucket, for tests and offline development.
+    Objects are plain files of the directory and signed URLs mimic the GCS URL layout with an HMAC signature.
+    """
+
+    def __init__(self, directory: str, base_url: str = 'http://storage.localhost', signing_key: bytes = b'local-bucket'):
+        self.directory = os.path.abspath(directory)
+        self.name = os.path.basename(self.directory)
+        self.base_url = base_url.rstrip('/')
+        self.signing_key = signing_key
+        os.makedirs(self.directory, exist_ok=True)
+
+    def object_path(self, object_name: str) -> str:
+        return os.path.join(self.directory, object_name)
+
+    def generate_signed_url(self, object_name: str, expiration: timedelta) -> str:
+        expires = int(time.time() + expiration.total_seconds())
+        query = urlencode({'expires': expires, 'signature': self._sign(object_name, expires)})
+        return f"{self.base_url}/{self.name}/{quote(object_name)}?{query}"
+
+    def verify_signature(self, object_name: str, expires: int, signature: str) -> bool:
+        """
+        Check that a signed URL was issued by this bucket and has not expired yet.
+
+        Args:
+            object_name: Name of the object in the bucket
+            expires: Expiration timestamp carried by the URL
+            signature: Signature carried by the URL
+
+        Returns:
+            True if the signature is valid and not expired
+        """
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(signature, self._sign(object_name, expires))
+
+    def _sign(self, object_name: str, expires: int) -> str:
+        return hmac.new(self.signing_key, f"{object_name}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def object_exists(self, object_name: str) -> bool:
+        return os.path.isfile(self.object_path(object_name))
+
+    def list_object_md5s(self) -> dict[str, str]:
+        return {
+            entry.name: compute_md5(entry.path)
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and not entry.name.startswith('.')
+        }
+
+    def get_object_md5(self, object_name: str) -> str | None:
+        object_path = self.object_path(object_name)
+        if not os.path.isfile(object_path):
+            return None
+        return compute_md5(object_path)
+
+    def upload(self, file_path: str, object_name: str, md5: str) -> None:
+        # Copy to a temporary file first so that a partial copy never shows up as an object
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, prefix='.upload_')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as destination, open(file_path, 'rb') as source:
+                shutil.copyfileobj(source, destination)
+            if compute_md5(temporary_path) != md5:
+                raise IOError(f"Uploaded object {object_name} does not match the local file {file_path}")
+            os.replace(temporary_path, self.object_path(object_name))
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def copy(self, source_object_name: str, object_name: str) -> None:
+        source_path = self.object_path(source_object_name)
+        self.upload(source_path, object_name, compute_md5(source_path))
+
+
+def _base64_to_hex(value: str) -> str:
+    """Convert a base64 hash, as returned by GCS, into its hexadecimal representation."""
+    return base64.b64decode(value).hex()
+
+
+def get_bucket(bucket_name: str | None = None, bucket_directory: str | None = None) -> Bucket:
+    """
+    Get the bucket holding the content files: a local directory if one is given, the GCS bucket otherwise.
+
+    Args:
+        bucket_name: Name of the GCS bucket
+        bucket_directory: Directory used as a local stand-in bucket
+
+    Returns:
+        Bucket instance
+
+    Raises:
+        ValueError: If neither a bucket name nor a directory is given
+    """
+    if bucket_directory:
+        return LocalDirectoryBucket(bucket_directory)
+    if bucket_name:
+        return GCSBucket(bucket_name)
+    raise ValueError("Either a bucket name or a local bucket directory is required")
@@ -0,0 +1,211 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from platform_new.models.models import Path, Training, PathTraining, Step, Content, Tombstone
+
+# Models exposed by the changes feed, keyed by the name used in the payload, with the fields sent for each row
+CHANGE_FEED_MODELS = {
+    'paths': (Path, ['id', 'title', 'progression', 'score', 'updated_time']),
+    'trainings': (Training, ['id', 'title', 'type', 'progression', 'updated_time']),
+    'path_trainings': (PathTraining, ['id', 'path_id', 'training_id', 'position', 'updated_time']),
+    'steps': (Step, ['id', 'training_id', 'title', 'type', 'is_validated', 'is_blocked', 'updated_time']),
+    'contents': (Content, ['id', 'step_id', 'filename', 'type', 'updated_time']),
+}
+
+# Payload key of each model name recorded in the tombstones
+TOMBSTONE_KEYS = {model_class.__name__: key for key, (model_class, _) in CHANGE_FEED_MODELS.items()}
+
+# Sections of the feed, read one after the other by the pages of a sync: the models, then the tombstones
+CHANGE_FEED_SECTIONS = [*CHANGE_FEED_MODELS, 'deleted']
+
+
+@dataclass
+class ChangesCursor:
+    """
+    Position of a client in the changes feed.
+    A poll cursor only holds since, the start of the previous sync; a continuation cursor also holds the time its sync
+    started, and the section and the last row (time, id) of the page it follows.
+    """
+    since: datetime | None
+    started_time: datetime | None = None
+    section: int = 0
+    after: tuple[datetime, object] | None = None
+
+
+def encode_cursor(cursor: ChangesCursor | datetime) -> str:
+    """
+    Encode a position in the feed into an opaque cursor handed back to polling clients.
+
+    Args:
+        cursor: The position, or the time of a poll cursor
+
+    Returns:
+        URL-safe cursor string
+    """
+    if isinstance(cursor, datetime):
+        cursor = ChangesCursor(since=cursor)
+    value = {'since': cursor.since.isoformat() if cursor.since is not None else None}
+    if cursor.started_time is not None:
+        value['started_time'] = cursor.started_time.isoformat()
+        value['section'] = cursor.section
+        if cursor.after is not None:
+            value['after'] = [cursor.after[0].isoformat(), cursor.after[1]]
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> ChangesCursor:
+    """
+    Decode an opaque cursor produced by encode_cursor.
+    The cursors of the previous versions of the feed, holding a timestamp only, are read as poll cursors.
+
+    Args:
+        cursor: Cursor string received from a client
+
+    Returns:
+        The position stored in the cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded_cursor = cursor + '=' * (-len(cursor) % 4)
+        value = base64.urlsafe_b64decode(padded_cursor.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
+    if not value.startswith('{'):
+        return ChangesCursor(since=parse_since(value))
+
+    try:
+        value = json.loads(value)
+        since = parse_since(value['since']) if value['since'] is not None else None
+        if 'started_time' not in value:
+            return ChangesCursor(since=since)
+        after = value.get('after')
+        section = int(value['section'])
+        if not 0 <= section < len(CHANGE_FEED_SECTIONS):
+            raise ValueError(f"Invalid section {section}")
+        return ChangesCursor(
+            since=since,
+            started_time=parse_since(value['started_time']),
+            section=section,
+            after=(parse_since(after[0]), after[1]) if after is not None else None,
+        )
+    except (ValueError, KeyError, TypeError, IndexError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
+
+
+def parse_since(value: str) -> datetime:
+    """
+    Parse an ISO 8601 timestamp, naive timestamps being interpreted in the current timezone.
+
+    Args:
+        value: ISO 8601 timestamp
+
+    Returns:
+        Timezone-aware datetime
+
+    Raises:
+        ValueError: If the value is not a valid timestamp
+    """
+    timestamp = parse_datetime(value)
+    if timestamp is None:
+        raise ValueError(f"Invalid timestamp '{value}'")
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def get_changes(cursor: ChangesCursor, page_size: int | None = None) -> dict:
+    """
+    Collect a page of the rows updated and the ids deleted after the time of a cursor.
+    The rows are read section after section, each one by (updated_time, id), so that a sync of any size is split
+    into pages of at most page_size rows and tombstones, each page handing back the cursor of the next one.
+    A row committed after a poll can carry an updated_time earlier than the rows that poll read, so a sync reads
+    from CHANGES_FEED_OVERLAP_SECONDS before its since: the clients apply the rows and tombstones by id,
+    a row sent twice being written twice to the same value.
+    The lookups are served by the index on updated_time, so a poll without changes costs a few index probes.
+
+    Args:
+        cursor: Position of the client, a poll cursor starting a sync or the continuation cursor of its previous page
+        page_size: Maximum number of rows and tombstones of the page, CHANGES_FEED_PAGE_SIZE by default
+
+    Returns:
+        Dictionary with the changed rows per model, the tombstones, has_more and the cursor to use next:
+        the cursor of the next page while has_more, the cursor of the next poll otherwise
+    """
+    page_size = page_size or settings.CHANGES_FEED_PAGE_SIZE
+    # The next poll starts from the beginning of this sync, the rows changed while it ran being read again
+    started_time = cursor.started_time or timezone.now()
+    since = cursor.since - timedelta(seconds=settings.CHANGES_FEED_OVERLAP_SECONDS) if cursor.since is not None else None
+    changes = {key: [] for key in CHANGE_FEED_SECTIONS}
+    remaining = page_size
+    section, after = cursor.section, cursor.after
+    while section < len(CHANGE_FEED_SECTIONS):
+        key = CHANGE_FEED_SECTIONS[section]
+        # A full sync has no local copy to clean up, so tombstones are only sent for incremental polls
+        if key == 'deleted' and since is None:
+            section += 1
+            continue
+        rows, time_field = read_section(key, since, after, remaining + 1)
+        changes[key] = rows[:remaining]
+        if len(rows) > remaining:
+            if changes[key]:
+                last_row = changes[key][-1]
+                after = (last_row[time_field], last_row.get('_position_id', last_row['id']))
+            next_cursor = ChangesCursor(since=cursor.since, started_time=started_time, section=section, after=after)
+            strip_positions(changes)
+            return {**changes, 'has_more': True, 'cursor': encode_cursor(next_cursor)}
+        remaining -= len(rows)
+        section, after = section + 1, None
+
+    strip_positions(changes)
+    return {**changes, 'has_more': False, 'cursor': encode_cursor(ChangesCursor(since=started_time))}
+
+
+def read_section(key: str, since: datetime | None, after: tuple[datetime, object] | None, limit: int) -> tuple[list, str]:
+    """
+    Read the rows of a section of the feed changed after since, following a position.
+
+    Args:
+        key: Name of the section, one of CHANGE_FEED_SECTIONS
+        since: Start of the window, None for all the rows
+        after: (time, id) of the last row read in the section, None to start from its first row
+        limit: Maximum number of rows
+
+    Returns:
+        The rows and the name of their time field
+    """
+    if key == 'deleted':
+        queryset, time_field = Tombstone.objects.all(), 'deleted_time'  # type: ignore
+    else:
+        queryset, time_field = CHANGE_FEED_MODELS[key][0].objects.all(), 'updated_time'  # type: ignore
+    if since is not None:
+        queryset = queryset.filter(**{f"{time_field}__gt": since})
+    if after is not None:
+        after_time, after_id = after
+        queryset = queryset.filter(Q(**{f"{time_field}__gt": after_time}) | Q(**{time_field: after_time, 'pk__gt': after_id}))
+    queryset = queryset.order_by(time_field, 'pk')[:limit]
+
+    if key != 'deleted':
+        return list(queryset.values(*CHANGE_FEED_MODELS[key][1])), time_field
+    return [
+        {
+            'type': TOMBSTONE_KEYS.get(tombstone.model_name, tombstone.model_name),
+            'id': tombstone.object_id,
+            'deleted_time': tombstone.deleted_time,
+            # The tombstones are ordered by their own key, the id sent being the one of the deleted row
+            '_position_id': tombstone.pk,
+        }
+        for tombstone in queryset
+    ], time_field
+
+
+def strip_positions(changes: dict) -> None:
+    for tombstone in changes['deleted']:
+        tombstone.pop('_position_id', None)
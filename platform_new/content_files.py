@@ -0,0 +1,261 @@
+import mimetypes
+import os
+import re
+import stat
+import threading
+from dataclasses import dataclass
+from django.conf import settings
+from django.http import FileResponse, HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from platform_new.scrapper.logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Directory containing the scrapped content files
+CONTENT_DIRECTORY = os.path.join(settings.BASE_DIR, 'platform_new', 'contents')
+
+# Content files of these types are rarely rewritten, so browsers keep them for a while before revalidating them
+CACHED_CONTENT_TYPES = ('application/pdf', 'video/')
+
+# SHA-256 digest of the content in the name of a file, whose content then never changes under that name
+DIGEST_REGEX = re.compile(r'[0-9a-f]{64}')
+
+RANGE_REGEX = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+@dataclass(frozen=True)
+class ContentFileInfo:
+    """Metadata of a content file, computed once and reused for every request on that file."""
+    path: str
+    size: int
+    mtime: float
+    content_type: str | None
+    etag: str
+
+    @property
+    def disposition(self) -> str:
+        """PDFs and videos are displayed inline, other files are downloaded as attachments."""
+        if self.content_type == 'application/pdf':
+            return 'inline'
+        if self.content_type and self.content_type.startswith('video/'):
+            return 'inline'
+        return 'attachment'
+
+    @property
+    def is_cached(self) -> bool:
+        return bool(self.content_type) and self.content_type.startswith(CACHED_CONTENT_TYPES)
+
+    @property
+    def is_immutable(self) -> bool:
+        """Only a name holding the digest of the content is immutable, the step files (content_<id>.pdf) are rewritten in place."""
+        return bool(DIGEST_REGEX.search(os.path.basename(self.path)))
+
+
+class ContentFileIndex:
+    """
+    In-memory index of the content files: filename -> (size, mtime, mime, etag).
+    Files are indexed the first time they are requested, and each later hit checks the size and mtime of the entry
+    against a stat of the file, so a file rewritten by another process (a scraper, a sync) is indexed again instead of
+    being served with the length and ETag of its previous version. Scrapers of this process also invalidate
+    the entry of a file each time they write it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._entries: dict[str, ContentFileInfo] = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename: str) -> ContentFileInfo | None:
+        """
+        Get the metadata of a content file.
+
+        Args:
+            filename: Name of the file in the content directory
+
+        Returns:
+            ContentFileInfo of the file, or None if the file does not exist
+        """
+        info = self._entries.get(filename)
+        if info is None:
+            # Reject anything that could point outside of the content directory
+            if not filename or filename.startswith('.') or os.sep in filename or (os.altsep and os.altsep in filename):
+                return None
+            file_path = os.path.join(self.directory, filename)
+        else:
+            file_path = info.path
+
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            stat_result = None
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            if info is not None:
+                self.invalidate(filename)
+            return None
+        if info is not None and info.size == stat_result.st_size and info.mtime == stat_result.st_mtime:
+            return info
+
+        info = self._build_info(file_path, stat_result)
+        with self._lock:
+            self._entries[filename] = info
+        return info
+
+    def invalidate(self, filename: str) -> None:
+        """Drop the entry of a file which has been written or deleted."""
+        with self._lock:
+            self._entries.pop(filename, None)
+
+    def _build_info(self, file_path: str, stat_result: os.stat_result) -> ContentFileInfo:
+        content_type, _ = mimetypes.guess_type(file_path)
+        return ContentFileInfo(
+            path=file_path,
+            size=stat_result.st_size,
+            mtime=stat_result.st_mtime,
+            content_type=content_type,
+            etag=f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"',
+        )
+
+
+content_file_index = ContentFileIndex(CONTENT_DIRECTORY)
+
+
+class FileRange:
+    """
+    File-like object limited to a byte range of an open file.
+    It keeps exposing fileno(), so WSGI servers implementing wsgi.file_wrapper with sendfile (e.g. gunicorn)
+    send the range straight from the page cache, while other servers read at most the requested bytes.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def parse_range_header(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single-range Range header.
+
+    Args:
+        range_header: Value of the Range header, e.g. "bytes=0-1023", "bytes=1024-" or "bytes=-500"
+        size: Size of the file in bytes
+
+    Returns:
+        Tuple (start, end) with end inclusive, or None if the range cannot be satisfied
+
+    Raises:
+        ValueError: If the header is not a single byte range, in which case the whole file is served
+    """
+    match = RANGE_REGEX.match(range_header.strip())
+    if not match or match.groups() == ('', ''):
+        raise ValueError(f"Unsupported range '{range_header}'")
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes of the file
+        suffix_length = int(last)
+        if suffix_length == 0 or size == 0:
+            return None
+        return max(0, size - suffix_length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, end
+
+
+def serve_content_file(request: HttpRequest, filename: str, info: ContentFileInfo) -> HttpResponse:
+    """
+    Serve a content file with support for conditional and range requests.
+
+    Args:
+        request: The HTTP request
+        filename: Name of the file requested
+        info: Indexed metadata of the file
+
+    Returns:
+        304 if the client copy is still valid, 206 for a satisfiable range, 416 for an unsatisfiable one
+        and 200 with the whole file otherwise
+    """
+    conditional_response = get_conditional_response(request, etag=info.etag, last_modified=int(info.mtime))
+    if conditional_response is not None:
+        _set_caching_headers(conditional_response, info)
+        return conditional_response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and _is_range_still_valid(request, info):
+        try:
+            byte_range = parse_range_header(range_header, info.size)
+        except ValueError:
+            # Multiple or malformed ranges are answered with the whole file
+            byte_range = None
+        else:
+            if byte_range is None:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{info.size}'
+                _set_caching_headers(response, info)
+                return response
+
+    try:
+        file = open(info.path, 'rb')
+    except OSError:
+        # The file disappeared since it was indexed
+        content_file_index.invalidate(filename)
+        raise FileNotFoundError(filename)
+
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(FileRange(file, start, length), content_type=info.content_type, status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{info.size}'
+    else:
+        length = info.size
+        response = FileResponse(file, content_type=info.content_type)
+
+    response['Content-Length'] = str(length)
+    response['Content-Disposition'] = f'{info.disposition}; filename="{filename}"'
+    _set_caching_headers(response, info)
+    return response
+
+
+def _is_range_still_valid(request: HttpRequest, info: ContentFileInfo) -> bool:
+    """Check the If-Range header: a range only applies if the client copy matches the current file."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return info.etag in parse_etags(if_range)
+    return if_range == http_date(int(info.mtime))
+
+
+def _set_caching_headers(response: HttpResponse, info: ContentFileInfo) -> None:
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = info.etag
+    response['Last-Modified'] = http_date(int(info.mtime))
+    if info.is_immutable:
+        response['Cache-Control'] = f'public, max-age={settings.CONTENT_FILE_IMMUTABLE_MAX_AGE}, immutable'
+    elif info.is_cached:
+        # The file of a step is overwritten when the step changes, so clients revalidate it with the ETag once stale
+        response['Cache-Control'] = f'public, max-age={settings.CONTENT_FILE_MAX_AGE}'
+    else:
+        # Text contents can be rewritten by a new scrape, so clients revalidate them with the ETag
+        response['Cache-Control'] = 'public, no-cache'
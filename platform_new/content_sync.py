@@ -0,0 +1,175 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from platform_new.buckets import Bucket, compute_md5
+from platform_new.scrapper.logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# The manifest is saved every this many uploads, so an interrupted sync keeps track of what was already transferred
+MANIFEST_SAVE_INTERVAL = 50
+
+
+@dataclass
+class SyncReport:
+    """Summary of a synchronisation run."""
+    scanned: int = 0
+    hashed: int = 0
+    uploaded: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    uploaded_bytes: int = 0
+    duration: float = 0.0
+
+
+class SyncManifest:
+    """
+    Local record of the files known to be in the bucket: name -> (size, mtime, md5).
+    A file whose size and mtime match its entry is known to be up to date without being hashed or looked up remotely.
+    Entries are only written after a successful upload, so a partial upload is never considered done.
+    """
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.entries: dict[str, dict] = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def is_up_to_date(self, name: str, size: int, mtime: float) -> bool:
+        entry = self.entries.get(name)
+        return entry is not None and entry['size'] == size and entry['mtime'] == mtime
+
+    def get_md5(self, name: str) -> str | None:
+        entry = self.entries.get(name)
+        return entry['md5'] if entry else None
+
+    def record(self, name: str, size: int, mtime: float, md5: str) -> None:
+        self.entries[name] = {'size': size, 'mtime': mtime, 'md5': md5}
+
+    def save(self) -> None:
+        # Write to a temporary file first so that an interruption never leaves a truncated manifest
+        temporary_path = f"{self.manifest_path}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(temporary_path, self.manifest_path)
+
+
+def sync_directory_to_bucket(
+    local_directory: str,
+    bucket: Bucket,
+    manifest_path: str | None = None,
+    workers: int = 8,
+    full: bool = False,
+    dry_run: bool = False,
+) -> SyncReport:
+    """
+    Upload the new and changed files of a local directory to a bucket.
+    Files are compared by checksum, so a re-scraped file with the same name but a new content is uploaded again.
+
+    Args:
+        local_directory: Directory containing the files to upload
+        bucket: Destination bucket
+        manifest_path: Path of the sync manifest, defaults to a hidden file of the local directory named after the bucket
+        workers: Maximum number of parallel uploads
+        full: Ignore the manifest and compare every file against the bucket listing
+        dry_run: Only report the files which would be uploaded
+
+    Returns:
+        SyncReport of the run
+
+    Raises:
+        FileNotFoundError: If the local directory does not exist
+    """
+    if not os.path.isdir(local_directory):
+        raise FileNotFoundError(f"Local directory {local_directory} does not exist.")
+
+    start_time = time.monotonic()
+    report = SyncReport()
+    manifest = SyncManifest(manifest_path or os.path.join(local_directory, f".sync_manifest_{bucket.name}.json"))
+
+    # Find the files which changed since their last upload, hashing only those
+    candidates = []
+    for entry in os.scandir(local_directory):
+        if not entry.is_file() or entry.name.startswith('.'):
+            continue
+        report.scanned += 1
+        stat_result = entry.stat()
+        if not full and manifest.is_up_to_date(entry.name, stat_result.st_size, stat_result.st_mtime):
+            continue
+        md5 = compute_md5(entry.path)
+        report.hashed += 1
+        if not full and manifest.get_md5(entry.name) == md5:
+            # Touched but unchanged: only refresh the manifest entry
+            manifest.record(entry.name, stat_result.st_size, stat_result.st_mtime, md5)
+            continue
+        candidates.append((entry.name, entry.path, stat_result.st_size, stat_result.st_mtime, md5))
+
+    # Without a manifest, one listing of the bucket seeds the comparison instead of one lookup per file
+    remote_md5s = bucket.list_object_md5s() if (full or not manifest.entries) and candidates else None
+
+    if dry_run:
+        report.uploaded = [
+            name for name, _, _, _, md5 in candidates
+            if remote_md5s is None or remote_md5s.get(name) != md5
+        ]
+        report.duration = time.monotonic() - start_time
+        return report
+
+    # Files sharing a payload (hard links of the content store) are transferred once, then copied within the bucket
+    remote_names_by_md5 = {entry['md5']: name for name, entry in manifest.entries.items()}
+    first_candidates, duplicate_candidates, candidate_md5s = [], [], set()
+    for candidate in candidates:
+        md5 = candidate[4]
+        if md5 in candidate_md5s:
+            duplicate_candidates.append(candidate)
+        else:
+            candidate_md5s.add(md5)
+            first_candidates.append(candidate)
+
+    def sync_file(name: str, file_path: str, md5: str) -> str | None:
+        remote_md5 = remote_md5s.get(name) if remote_md5s is not None else bucket.get_object_md5(name)
+        if remote_md5 == md5:
+            return None
+        source_name = remote_names_by_md5.get(md5)
+        if source_name is not None and source_name != name:
+            bucket.copy(source_name, name)
+            return 'copied'
+        bucket.upload(file_path, name, md5)
+        return 'uploaded'
+
+    completed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        # Duplicates are only synced once the first file of their payload is in the bucket
+        for wave in (first_candidates, duplicate_candidates):
+            futures = {
+                executor.submit(sync_file, name, file_path, md5): (name, size, mtime, md5)
+                for name, file_path, size, mtime, md5 in wave
+            }
+            for future in as_completed(futures):
+                name, size, mtime, md5 = futures[future]
+                try:
+                    transfer = future.result()
+                    if transfer is not None:
+                        report.uploaded.append(name)
+                    if transfer == 'uploaded':
+                        report.uploaded_bytes += size
+                    manifest.record(name, size, mtime, md5)
+                    remote_names_by_md5.setdefault(md5, name)
+                except Exception as e:
+                    logger.error(f"Failed to upload {name}: {str(e)}")
+                    report.failed.append(name)
+                completed += 1
+                if completed % MANIFEST_SAVE_INTERVAL == 0:
+                    manifest.save()
+
+    manifest.save()
+    report.duration = time.monotonic() - start_time
+    logger.info(
+        f"Synced {local_directory} to {bucket.name}: {report.scanned} files scanned, {report.hashed} hashed, "
+        f"{len(report.uploaded)} uploaded ({report.uploaded_bytes} bytes), {len(report.failed)} failed "
+        f"in {report.duration:.1f}s"
+    )
+    return report
@@ -24,3 +24,17 @@ def local_environment_required(func):
                 )
         return func(*args, **kwargs)
     return wrapper
+
+
+def compressed_cache(func=None, *, uncached_params=()):
+    """
+    Decorator that marks a view whose responses can be cached by the CompressionMiddleware.
+    The rendered body and its Brotli and gzip variants are stored in the cache until the scrapped data changes.
+    The requests with one of the uncached_params in their query string are never cached, e.g. the polls of a feed
+    whose cursor changes on every request. Usable as @compressed_cache or compressed_cache(uncached_params=(...)).
+    """
+    def decorator(func):
+        func.compressed_cache = True
+        func.compressed_cache_uncached_params = tuple(uncached_params)
+        return func
+    return decorator(func) if func is not None else decorator
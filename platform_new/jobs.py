@@ -0,0 +1,181 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from platform_new.models.models import ScrapeJob
+from platform_new.scrapper.logger import get_logger
+from platform_new.scrapper.events import job_events, publish
+from platform_new.scrapper.stages import STAGES, StageCancelled, StageProgress
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+
+class JobProgress(StageProgress):
+    """
+    Progress of a stage stored in its ScrapeJob row.
+    Writes and cancellation checks are throttled, so reporting costs at most one query per interval.
+    Several workers may report at once: the counters are updated under a lock, and written after releasing it.
+    """
+
+    def __init__(self, job: ScrapeJob, interval: float = 2.0):
+        self.job = job
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last_save_time = 0.0
+        self._last_cancel_check_time = 0.0
+        self._is_cancelled = False
+
+    def set_total(self, total: int) -> None:
+        with self._lock:
+            self.job.total_count = total
+        self._save(force=True)
+
+    def advance(self, count: int = 1) -> None:
+        with self._lock:
+            self.job.processed_count += count
+        self._save()
+
+    def is_cancelled(self) -> bool:
+        now = time.monotonic()
+        if not self._is_cancelled and now - self._last_cancel_check_time >= self.interval:
+            self._last_cancel_check_time = now
+            self._is_cancelled = ScrapeJob.objects.filter(id=self.job.id, cancel_requested=True).exists()  # type: ignore
+        return self._is_cancelled
+
+    def _save(self, force: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_save_time < self.interval:
+                return
+            self._last_save_time = now
+            processed_count, total_count = self.job.processed_count, self.job.total_count
+        ScrapeJob.objects.filter(id=self.job.id).update(  # type: ignore
+            processed_count=processed_count,
+            total_count=total_count,
+            updated_time=timezone.now(),
+        )
+
+
+class JobRunner:
+    """
+    In-process runner executing the scrape jobs on a pool of worker threads.
+    At most SCRAPE_JOBS_MAX_CONCURRENCY jobs run at the same time, the others wait in the queued status.
+    """
+
+    def __init__(self, max_workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape-job')
+
+    def submit(self, job_id: str) -> None:
+        self.executor.submit(run_job, job_id)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Get the job runner of this process, created on first use."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner(max_workers=settings.SCRAPE_JOBS_MAX_CONCURRENCY)
+    return _runner
+
+
+def enqueue_job(stage: str, parameters: dict | None = None) -> ScrapeJob:
+    """
+    Create a scrape job and submit it to the job runner.
+
+    Args:
+        stage: Name of the stage to execute ('paths', 'steps' or 'contents')
+        parameters: Keyword arguments of the stage function, e.g. {'training_ids': [...]}
+
+    Returns:
+        The created ScrapeJob, in the queued status
+
+    Raises:
+        ValueError: If the stage is unknown
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage '{stage}', expected one of {', '.join(STAGES)}")
+    job = ScrapeJob.objects.create(id=uuid.uuid4().hex, stage=stage, parameters=parameters or {})  # type: ignore
+    get_job_runner().submit(job.id)
+    logger.info(f"Enqueued {job}")
+    return job
+
+
+def cancel_job(job_id: str) -> ScrapeJob:
+    """
+    Request the cancellation of a job. A queued job is cancelled right away, a running one at its next checkpoint.
+
+    Args:
+        job_id: ID of the job
+
+    Returns:
+        The updated ScrapeJob
+
+    Raises:
+        ScrapeJob.DoesNotExist: If the job does not exist
+    """
+    ScrapeJob.objects.filter(id=job_id, status=ScrapeJob.STATUS_QUEUED).update(  # type: ignore
+        status=ScrapeJob.STATUS_CANCELLED,
+        finished_time=timezone.now(),
+    )
+    ScrapeJob.objects.filter(id=job_id).exclude(status__in=ScrapeJob.FINISHED_STATUSES).update(  # type: ignore
+        cancel_requested=True
+    )
+    return ScrapeJob.objects.get(id=job_id)  # type: ignore
+
+
+def run_job(job_id: str) -> None:
+    """
+    Execute a queued job and record its outcome.
+
+    Args:
+        job_id: ID of the job
+    """
+    try:
+        # Claim the job atomically, so that a job cancelled or taken in the meantime is not executed
+        is_claimed = ScrapeJob.objects.filter(id=job_id, status=ScrapeJob.STATUS_QUEUED).update(  # type: ignore
+            status=ScrapeJob.STATUS_RUNNING,
+            started_time=timezone.now(),
+        )
+        if not is_claimed:
+            return
+
+        job = ScrapeJob.objects.get(id=job_id)  # type: ignore
+        logger.info(f"Running {job}")
+        with job_events(job_id):
+            publish('job_started', stage=job.stage)
+            try:
+                result = STAGES[job.stage](progress=JobProgress(job), **job.parameters)
+                # The pipeline reports the errors of its workers instead of raising, with what they saved before failing
+                errors = result.get('errors') if isinstance(result, dict) else None
+                if errors:
+                    logger.error(f"{job} finished with {len(errors)} errors")
+                    status, message = ScrapeJob.STATUS_FAILED, '; '.join(errors)
+                else:
+                    status, message = ScrapeJob.STATUS_SUCCEEDED, ''
+            except StageCancelled:
+                result, status, message = {}, ScrapeJob.STATUS_CANCELLED, 'Cancelled on request'
+            except Exception as e:
+                logger.error(f"{job} failed: {str(e)}")
+                result, status, message = {}, ScrapeJob.STATUS_FAILED, str(e)
+            publish('job_finished', stage=job.stage, status=status, result=result, message=message)
+
+        ScrapeJob.objects.filter(id=job_id).update(  # type: ignore
+            status=status,
+            result=result,
+            message=message,
+            processed_count=job.processed_count,
+            finished_time=timezone.now(),
+            updated_time=timezone.now(),
+        )
+        logger.info(f"{job} finished with status {status}")
+    finally:
+        # Worker threads have their own database connection, which is not closed by the request cycle
+        connection.close()
@@ -0,0 +1,39 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from platform_new.models.models import ScrapeTask
+from platform_new.scrapper.scheduler import build_refresh_plan
+from platform_new.task_queue import enqueue_tasks
+
+
+class Command(BaseCommand):
+    help = "Fill the shared queue of scrape tasks with the trainings due for a refresh, or print the state of the queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'stage',
+            choices=['steps', 'contents', 'status'],
+            help="steps enqueues the steps of the trainings (their contents follow), contents only their contents",
+        )
+        parser.add_argument('--trainings', nargs='+', metavar='TRAINING_ID', help="Only enqueue these trainings")
+        parser.add_argument('--paths', nargs='+', metavar='PATH_ID', help="Only enqueue the trainings of these paths")
+        parser.add_argument('--full', action='store_true', help="Enqueue every training instead of the ones due")
+
+    def handle(self, *args, **options):
+        if options['stage'] == 'status':
+            status_counts = ScrapeTask.objects.values('kind', 'status').annotate(count=Count('id')).order_by('kind', 'status')  # type: ignore
+            self.stdout.write(json.dumps(list(status_counts)))
+            return
+
+        plan = build_refresh_plan(
+            stage=options['stage'],
+            training_ids=options['trainings'],
+            path_ids=options['paths'],
+            full=options['full'] or bool(options['trainings']),
+        )
+        kind = ScrapeTask.KIND_TRAINING_STEPS if options['stage'] == 'steps' else ScrapeTask.KIND_TRAINING_CONTENTS
+        # The trainings of a new refresh are scraped again even if a previous refresh already did them
+        pending_count = enqueue_tasks(kind=kind, target_ids=plan.training_ids, requeue_finished=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"{pending_count} {kind} tasks pending, {plan.skipped} trainings not due"
+        ))
@@ -0,0 +1,111 @@
+import json
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from platform_new.models.models import PathTraining, RefreshState, Step, Training
+from platform_new.scrapper.training_extraction import _create_training_id
+
+# Links between the paths and the trainings read from the old schema, kept between the two phases
+DEFAULT_EXPORT_FILE = os.path.join(settings.BASE_DIR, 'path_trainings_export.json')
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the trainings saved with a single path (Training.path) to the PathTraining links, in two phases around "
+        "the migration dropping the column: --export before `migrate`, --import after it."
+    )
+
+    def add_arguments(self, parser):
+        phase = parser.add_mutually_exclusive_group(required=True)
+        phase.add_argument('--export', action='store_true', help="Save the links of the old schema, before migrating")
+        phase.add_argument('--import', dest='import_', action='store_true', help="Create the PathTraining links, after migrating")
+        parser.add_argument('--file', default=DEFAULT_EXPORT_FILE, help="File holding the links between the two phases")
+
+    def handle(self, *args, **options):
+        if options['export']:
+            self.export_links(options['file'])
+        else:
+            self.import_links(options['file'])
+
+    def export_links(self, file_path: str) -> None:
+        """Save the trainings of the old schema with their path, if the training table still has its path column."""
+        table = Training._meta.db_table
+        with connection.cursor() as cursor:
+            if table not in connection.introspection.table_names(cursor):
+                self.stdout.write(f"{table} does not exist yet, nothing to export")
+                return
+            columns = [column.name for column in connection.introspection.get_table_description(cursor, table)]
+            if 'path_id' not in columns:
+                self.stdout.write(f"{table} has no path column, nothing to export")
+                return
+            cursor.execute(f"SELECT id, path_id, title, type FROM {table} WHERE path_id IS NOT NULL ORDER BY id")
+            rows = [
+                {'id': training_id, 'path_id': path_id, 'title': title, 'type': training_type}
+                for training_id, path_id, title, training_type in cursor.fetchall()
+            ]
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(rows, file)
+        self.stdout.write(self.style.SUCCESS(f"Exported the path of {len(rows)} trainings to {file_path}"))
+
+    def import_links(self, file_path: str) -> None:
+        """
+        Link each exported training to its path under the ID of the current schema, made of its title and type.
+        The steps of the old rows move to the new one, then the old rows are deleted.
+        """
+        if not os.path.exists(file_path):
+            self.stdout.write(f"No export at {file_path}, nothing to import")
+            return
+        with open(file_path, encoding='utf-8') as file:
+            rows = json.load(file)
+
+        links: dict[str, PathTraining] = {}
+        moved_training_ids = set()
+        try:
+            with transaction.atomic():
+                for row in rows:
+                    training_id = _create_training_id(row['title'], row['type'])
+                    if training_id != row['id']:
+                        self._move_training(row['id'], training_id)
+                        moved_training_ids.add(row['id'])
+                    link_id = f"{row['path_id']}__{training_id}"
+                    position = _get_old_position(row['id'])
+                    # A training listed twice in a path keeps its first position
+                    if link_id not in links or position < links[link_id].position:
+                        links[link_id] = PathTraining(id=link_id, path_id=row['path_id'], training_id=training_id, position=position)
+                PathTraining.objects.bulk_create(  # type: ignore
+                    list(links.values()),
+                    update_conflicts=True,
+                    update_fields=['position', 'updated_time'],
+                    unique_fields=['path', 'training'],
+                )
+                Training.objects.filter(id__in=moved_training_ids).delete()  # type: ignore
+        except Exception as e:
+            raise CommandError(f"Failed to import the links of {file_path}: {str(e)}")
+
+        os.remove(file_path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(links)} links between paths and trainings, {len(moved_training_ids)} trainings moved to their new ID"
+        ))
+
+    def _move_training(self, old_training_id: str, training_id: str) -> None:
+        """Copy an old training row under its new ID, if not done yet, and move its steps to it."""
+        if not Training.objects.filter(id=training_id).exists():  # type: ignore
+            training = Training.objects.get(id=old_training_id)  # type: ignore
+            Training.objects.create(  # type: ignore
+                id=training_id,
+                platform_id=training_id,
+                title=training.title,
+                progression=training.progression,
+                score=training.score,
+                type=training.type,
+            )
+        Step.objects.filter(training_id=old_training_id).update(training_id=training_id)  # type: ignore
+        # The refresh history belongs to the old row, the new one is checked again by the next steps run
+        RefreshState.objects.filter(training_id=old_training_id).delete()  # type: ignore
+
+
+def _get_old_position(old_training_id: str) -> int:
+    """Position of a training within its path, the old IDs ending with _index_<position>."""
+    _, _, position = old_training_id.rpartition('_index_')
+    return int(position) if position.isdigit() else 0
@@ -0,0 +1,23 @@
+import json
+from django.core.management.base import BaseCommand
+from platform_new.scrapper.records import measure_record_footprint
+
+
+class Command(BaseCommand):
+    help = "Measure the memory and the construction time of the scraped steps held as models and as records."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100_000, help="Number of steps to build, e.g. the size of the catalogue")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        report = measure_record_footprint(count=options['count'])
+        if options['json']:
+            self.stdout.write(json.dumps(report))
+            return
+        for name in ('models', 'records'):
+            self.stdout.write(
+                f"{name}: {report[name]['bytes_per_instance']} bytes and "
+                f"{report[name]['microseconds_per_instance']} µs per step"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Records take {report['memory_ratio']}x less memory than models"))
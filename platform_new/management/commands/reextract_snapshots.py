@@ -0,0 +1,42 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from platform_new.scrapper.archive import PAGE_KINDS, SnapshotArchive
+from platform_new.scrapper.reextraction import reextract_archive
+
+
+class Command(BaseCommand):
+    help = "Rebuild the paths, trainings, steps and contents from the archived pages, without browser nor platform."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archive',
+            default=settings.SNAPSHOT_ARCHIVE_DIRECTORY,
+            help="Directory of the archive, SNAPSHOT_ARCHIVE_DIRECTORY by default",
+        )
+        parser.add_argument('--kinds', nargs='+', choices=PAGE_KINDS, help="Only extract these kinds of pages")
+        parser.add_argument('--workers', type=int, default=None, help="Number of processes parsing the pages, one per CPU by default")
+        parser.add_argument('--dry-run', action='store_true', help="Extract the records and count them without saving them")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        if not options['archive']:
+            raise CommandError("No archive: set SNAPSHOT_ARCHIVE_DIRECTORY or pass --archive")
+
+        report = reextract_archive(
+            archive=SnapshotArchive(options['archive']),
+            kinds=options['kinds'],
+            workers=options['workers'],
+            save=not options['dry_run'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(report))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['pages']} pages: {report['paths']} paths, {report['trainings']} trainings, "
+            f"{report['steps']} steps, {report['contents']} contents "
+            f"{'extracted' if options['dry_run'] else 'saved'} in {report['duration']}s"
+        ))
+        for error in report['errors']:
+            self.stderr.write(error)
@@ -0,0 +1,198 @@
+import json
+import re
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from platform_new.changes import parse_since
+from platform_new.scrapper.scheduler import build_refresh_plan
+from platform_new.scrapper.stages import (
+    SharedStageProgress,
+    run_stage_in_workers,
+    scrap_paths_and_trainings_stage,
+    scrap_pipeline_stage,
+    select_training_ids,
+)
+
+# Relative ages accepted by --since, e.g. 30m, 12h, 7d or 2w
+AGE_PATTERN = re.compile(r'^(\d+)([mhdw])$')
+AGE_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def parse_staleness(value: str) -> datetime:
+    """
+    Parse the --since option, either a relative age (7d) or an ISO 8601 timestamp.
+
+    Args:
+        value: Value of the option
+
+    Returns:
+        Timezone-aware datetime before which a training is considered stale
+
+    Raises:
+        ValueError: If the value is neither an age nor a timestamp
+    """
+    match = AGE_PATTERN.match(value)
+    if match:
+        return timezone.now() - timedelta(**{AGE_UNITS[match.group(2)]: int(match.group(1))})
+    return parse_since(value)
+
+
+class Command(BaseCommand):
+    help = "Scrap the paths and trainings, the steps or the contents of the training platform without the web server."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'stage',
+            choices=['paths', 'steps', 'contents', 'pipeline'],
+            help="Stage to run, pipeline running the three of them at once",
+        )
+        parser.add_argument('--workers', type=int, default=1, help="Number of browsers scraping in parallel (steps and contents)")
+        parser.add_argument(
+            '--tabs',
+            type=int,
+            default=1,
+            help="Number of tabs of each browser, the next trainings loading in the background (steps)",
+        )
+        parser.add_argument('--content-workers', type=int, default=1, help="Number of browsers scraping the contents (pipeline)")
+        parser.add_argument('--no-contents', action='store_true', help="Stop the pipeline at the steps")
+        parser.add_argument('--trainings', nargs='+', metavar='TRAINING_ID', help="Only scrap these trainings")
+        parser.add_argument('--paths', nargs='+', metavar='PATH_ID', help="Only scrap the trainings of these paths")
+        parser.add_argument(
+            '--since',
+            help="Only scrap the trainings not scrapped since this age (e.g. 7d, 12h) or ISO timestamp",
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Scrap every selected training instead of only those due in the refresh schedule",
+        )
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoints of previous content runs")
+        parser.add_argument(
+            '--overlap-unblocking',
+            action='store_true',
+            help="Unblock the steps while scraping their contents, each step page being loaded once (contents)",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Only print what would be scrapped")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        stage = options['stage']
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        start_time = time.monotonic()
+        if stage == 'paths':
+            report = self._run_paths_stage(options)
+        elif stage == 'pipeline':
+            report = self._run_pipeline(options)
+        else:
+            report = self._run_training_stage(stage, options)
+        report['duration'] = round(time.monotonic() - start_time, 3)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, default=str))
+        else:
+            self._write_summary(report)
+
+    def _run_paths_stage(self, options: dict) -> dict:
+        # The catalogue is paginated in a single browser, so this stage ignores the filters and the workers
+        report = {'stage': 'paths', 'dry_run': options['dry_run'], 'workers': 1}
+        if options['dry_run']:
+            return report
+        try:
+            report['result'] = scrap_paths_and_trainings_stage()
+        except Exception as e:
+            raise CommandError(f"Paths stage failed: {str(e)}")
+        return report
+
+    def _run_pipeline(self, options: dict) -> dict:
+        # The trainings are discovered while the pipeline runs, so the training filters don't apply
+        report = {
+            'stage': 'pipeline',
+            'dry_run': options['dry_run'],
+            'workers': options['workers'],
+            'content_workers': 0 if options['no_contents'] else options['content_workers'],
+        }
+        if options['dry_run']:
+            return report
+        try:
+            report['result'] = scrap_pipeline_stage(
+                step_workers=options['workers'],
+                content_workers=options['content_workers'],
+                scrap_contents=not options['no_contents'],
+                full=options['full'],
+            )
+        except KeyboardInterrupt:
+            raise CommandError("Interrupted")
+        return report
+
+    def _run_training_stage(self, stage: str, options: dict) -> dict:
+        try:
+            not_scrapped_since = parse_staleness(options['since']) if options['since'] else None
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        training_ids = select_training_ids(
+            stage=stage,
+            training_ids=options['trainings'],
+            path_ids=options['paths'],
+            not_scrapped_since=not_scrapped_since,
+        )
+        # Trainings named explicitly are always scrapped, the others only when the refresh schedule says so
+        reasons = {}
+        if training_ids and not options['full'] and not options['trainings']:
+            refresh_plan = build_refresh_plan(stage=stage, training_ids=training_ids)
+            training_ids, reasons = refresh_plan.training_ids, refresh_plan.due
+
+        report = {
+            'stage': stage,
+            'dry_run': options['dry_run'],
+            'workers': max(1, min(options['workers'], len(training_ids))),
+            'since': not_scrapped_since,
+            'trainings': len(training_ids),
+        }
+        if options['dry_run']:
+            # The workers pull the trainings from a shared frontier, in this order
+            report['plan'] = training_ids
+            report['reasons'] = reasons
+            return report
+        if not training_ids:
+            report['result'] = {}
+            return report
+
+        if stage == 'contents':
+            parameters = {'resume': not options['restart'], 'overlap_unblocking': options['overlap_unblocking']}
+        else:
+            parameters = {'tabs': options['tabs']}
+        progress = SharedStageProgress()
+        try:
+            report.update(run_stage_in_workers(
+                stage=stage,
+                training_ids=training_ids,
+                workers=options['workers'],
+                progress=progress,
+                **parameters,
+            ))
+        except KeyboardInterrupt:
+            raise CommandError("Interrupted")
+        report['processed'] = progress.processed
+        return report
+
+    def _write_summary(self, report: dict) -> None:
+        if report['dry_run']:
+            self.stdout.write(f"Dry run of the {report['stage']} stage on {report['workers']} worker(s)")
+            reasons = report.get('reasons', {})
+            plan = report.get('plan', [])
+            if plan:
+                trainings = ', '.join(f"{training_id} ({reasons[training_id]})" if training_id in reasons else str(training_id) for training_id in plan)
+                self.stdout.write(f"  {len(plan)} trainings, pulled by the workers in this order: {trainings}")
+            return
+        result = ', '.join(
+            f"{value} {key}" for key, value in report.get('result', {}).items() if isinstance(value, int)
+        ) or 'nothing scrapped'
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['stage']} stage done in {report['duration']:.1f}s on {report['workers']} worker(s): {result}"
+        ))
+        for error in report.get('errors', []):
+            self.stdout.write(self.style.ERROR(f"  {error}"))
@@ -0,0 +1,32 @@
+import json
+from django.core.management.base import BaseCommand
+from platform_new.models.models import ScrapeTask
+from platform_new.scrapper.task_worker import run_worker
+
+
+class Command(BaseCommand):
+    help = "Execute the scrape tasks of the shared queue, start one per browser on any host pointing at the same database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker-id', help="ID of the worker, the host name and process id by default")
+        parser.add_argument(
+            '--kinds',
+            nargs='+',
+            choices=[kind for kind, _ in ScrapeTask.KIND_CHOICES],
+            help="Only execute tasks of these kinds",
+        )
+        parser.add_argument('--lease-seconds', type=int, help="Duration of the leases, SCRAPE_TASK_LEASE_SECONDS by default")
+        parser.add_argument('--poll-interval', type=float, default=5.0, help="Seconds between two polls of an empty queue")
+        parser.add_argument('--exit-when-idle', action='store_true', help="Stop once the queue is empty")
+        parser.add_argument('--max-tasks', type=int, help="Stop after this number of tasks")
+
+    def handle(self, *args, **options):
+        counts = run_worker(
+            worker_id=options['worker_id'],
+            kinds=options['kinds'],
+            lease_seconds=options['lease_seconds'],
+            poll_interval=options['poll_interval'],
+            exit_when_idle=options['exit_when_idle'],
+            max_tasks=options['max_tasks'],
+        )
+        self.stdout.write(json.dumps(counts))
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from platform_new.response_cache import (
+    IDENTITY,
+    compress,
+    get_cached_variant,
+    negotiate_encoding,
+    store_variant,
+)
+from platform_new.scrapper.logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+
+def get_vary_headers(request: HttpRequest) -> tuple[str, ...]:
+    """
+    Headers a response varies on, the same whether it is served from the cache or rendered.
+    The Accept header is part of the cache key, so the cacheable responses vary on it as well.
+    """
+    if getattr(request, 'compressed_cache', False):
+        return ('Accept', 'Accept-Encoding')
+    return ('Accept-Encoding',)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with Brotli or gzip depending on the Accept-Encoding header of the request.
+    Responses of views marked with the compressed_cache decorator are also cached along with their compressed
+    variants, so a hot response is rendered and compressed once instead of on every request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        response = self.get_response(request)
+        if getattr(response, 'served_from_cache', False) or not self._is_compressible(response):
+            return response
+
+        # Small bodies are not worth compressing but can still be cached
+        if len(response.content) < settings.COMPRESSION_MIN_LENGTH:
+            encoding = IDENTITY
+        else:
+            encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+        patch_vary_headers(response, get_vary_headers(request))
+        content_type = response.get('Content-Type', '')
+        if getattr(request, 'compressed_cache', False) and response.status_code == 200 and not response.cookies:
+            # The Vary header set by the view and the inner middlewares (e.g. Cookie) is replayed on the hits
+            variant = store_variant(request, response.content, content_type, encoding, vary=response.get('Vary', ''))
+            content = variant['content']
+        else:
+            content = compress(response.content, encoding)
+        if encoding != IDENTITY and len(content) < len(response.content):
+            response.content = content
+            response['Content-Encoding'] = encoding
+            response['Content-Length'] = str(len(content))
+        return response
+
+    def process_view(self, request: HttpRequest, view_func, view_args, view_kwargs) -> HttpResponse | None:
+        """Serve cached views from the cache, skipping the view and the compression entirely on a hit."""
+        if request.method != 'GET' or not getattr(view_func, 'compressed_cache', False):
+            return None
+        if any(param in request.GET for param in getattr(view_func, 'compressed_cache_uncached_params', ())):
+            return None
+
+        request.compressed_cache = True
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        variant = get_cached_variant(request, encoding)
+        if variant is None:
+            return None
+
+        response = HttpResponse(variant['content'], content_type=variant['content_type'])
+        response.served_from_cache = True
+        if variant.get('vary'):
+            response['Vary'] = variant['vary']
+        patch_vary_headers(response, get_vary_headers(request))
+        if variant['encoding'] != IDENTITY:
+            response['Content-Encoding'] = variant['encoding']
+        return response
+
+    def _is_compressible(self, response: HttpResponse) -> bool:
+        """Check whether a response can be compressed: buffered and not already encoded."""
+        return not response.streaming and not response.has_header('Content-Encoding')
@@ -1,3 +1,3 @@
-from .models import Path, Training, Step, Content
+from .models import Path, Training, PathTraining, Step, Content, StepCheckpoint, RefreshState, ScrapeJob, ScrapeTask, Tombstone
 
-__all__ = ['Path', 'Training', 'Step', 'Content']
\ No newline at end of file
+__all__ = ['Path', 'Training', 'PathTraining', 'Step', 'Content', 'StepCheckpoint', 'RefreshState', 'ScrapeJob', 'ScrapeTask', 'Tombstone']
\ No newline at end of file
@@ -4,7 +4,7 @@ from django.db import models
 class BaseModel(models.Model):
     id = models.CharField(primary_key=True, max_length=500)
     created_time = models.DateTimeField(auto_now_add=True)
-    updated_time = models.DateTimeField(auto_now=True)
+    updated_time = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         abstract = True
@@ -22,7 +22,7 @@ class Path(BaseModel):
 
 class Training(BaseModel):
     platform_id = models.CharField(max_length=500, null=False, blank=False, unique=True)
-    path = models.ForeignKey(Path, related_name='trainings', on_delete=models.CASCADE, null=False, blank=False)
+    paths = models.ManyToManyField(Path, related_name='trainings', through='PathTraining', blank=True)
     title = models.CharField(max_length=500, null=False, blank=False)
     progression = models.FloatField(null=False)
     score = models.FloatField(null=False)
@@ -32,6 +32,25 @@ class Training(BaseModel):
         return str(self.title)
 
 
+class PathTraining(BaseModel):
+    """
+    Membership of a training in a path, at its position within the path.
+    A training shared by several paths is a single Training row with one PathTraining per path,
+    so that its steps and contents are scraped once.
+    """
+    path = models.ForeignKey(Path, related_name='path_trainings', on_delete=models.CASCADE, null=False, blank=False)
+    training = models.ForeignKey(Training, related_name='path_trainings', on_delete=models.CASCADE, null=False, blank=False)
+    position = models.IntegerField(default=0)  # type: ignore
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['path', 'training'], name='unique_path_training'),
+        ]
+
+    def __str__(self) -> str:
+        return str(self.id)
+
+
 class Step(BaseModel):
     platform_id = models.IntegerField(null=False, blank=False, unique=True)
     training = models.ForeignKey(Training, related_name='steps', on_delete=models.CASCADE, null=False, blank=False)
@@ -51,3 +70,135 @@ class Content(BaseModel):
 
     def __str__(self) -> str:
         return str(self.filename)
+
+
+class StepCheckpoint(BaseModel):
+    """
+    Progress journal of the content scraping: one row per step whose contents have been scraped and saved.
+    A content run resumes from the first step of the training without checkpoint.
+    """
+    step = models.OneToOneField(Step, related_name='checkpoint', on_delete=models.CASCADE, null=False, blank=False)
+    content = models.ForeignKey(Content, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+
+    def __str__(self) -> str:
+        return str(self.id)
+
+
+class RefreshState(BaseModel):
+    """
+    Change history of a training, used to schedule its next refresh.
+    Each time the steps of a training are scraped, their fingerprint is compared to the previous one:
+    a training that keeps not changing is checked less and less often.
+    """
+    training = models.OneToOneField(Training, related_name='refresh_state', on_delete=models.CASCADE, null=False, blank=False)
+    training_fingerprint = models.CharField(max_length=64, default='', blank=True)
+    steps_fingerprint = models.CharField(max_length=64, default='', blank=True)
+    unchanged_count = models.IntegerField(default=0)  # type: ignore
+    last_checked_time = models.DateTimeField(null=True, blank=True)
+    last_changed_time = models.DateTimeField(null=True, blank=True)
+    next_check_time = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self) -> str:
+        return str(self.id)
+
+
+class ScrapeJob(BaseModel):
+    """
+    Scraping stage executed in the background by the job runner.
+    The job reports its progress while running and stops at the next checkpoint once its cancellation is requested.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+    FINISHED_STATUSES = [STATUS_SUCCEEDED, STATUS_FAILED, STATUS_CANCELLED]
+
+    stage = models.CharField(max_length=50, null=False, blank=False)
+    parameters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    processed_count = models.IntegerField(default=0)  # type: ignore
+    total_count = models.IntegerField(default=0)  # type: ignore
+    result = models.JSONField(default=dict, blank=True)
+    message = models.TextField(default='', blank=True)
+    cancel_requested = models.BooleanField(default=False)  # type: ignore
+    started_time = models.DateTimeField(null=True, blank=True)
+    finished_time = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def progress(self) -> float:
+        """Percentage of the work done, 100 once the job succeeded."""
+        if self.status == self.STATUS_SUCCEEDED:
+            return 100.0
+        if not self.total_count:
+            return 0.0
+        return round(100 * min(self.processed_count, self.total_count) / self.total_count, 1)
+
+    def __str__(self) -> str:
+        return f"{self.stage} job {self.id}"
+
+
+class ScrapeTask(BaseModel):
+    """
+    Unit of work of the distributed scraping, claimed by the workers of any host sharing the database.
+    A worker holds a task through a lease which it extends by heartbeats; a task whose lease expired
+    is claimed again by another worker, until it has been attempted max_attempts times.
+    """
+    KIND_TRAINING_STEPS = 'training_steps'
+    KIND_TRAINING_CONTENTS = 'training_contents'
+    KIND_STEP_CONTENT = 'step_content'
+    KIND_CHOICES = [
+        (KIND_TRAINING_STEPS, 'Steps of a training'),
+        (KIND_TRAINING_CONTENTS, 'Contents of a training'),
+        (KIND_STEP_CONTENT, 'Content of a step'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_LEASED = 'leased'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_LEASED, 'Leased'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES, null=False, blank=False)
+    target_id = models.CharField(max_length=500, null=False, blank=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.IntegerField(default=0)  # type: ignore
+    max_attempts = models.IntegerField(default=3)  # type: ignore
+    lease_owner = models.CharField(max_length=200, default='', blank=True)
+    lease_expires_time = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(default='', blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    finished_time = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'lease_expires_time']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} task {self.target_id}"
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted Path, Training, Step or Content row.
+    Tombstones let the changes feed tell polling clients which ids disappeared since their cursor.
+    """
+    model_name = models.CharField(max_length=50, null=False, blank=False)
+    object_id = models.CharField(max_length=500, null=False, blank=False)
+    deleted_time = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.model_name}:{self.object_id}"
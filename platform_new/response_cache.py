@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import brotli
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+
+# Encodings supported by the compression middleware, by order of preference
+SUPPORTED_ENCODINGS = ['br', 'gzip']
+IDENTITY = 'identity'
+
+GENERATION_KEY = 'compressed_response:generation'
+
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """
+    Pick the preferred encoding accepted by the client from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding header, e.g. "gzip, deflate, br;q=0.9"
+
+    Returns:
+        'br', 'gzip' or 'identity' if the client accepts none of the supported encodings
+    """
+    qualities = {}
+    for item in accept_encoding.split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    best_encoding, best_quality = IDENTITY, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
+
+
+def compress(content: bytes, encoding: str, cached: bool = False) -> bytes:
+    """
+    Compress a response body with the given encoding.
+    Cached bodies are compressed once and served many times, so they get the highest compression level.
+
+    Args:
+        content: Body to compress
+        encoding: 'br' or 'gzip'
+        cached: Whether the compressed body will be stored in the cache
+
+    Returns:
+        Compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(content, quality=11 if cached else 4)
+    if encoding == 'gzip':
+        return gzip.compress(content, compresslevel=9 if cached else 6, mtime=0)
+    return content
+
+
+def get_generation() -> int:
+    """Get the current generation of the response cache, bumped each time the scrapped data changes."""
+    return cache.get_or_set(GENERATION_KEY, 0, timeout=None)
+
+
+def invalidate_response_cache() -> None:
+    """
+    Invalidate every cached response and its compressed variants by bumping the cache generation.
+    Old entries are never read again and expire on their own.
+    """
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, timeout=None)
+
+
+def get_cache_key(request: HttpRequest, encoding: str) -> str:
+    """
+    Build the cache key of a response variant.
+    The Accept header is part of the key since the REST framework views render differently depending on it.
+
+    Args:
+        request: The request the response answers
+        encoding: Encoding of the variant
+
+    Returns:
+        Cache key of the variant
+    """
+    request_fingerprint = hashlib.md5(
+        f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}".encode()
+    ).hexdigest()
+    return f"compressed_response:{get_generation()}:{request_fingerprint}:{encoding}"
+
+
+def get_cached_variant(request: HttpRequest, encoding: str) -> dict | None:
+    """
+    Get a cached response variant, compressing and storing it from the identity entry if only that one exists.
+
+    Args:
+        request: The request to answer
+        encoding: Encoding negotiated with the client
+
+    Returns:
+        Dictionary with the content, content type and encoding of the variant, or None on a cache miss
+    """
+    variant = cache.get(get_cache_key(request, encoding))
+    if variant is not None or encoding == IDENTITY:
+        return variant
+
+    identity = cache.get(get_cache_key(request, IDENTITY))
+    if identity is None:
+        return None
+    return store_variant(request, identity['content'], identity['content_type'], encoding, vary=identity.get('vary', ''))
+
+
+def store_variant(request: HttpRequest, content: bytes, content_type: str, encoding: str, vary: str = '') -> dict:
+    """
+    Store the uncompressed body of a response and its variant for the negotiated encoding.
+
+    Args:
+        request: The request the response answers
+        content: Uncompressed body of the response
+        content_type: Content type of the response
+        encoding: Encoding negotiated with the client
+        vary: Vary header of the rendered response, sent again with the cached response
+
+    Returns:
+        The stored variant
+    """
+    timeout = settings.COMPRESSED_RESPONSE_CACHE_TIMEOUT
+    identity = {'content': content, 'content_type': content_type, 'encoding': IDENTITY, 'vary': vary}
+    cache.set(get_cache_key(request, IDENTITY), identity, timeout=timeout)
+    if encoding == IDENTITY:
+        return identity
+
+    variant = {
+        'content': compress(content, encoding, cached=True),
+        'content_type': content_type,
+        'encoding': encoding,
+        'vary': vary,
+    }
+    cache.set(get_cache_key(request, encoding), variant, timeout=timeout)
+    return variant
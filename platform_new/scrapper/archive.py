@@ -0,0 +1,128 @@
+import fcntl
+import gzip
+import json
+import os
+import tempfile
+from django.conf import settings
+from django.utils import timezone
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Kinds of the archived pages: a page of the paths listing, the view of a training, the page of a step
+PAGE_KIND_PATHS = 'paths_page'
+PAGE_KIND_TRAINING = 'training'
+PAGE_KIND_STEP = 'step'
+PAGE_KINDS = (PAGE_KIND_PATHS, PAGE_KIND_TRAINING, PAGE_KIND_STEP)
+
+
+class SnapshotArchive:
+    """
+    Local archive of the HTML of the scraped pages, to extract the data again without the platform.
+    Each page is stored gzipped under <kind>/<key>.html.gz, a new snapshot of the same page replacing the previous one,
+    and index.jsonl gets one line per snapshot with the URL, the capture time and the metadata the extraction needs.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.jsonl')
+        for kind in PAGE_KINDS:
+            os.makedirs(os.path.join(directory, kind), exist_ok=True)
+
+    def add(self, kind: str, key, html: str, url: str = '', metadata: dict | None = None) -> None:
+        """
+        Store the snapshot of a page.
+
+        Args:
+            kind: One of PAGE_KINDS
+            key: Identifier of the page within its kind: page number, training ID or step ID
+            html: HTML of the page
+            url: URL of the page
+            metadata: Values known when the page was scraped, e.g. the training of a step
+        """
+        relative_path = os.path.join(kind, f"{key}.html.gz")
+        file_path = os.path.join(self.directory, relative_path)
+        # Write to a temporary file first, so that a reader never sees a truncated snapshot
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as f:
+            f.write(gzip.compress(html.encode('utf-8')))
+        os.replace(temporary_path, file_path)
+
+        entry = {
+            'kind': kind,
+            'key': str(key),
+            'file': relative_path,
+            'url': url,
+            'captured_time': timezone.now().isoformat(),
+            'metadata': metadata or {},
+        }
+        # Several worker processes append to the index, each line is written under an exclusive lock on the file
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(json.dumps(entry) + '\n')
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def read(self, entry: dict) -> str:
+        """HTML of the snapshot of an index entry."""
+        with gzip.open(os.path.join(self.directory, entry['file']), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def iter_latest_entries(self, kinds: list[str] | None = None):
+        """
+        Walk the index, keeping the latest snapshot of each page.
+
+        Args:
+            kinds: Only these kinds of pages, all of them if None
+
+        Yields:
+            The index entries, in the order their pages were first archived
+        """
+        if not os.path.exists(self.index_path):
+            return
+        latest_entries: dict[tuple[str, str], dict] = {}
+        with open(self.index_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut by a crash of the scraper while appending it
+                    logger.warning(f"Skipping an unreadable line of {self.index_path}")
+                    continue
+                if kinds is None or entry['kind'] in kinds:
+                    latest_entries[(entry['kind'], entry['key'])] = entry
+        yield from latest_entries.values()
+
+
+_snapshot_archive = None
+
+
+def get_snapshot_archive() -> SnapshotArchive | None:
+    """Get the archive shared by the scrapers of this process, None if SNAPSHOT_ARCHIVE_DIRECTORY is not set."""
+    global _snapshot_archive
+    if _snapshot_archive is None and settings.SNAPSHOT_ARCHIVE_DIRECTORY:
+        _snapshot_archive = SnapshotArchive(settings.SNAPSHOT_ARCHIVE_DIRECTORY)
+    return _snapshot_archive
+
+
+def archive_page(driver, kind: str, key, metadata: dict | None = None) -> None:
+    """
+    Store the page displayed by a browser in the archive, if the archive is enabled.
+    A failure is only logged, archiving must never stop the scraping.
+
+    Args:
+        driver: WebDriver displaying the page
+        kind: One of PAGE_KINDS
+        key: Identifier of the page within its kind
+        metadata: Values known when the page was scraped
+    """
+    archive = get_snapshot_archive()
+    if archive is None:
+        return
+    try:
+        archive.add(kind=kind, key=key, html=driver.page_source, url=driver.current_url, metadata=metadata)
+    except Exception as e:
+        logger.error(f"Failed to archive the {kind} page {key}: {str(e)}")
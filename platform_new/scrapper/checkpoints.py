@@ -0,0 +1,82 @@
+from platform_new.models.models import Content, Step, StepCheckpoint
+from platform_new.models.step_type import StepType
+from .records import ContentRecord, StepRecord
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Types of the steps holding a content
+CONTENT_STEP_TYPES = (StepType.TEXT.value, StepType.DOCUMENT.value, StepType.VIDEO.value)
+
+
+def get_completed_step_ids(training_id) -> set[str]:
+    """
+    Get the ids of the steps of a training whose contents have already been scraped.
+
+    Args:
+        training_id: ID of the training
+
+    Returns:
+        Set of step ids with a checkpoint
+    """
+    return {
+        str(step_id)
+        for step_id in StepCheckpoint.objects.filter(step__training_id=training_id).values_list('step_id', flat=True)  # type: ignore
+    }
+
+
+def record_step_completed(step: StepRecord | Step, content: ContentRecord | Content | None) -> None:
+    """
+    Record in the journal that the contents of a step have been scraped and saved.
+    A step holding a content is only complete once its content is saved, a failed one is not recorded.
+
+    Args:
+        step: The completed step
+        content: The content saved for the step, None for steps without content (e.g. quizzes)
+
+    Raises:
+        ValueError: If the step holds a content and no content is given
+    """
+    if content is None and step.type in CONTENT_STEP_TYPES:
+        raise ValueError(f"Step {step.id} of type {step.type} cannot be completed without its content")
+    # A single upsert, instead of the SELECT and the INSERT or UPDATE of update_or_create
+    StepCheckpoint.objects.bulk_create(  # type: ignore
+        [StepCheckpoint(id=str(step.id), step_id=step.id, content_id=content.id if content is not None else None)],
+        update_conflicts=True,
+        update_fields=['step', 'content', 'updated_time'],
+        unique_fields=['id'],
+    )
+
+
+def reset_checkpoints(training_id) -> None:
+    """
+    Clear the journal of a training, so that its next content run starts over from the first step.
+
+    Args:
+        training_id: ID of the training
+    """
+    deleted, _ = StepCheckpoint.objects.filter(step__training_id=training_id).delete()  # type: ignore
+    logger.info(f"Cleared {deleted} checkpoints of training {training_id}")
+
+
+def clear_checkpoints_if_complete(training_id) -> bool:
+    """
+    End the content run of a training once every step holding a content is recorded in the journal:
+    the journal is cleared, so that the next run scrapes the contents again instead of skipping every step.
+
+    Args:
+        training_id: ID of the training
+
+    Returns:
+        True if the run was complete and its journal cleared
+    """
+    remaining_steps = Step.objects.filter(  # type: ignore
+        training_id=training_id,
+        type__in=CONTENT_STEP_TYPES,
+        checkpoint__isnull=True,
+    )
+    if remaining_steps.exists():
+        return False
+    reset_checkpoints(training_id)
+    return True
@@ -4,17 +4,28 @@ import requests
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import WebDriverException
 import yt_dlp
 from platform_new.models.step_type import StepType
+from platform_new.scrapper.content_store import get_content_store
 from platform_new.scrapper.scrapper import SeleniumScrapper
-from platform_new.models.models import Content, Step, Training
-from platform_new.scrapper.step_scrapping import get_scrapped_step_objects_for_training_module
+from platform_new.models.models import Content, Step
+from platform_new.scrapper.records import ContentRecord, StepRecord
+from platform_new.scrapper.step_scrapping import get_scrapped_step_objects_for_training_module, get_step_url
+from platform_new.scrapper.checkpoints import (
+    CONTENT_STEP_TYPES,
+    clear_checkpoints_if_complete,
+    get_completed_step_ids,
+    record_step_completed,
+    reset_checkpoints,
+)
+from scrappingchef.utils import bulk_create_or_update
 from urllib.parse import unquote, urlparse, parse_qs
+from .archive import PAGE_KIND_STEP, archive_page
+from .events import event_bus, publish
+from .frontier import PRIORITY_STEP, load_url
 from .logger import get_logger
 
-# TODO: Remove hardcoded urls
-
 # CSS selectors used for step scraping
 SELECTORS = {
     'module_item': '.training-view-module-item',
@@ -25,53 +36,253 @@ SELECTORS = {
 
 logger = get_logger(__name__)
 
+# Minimum number of seconds between two download progress events of a video
+DOWNLOAD_EVENT_INTERVAL = 1.0
+
+# Script polling the step page for its content, the last argument being the callback of execute_async_script
+STEP_PROBE_SCRIPT = """
+const [expectedType, timeout] = arguments;
+const done = arguments[arguments.length - 1];
+const findContents = () => {
+    const contents = {};
+    const text = document.querySelector('#textRender');
+    if (text) contents.text = text.innerHTML;
+    const pdfViewer = document.querySelector('iframe.pdfrenderer');
+    if (pdfViewer && pdfViewer.src) contents.document = pdfViewer.src;
+    const video = Array.from(document.querySelectorAll('iframe')).find(frame => frame.src && frame.src.includes('iframe.ly'));
+    if (video) contents.video = video.src;
+    return contents;
+};
+const start = Date.now();
+const poll = () => {
+    const contents = findContents();
+    if (expectedType in contents) return done({type: expectedType, payload: contents[expectedType]});
+    if (Date.now() - start >= timeout) {
+        const types = Object.keys(contents);
+        return done(types.length ? {type: types[0], payload: contents[types[0]]} : null);
+    }
+    setTimeout(poll, 100);
+};
+poll();
+"""
+
+
+def get_scrapped_content_objects_for_training_module(
+    scrapper: SeleniumScrapper,
+    training_id: int,
+    resume: bool = True,
+    overlap_unblocking: bool = False,
+    steps: list[StepRecord] | None = None,
+) -> list[ContentRecord]:
+    """
+    Scrapes the contents of every step of a training.
+    Each content is saved as soon as it is scraped and the step is recorded in the progress journal,
+    so a run interrupted by a failure resumes from the first incomplete step instead of starting over.
+    A step holding a content is only recorded once its content is saved, a failed step is tried again by the next run,
+    and the journal is cleared once every step holding a content is recorded, so that the next run starts over.
+    Each step page is opened directly by its URL, and only the steps with a content are opened once unblocked.
+
+    Args:
+        scrapper (SeleniumScrapper): Instance of SeleniumScrapper to interact with the webpage
+        training_id (int): ID of the training to scrape contents from
+        resume (bool): Skip the steps completed by a previous run, otherwise start over from the first step
+        overlap_unblocking (bool): Unblock the steps while scraping them, a visit to a step page both reading its content
+            and unblocking the next step, instead of unblocking all the steps before scraping their contents
+        steps (list[StepRecord] | None): Steps of the training scraped and saved earlier in the run,
+            so that the view of the training is not loaded again, scraped from the view if None
 
-def get_scrapped_content_objects_for_training_module(scrapper: SeleniumScrapper, training_id: int) -> list[Content]:
+    Returns:
+        list[ContentRecord]: Contents scraped during this run
+    """
+    contents = []
+    i = None
     try:
-        steps = get_scrapped_step_objects_for_training_module(scrapper=scrapper, training_id=training_id)
+        if steps is None:
+            steps = get_scrapped_step_objects_for_training_module(scrapper=scrapper, training_id=training_id)
+            # The steps must exist in the database for their contents and checkpoints to be saved right away
+            if steps:
+                bulk_create_or_update(model_class=Step, objects=steps)
+        if not steps:
+            return []
+
+        if not resume:
+            reset_checkpoints(training_id)
+        completed_step_ids = get_completed_step_ids(training_id)
+        first_incomplete_index = next(
+            (index for index, step in enumerate(steps) if str(step.id) not in completed_step_ids),
+            None
+        )
+        if first_incomplete_index is None:
+            logger.info(f"All the steps of training {training_id} have already been scraped")
+            clear_checkpoints_if_complete(training_id)
+            return []
+        if first_incomplete_index > 0:
+            logger.info(f"Resuming training {training_id} at step index {first_incomplete_index}")
+        publish(
+            'training_started',
+            stage='contents',
+            training_id=training_id,
+            steps=len(steps),
+            resumed_at=first_incomplete_index,
+        )
 
-        unblock_all_steps(scrapper=scrapper, steps=steps)
+        # Only the remaining steps need to be unblocked, starting from the step preceding them
+        blocked_step_ids = {str(step.id) for step in steps[first_incomplete_index:] if step.is_blocked}
+        if blocked_step_ids:
+            if overlap_unblocking:
+                if steps[first_incomplete_index].is_blocked and first_incomplete_index > 0:
+                    visited_blocked_step_ids = visit_step_page(scrapper=scrapper, step=steps[first_incomplete_index - 1])
+                    if visited_blocked_step_ids is not None:
+                        blocked_step_ids = visited_blocked_step_ids
+            else:
+                blocked_step_ids = unblock_all_steps(scrapper=scrapper, steps=steps[max(0, first_incomplete_index - 1):])
 
-        contents = []
         for i, step in enumerate(steps):
-            # We have to navigate to each step to get the content
-            navigate_to_step_module(scrapper, i)
+            if i < first_incomplete_index or str(step.id) in completed_step_ids:
+                continue
+            if str(step.id) in blocked_step_ids:
+                # Without checkpoint, the next run tries the step again
+                logger.warning(f"Step {step.id} is still blocked, skipping it")
+                continue
+
+            publish('step_started', training_id=training_id, step_id=step.id, step_type=step.type, index=i, steps=len(steps))
+            content = None
+            # A step without content is only opened when the visit is needed to unblock the next steps
+            if step.type in CONTENT_STEP_TYPES or (overlap_unblocking and blocked_step_ids):
+                if overlap_unblocking:
+                    visited_blocked_step_ids = visit_step_page(scrapper=scrapper, step=step)
+                    is_loaded = visited_blocked_step_ids is not None
+                    if is_loaded:
+                        blocked_step_ids = visited_blocked_step_ids
+                else:
+                    # The unblocking visits only read the lock states, so the page is loaded again to read its content
+                    is_loaded = navigate_to_step_page(scrapper=scrapper, step=step, requeue=True)
+                if not is_loaded:
+                    # The browser still displays the previous page, without checkpoint the next run tries the step again
+                    logger.warning(f"Step {step.id} page was not loaded, skipping it")
+                    continue
+                content = process_step_content(scrapper, step)
+
+            # Persist the content and the progress right away, so that a later failure doesn't lose them
+            if content is not None:
+                if bulk_create_or_update(model_class=Content, objects=[content]) is None:
+                    content = None
+                else:
+                    contents.append(content)
+            if content is None and step.type in CONTENT_STEP_TYPES:
+                # Without checkpoint, the next run tries the step again
+                logger.warning(f"No content saved for step {step.id}, it is tried again by the next run")
+            else:
+                record_step_completed(step=step, content=content)
+            publish('step_finished', training_id=training_id, step_id=step.id, has_content=content is not None)
+
+        clear_checkpoints_if_complete(training_id)
+        publish('training_finished', stage='contents', training_id=training_id, contents=len(contents))
+        return contents
+
+    except Exception as e:
+        logger.error(f"Error scraping steps: {str(e)}")
+        if i is not None:
+            logger.error(f"Stopped at step index {i} (step_id: {steps[i].id}), the next run resumes from there")
+        publish(
+            'error',
+            stage='contents',
+            training_id=training_id,
+            step_id=steps[i].id if i is not None else None,
+            message=f"Error scraping steps: {str(e)}",
+        )
+        return contents
 
-            if step.type == StepType.TEXT.value:
-                content = process_step_text_content(scrapper, step)
-                contents.append(content)
 
-            elif step.type == StepType.DOCUMENT.value:
-                content = process_step_document_content(scrapper, step)
-                contents.append(content)
+def process_step_content(scrapper: SeleniumScrapper, step: StepRecord | Step) -> ContentRecord | None:
+    """
+    Scrap the content of the step displayed by the browser, according to what the page holds.
+    A single probe waits for the content of the page and returns it, instead of one wait per content type.
 
-            elif step.type == StepType.VIDEO.value:
-                content = process_step_video_content(scrapper, step)
-                contents.append(content)
+    Args:
+        scrapper (SeleniumScrapper): Instance of SeleniumScrapper displaying the step
+        step (Step): The step
 
-        return contents
+    Returns:
+        ContentRecord | None: The content of the step, None for the types without content (e.g. quizzes) or on failure
+    """
+    content = None
+    if step.type in CONTENT_STEP_TYPES:
+        probe_result = probe_step_page(scrapper.driver, expected_type=step.type)
+        if probe_result is None:
+            logger.error(f"No content found on the page of step {step.id}")
+            publish('error', stage='contents', step_id=step.id, message="No content found on the step page")
+        else:
+            content_type, payload = probe_result
+            if content_type != step.type:
+                logger.warning(f"Step {step.id} of type {step.type} holds a {content_type} content")
+
+            if content_type == StepType.TEXT.value:
+                content = process_step_text_content(step, payload)
+
+            elif content_type == StepType.DOCUMENT.value:
+                content = process_step_document_content(step, payload)
+
+            elif content_type == StepType.VIDEO.value:
+                content = process_step_video_content(step, payload)
+
+    # The page is archived once its content has loaded, for the offline re-extraction
+    archive_page(
+        scrapper.driver,
+        kind=PAGE_KIND_STEP,
+        key=step.id,
+        metadata={'step_id': step.id, 'training_id': step.training_id, 'type': step.type},
+    )
+    return content
 
-    except Exception as e:
-        logger.error(f"Error scraping steps: {str(e)}")
-        logger.error(f"Stopped at step index {i} (step_id: {steps[i].id})")
-        return []
 
+def probe_step_page(driver, expected_type: str, timeout: float = 10) -> tuple[str, str] | None:
+    """
+    Wait for the content of a step page and read it, in a single round trip to the browser.
+    The probe returns the content of the expected type as soon as it appears, waiting for it up to the timeout
+    like a wait for its element would; a content of another type is only returned once the timeout is reached,
+    e.g. a text step whose page displays a video.
+
+    Args:
+        driver: Selenium WebDriver instance displaying the step page
+        expected_type (str): Type of the step
+        timeout (float): Maximum number of seconds to wait for a content
 
-def process_step_video_content(scrapper: SeleniumScrapper, step: Step) -> Content:
+    Returns:
+        tuple[str, str] | None: The type of the content and its payload: the innerHTML of a text,
+        the src of the PDF viewer of a document or the src of the iframe.ly embed of a video; None if no content appeared
+    """
+    # The script timeout bounds the probe, in case the page is left while it runs
+    try:
+        driver.set_script_timeout(timeout + 5)
+        result = driver.execute_async_script(STEP_PROBE_SCRIPT, expected_type, timeout * 1000)
+    except WebDriverException as e:
+        logger.error(f"Step page probe failed: {str(e)}")
+        return None
+    if not result:
+        return None
+    return result['type'], result['payload']
+
+
+def process_step_video_content(step: StepRecord | Step, iframe_src: str) -> ContentRecord | None:
+    file_name = f"content_{step.id}.mp4"
     try:
-        iframe_src = get_iframely_src(scrapper.driver)
         video_download_url = get_video_download_url(iframe_src)
-        file_name=f"content_{step.id}.mp4"
-        file_path = prepare_file_path(file_name=file_name)
-        download_video_with_ytdlp(video_download_url, file_path)
+        content_store = get_content_store()
+        # The same video embedded in several steps is only downloaded once
+        if not content_store.link_source(file_name, video_download_url):
+            with content_store.download_path(suffix='.mp4') as file_path:
+                download_video_with_ytdlp(video_download_url, file_path)
+                content_store.ingest_file(file_name, file_path, source_url=video_download_url)
     except Exception as e:
         logger.error(f"Error processing video content: {str(e)}")
-        download_url = None
+        publish('error', stage='contents', step_id=step.id, message=f"Error processing video content: {str(e)}")
+        return None
 
     # Create a new Content object for the video
-    content = Content(
+    content = ContentRecord(
         id=step.id,
-        step=step,
+        step_id=step.id,
         filename=file_name,
         type="video"
     )
@@ -93,6 +304,25 @@ def download_video_with_ytdlp(video_url: str, output_path: str) -> None:
     ydl_opts = {
         'outtmpl': output_path
     }
+    # Report the download progress only when someone follows the events, at most every DOWNLOAD_EVENT_INTERVAL seconds
+    if event_bus.has_subscribers:
+        last_publish_time = 0.0
+
+        def publish_download_progress(status: dict) -> None:
+            nonlocal last_publish_time
+            now = time.monotonic()
+            if status['status'] == 'downloading' and now - last_publish_time < DOWNLOAD_EVENT_INTERVAL:
+                return
+            last_publish_time = now
+            publish(
+                'download_progress',
+                url=video_url,
+                downloaded_bytes=status.get('downloaded_bytes'),
+                total_bytes=status.get('total_bytes') or status.get('total_bytes_estimate'),
+                finished=status['status'] == 'finished',
+            )
+
+        ydl_opts['progress_hooks'] = [publish_download_progress]
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         try:
             # First get available formats
@@ -130,57 +360,26 @@ def get_video_download_url(iframe_src: str) -> str:
         raise
 
 
-def get_iframely_src(driver) -> str:
-    """
-    Gets the src attribute of the iframely iframe from the page.
-
-    Args:
-        driver: Selenium WebDriver instance
-
-    Returns:
-        str: The src URL of the iframely iframe
-
-    Raises:
-        TimeoutException: If no iframely iframe is found within timeout
-    """
-    iframe = WebDriverWait(driver, 10).until(
-        lambda driver: next(
-            (frame for frame in driver.find_elements(By.TAG_NAME, "iframe") 
-            if frame.get_attribute('src') and 'iframe.ly' in frame.get_attribute('src')),
-            None
-        )
-    )
-    if not iframe:
-        raise TimeoutException("No iframe with iframe.ly source found")
-
-    return iframe.get_attribute('src')
-
-
-def process_step_document_content(scrapper: SeleniumScrapper, step: Step) -> Content | None:
-    content, pdf_url = get_content_and_pdf_url_for_step(scrapper, step)
-
-    if not content or not pdf_url:
-        logger.error(f"Failed to get content for step {step.id}: Empty content or HTML")
+def process_step_document_content(step: StepRecord | Step, pdf_viewer_src: str) -> ContentRecord | None:
+    if 'file=' not in pdf_viewer_src:
+        logger.error(f"Failed to get content for step {step.id}: No PDF in the viewer URL {pdf_viewer_src}")
         return None
+    # The viewer URL holds the actual PDF URL in its file parameter
+    pdf_url = pdf_viewer_src.split('file=')[1]
 
-    download_pdf(pdf_url, step.platform_id)
-
-    return content
-
+    if not download_pdf(pdf_url, step.platform_id):
+        return None
 
-def get_content_and_pdf_url_for_step(scrapper: SeleniumScrapper, step: Step) -> tuple[Content, str]:
-    content = Content(
+    content = ContentRecord(
         id=step.id,
-        step=step,
+        step_id=step.id,
         filename=f"content_{step.id}.pdf",
         type="document",
     )
-    pdf_url = get_pdf_url(scrapper)
-
-    return content, pdf_url
+    return content
 
 
-def download_pdf(pdf_url: str, step_id: int) -> None:
+def download_pdf(pdf_url: str, step_id: int) -> bool:
     """
     Downloads the PDF from the given URL and saves it to the contents directory.
     Skips download if file already exists.
@@ -188,18 +387,40 @@ def download_pdf(pdf_url: str, step_id: int) -> None:
     Args:
         pdf_url (str): The URL of the PDF to download
         step_id (int): The ID of the step for naming the file
+
+    Returns:
+        bool: True if the PDF is in the content store, False if the download failed
     """
-    file_path = prepare_file_path(file_name=f"content_{step_id}.pdf")
+    file_name = f"content_{step_id}.pdf"
+    content_store = get_content_store()
 
     # Decode the URL
     decoded_url = unquote(pdf_url)
 
-    response = requests.get(decoded_url)
-    if response.status_code == 200:
-        with open(file_path, 'wb') as f:
-            f.write(response.content)
-    else:
+    # The same PDF embedded in several steps is only downloaded once
+    if content_store.link_source(file_name, decoded_url):
+        return True
+
+    # Stream the PDF into the content store, which skips the write if the file is unchanged
+    with requests.get(decoded_url, stream=True) as response:
+        if response.status_code == 200:
+            total_bytes = int(response.headers.get('Content-Length') or 0) or None
+            chunks = _publish_download_progress(response.iter_content(chunk_size=1024 * 1024), decoded_url, total_bytes)
+            content_store.write_stream(file_name, chunks, source_url=decoded_url)
+            return True
         logger.error(f"Failed to download PDF for step {step_id}: Status code {response.status_code}")
+        publish('error', stage='contents', step_id=step_id, message=f"Failed to download PDF: Status code {response.status_code}")
+        return False
+
+
+def _publish_download_progress(chunks, url: str, total_bytes: int | None):
+    """Pass the chunks of a download through, publishing the number of bytes received after each one."""
+    downloaded_bytes = 0
+    for chunk in chunks:
+        downloaded_bytes += len(chunk)
+        publish('download_progress', url=url, downloaded_bytes=downloaded_bytes, total_bytes=total_bytes, finished=False)
+        yield chunk
+    publish('download_progress', url=url, downloaded_bytes=downloaded_bytes, total_bytes=total_bytes, finished=True)
 
 
 
@@ -210,182 +431,148 @@ def should_skip_if_exists(file_path: str) -> None:
     pass
 
 
-def get_pdf_url(scrapper: SeleniumScrapper) -> str | None:
-    """
-    Extracts the PDF URL from the iframe on the page.
-
-    Args:
-        scrapper (SeleniumScrapper): Instance of SeleniumScrapper to interact with the webpage
-
-    Returns:
-        str: The URL of the PDF if found, otherwise None
-    """
-    try:
-        iframe = WebDriverWait(scrapper.driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, 'iframe.pdfrenderer'))
-        )
-        pdf_url = iframe.get_attribute('src')  # Get the src attribute which contains the PDF URL
-        if 'file=' in pdf_url:
-            return pdf_url.split('file=')[1]  # Extract the actual PDF URL
-        return None
-    except TimeoutException:
-        logger.error("PDF iframe not found on page")
-        return None
-
-
-def process_step_text_content(scrapper: SeleniumScrapper, step: Step) -> Content | None:
+def process_step_text_content(step: StepRecord | Step, html: str) -> ContentRecord | None:
     """
     Process and save the text content for a given step.
 
     Args:
-        scrapper (SeleniumScrapper): Instance of SeleniumScrapper to interact with the webpage
         step (Step): Step object containing step metadata
-        contents (list[Content]): List of existing content objects
+        html (str): innerHTML of the #textRender element of the step page
 
     Returns:
-        Content: The created content object
-
-    Raises:
-        Exception: If there are issues getting or saving the content
+        Content: The created content object, None if the text is empty
     """
-    content, html = get_content_and_html_for_step(scrapper, step)
-    if not content or not html:
+    if not html:
         logger.error(f"Failed to get content for step {step.id}: Empty content or HTML")
         return None
 
+    content = ContentRecord(
+        id=step.id,
+        step_id=step.id,
+        filename=f"content_{step.id}.html",
+        type="text",
+    )
     save_content_to_file(content, html)
     return content
 
 
-def save_content_to_file(content: Content, html: str) -> None:
+def save_content_to_file(content: ContentRecord, html: str) -> None:
     """
-    Saves HTML content to a file and appends the content object to the contents list.
+    Saves HTML content to a file through the content store, which skips the write if the file is unchanged.
 
     Args:
-        content (Content): Content object containing metadata
+        content (ContentRecord): Content record containing metadata
         html (str): HTML content to save
     """
-    file_path = prepare_file_path(file_name=content.filename)
-
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(html)
+        get_content_store().write_bytes(content.filename, html.encode('utf-8'))
     except Exception as e:
-        logger.error(f"Failed to save content file for step {content.step.id}: {str(e)}")
+        logger.error(f"Failed to save content file for step {content.step_id}: {str(e)}")
 
 
-def navigate_to_step_module(scrapper: SeleniumScrapper, index: int) -> None:
+def unblock_all_steps(scrapper: SeleniumScrapper, steps: list[StepRecord]) -> set[str]:
     """
-    Navigates to a specific step module by clicking on it.
-    The step module have to be found again each time or they become stale.
+    Unblocks the steps of a training module by visiting them in order, a visit unblocking the next step.
+    The lock states are read again after each visit: the visits jump to the step preceding the first step
+    still blocked, and stop as soon as no step is blocked anymore.
 
     Args:
-        scrapper (SeleniumScrapper): Instance of SeleniumScrapper
-        index (int): Index of the step module to navigate to
+        scrapper (SeleniumScrapper): Instance of SeleniumScrapper to interact with the webpage
+        steps (list[StepRecord]): Steps to unblock, in the order of the training, starting from the step preceding the first blocked one
 
     Returns:
-        None
-    """
-    # Find and click the step module at the given index
-    if scrapper.driver is None:
-        raise RuntimeError("Driver is not initialized")
-    step_modules = scrapper.driver.find_elements(By.CSS_SELECTOR, SELECTORS['module_item'])
-    step_modules[index].click()
-
+        set[str]: IDs of the steps still blocked after the visits
 
-def get_content_and_html_for_step(scrapper: SeleniumScrapper, step: Step) -> tuple[Content, str] | tuple[None, None]:
-    # Find the text content element
+    Raises:
+        Exception: If step navigation fails
+    """
     try:
-        # Wait up to 10 seconds for the text content element to be present on the page
-        # The #textRender element contains the main content of each step
-        text_content = WebDriverWait(scrapper.driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '#textRender'))
-        )
+        blocked_step_ids = {str(step.id) for step in steps if step.is_blocked}
+        index = max(0, _get_first_blocked_index(steps, blocked_step_ids) - 1)
+        while blocked_step_ids and index < len(steps):
+            visited_blocked_step_ids = visit_step_page(scrapper=scrapper, step=steps[index])
+            # A page not loaded leaves the lock states unknown, the visits go on with the next step
+            if visited_blocked_step_ids is not None:
+                blocked_step_ids = visited_blocked_step_ids
+            index = max(index + 1, _get_first_blocked_index(steps, blocked_step_ids) - 1)
+        return {str(step.id) for step in steps} & blocked_step_ids
     except Exception as e:
-        logger.error(f"Failed to find text content element: {str(e)}")
-        text_content = None
+        logger.error(f"Failed to unblock steps: {str(e)}")
+        raise
 
-    content = Content(
-        id=step.id,
-        step=step,
-        filename=f"content_{step.id}.html",
-        type="text",
-    )
 
-    # Save HTML content to file
-    try:
-        html_content = text_content.get_attribute('innerHTML')
-        return content, html_content
-    except Exception as e:
-        logger.error(f"Failed to save content for step {step.id}: {str(e)}")
-        return None, None
+def _get_first_blocked_index(steps: list[StepRecord], blocked_step_ids: set[str]) -> int:
+    return next((index for index, step in enumerate(steps) if str(step.id) in blocked_step_ids), len(steps))
 
 
-def unblock_all_steps(scrapper: SeleniumScrapper, steps: list[Step]) -> None:
+def visit_step_page(scrapper: SeleniumScrapper, step: StepRecord | Step) -> set[str] | None:
     """
-    Unblocks all steps in a training module by navigating through them sequentially.
+    Navigates to a step's page, then reads the lock state of the steps listed by the page.
 
     Args:
         scrapper (SeleniumScrapper): Instance of SeleniumScrapper to interact with the webpage
-        steps (list[Step]): List of Step objects to process
+        step (Step): Step object containing the step information
 
     Returns:
-        None
+        set[str] | None: IDs of the steps of the training which are blocked after the visit,
+        None if the page was not loaded, the browser then still displaying the previous page
+    """
+    if not navigate_to_step_page(scrapper=scrapper, step=step):
+        return None
+    blocked_step_ids = get_blocked_step_ids(scrapper)
+    step.is_blocked = str(step.id) in blocked_step_ids
+    return blocked_step_ids
 
-    Raises:
-        Exception: If step navigation fails
+
+def get_blocked_step_ids(scrapper: SeleniumScrapper) -> set[str]:
     """
-    try:
-        steps_to_unblock = get_steps_to_unblock(steps=steps)
-        for step in steps_to_unblock:
-            navigate_to_step_page(scrapper=scrapper, step=step)
-    except Exception as e:
-        logger.error(f"Failed to unblock steps: {str(e)}")
-        raise
+    Reads the lock state of the steps listed by the current training or step page, in a single round trip.
 
+    Args:
+        scrapper (SeleniumScrapper): Instance of SeleniumScrapper displaying the page
 
-def navigate_to_step_page(scrapper: SeleniumScrapper, step: Step) -> None:
+    Returns:
+        set[str]: IDs of the blocked steps
     """
-    Navigates to a step's page.
+    step_hrefs = scrapper.driver.execute_script(
+        "return Array.from(document.querySelectorAll(arguments[0]))"
+        ".filter(item => item.querySelector(arguments[1] + '.state-locked'))"
+        ".map(item => item.getAttribute('href') || '');",
+        SELECTORS['module_item'],
+        SELECTORS['state'],
+    )
+    return {href.split('/step/')[-1].split('?')[0] for href in step_hrefs or [] if '/step/' in href}
+
+
+def navigate_to_step_page(scrapper: SeleniumScrapper, step: StepRecord | Step, requeue: bool = False) -> bool:
+    """
+    Navigates to a step's page, directly by its URL.
+    The page is not loaded again if the run already loaded it and the browser displays it, unless it is re-queued.
 
     Args:
         scrapper (SeleniumScrapper): Instance of SeleniumScrapper to interact with the webpage
         step (Step): Step object containing the step information
+        requeue (bool): Load the page even if the run already loaded it
 
-    Raises:
-        Exception: If navigation or page load fails
+    Returns:
+        bool: True if the page is displayed, False if it failed to load
     """
     # Navigate to step page
     try:
-        step_url = f"https://atelier-des-chefs.riseup.fr/Training/view/{step.training.id}/step/{step.platform_id}"
+        step_url = get_step_url(step.training_id, step.platform_id)
         logger.info(f"Navigating to step {step.platform_id} at {step_url}")
-        scrapper.driver.get(step_url)
+        load_url(scrapper, step_url, priority=PRIORITY_STEP, requeue=requeue)
 
         # Wait for page load
         if scrapper.driver is None:
             raise RuntimeError("Driver is not initialized")
         WebDriverWait(scrapper.driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, '.training-view-module-item'))
+            EC.presence_of_element_located((By.CSS_SELECTOR, SELECTORS['module_item']))
         )
+        return True
     except Exception as e:
         logger.error(f"Failed to navigate to step {step.platform_id}: {str(e)}")
-
-
-def get_steps_to_unblock(steps: list[Step]) -> list[Step]:
-    """
-    Gets list of steps that we need to reach to unblock the next step. Starting from one before first blocked step.
-
-    Args:
-        steps (list[Step]): List of Step objects to process
-
-    Returns:
-        list[Step]: Filtered list of steps to process
-    """
-    # Find index of first blocked step
-    first_blocked_idx = next((i for i, step in enumerate(steps) if step.is_blocked), len(steps))
-
-    # Get steps from previous index to end
-    return steps[max(0, first_blocked_idx-1):]
+        return False
 
 
 def prepare_file_path(base_dir: str = 'platform_new/contents', file_name: str = None) -> str:
@@ -0,0 +1,241 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Iterable
+from platform_new.content_files import CONTENT_DIRECTORY, content_file_index
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+
+class ContentStore:
+    """
+    Content-addressable store of the scrapped content files.
+    Each payload is stored once under its SHA-256 digest in a hidden blob directory, and the step files
+    (content_<step.id>.<ext>) are hard links to those blobs, so identical PDFs and videos embedded in several steps
+    take the space of one file. A manifest maps the step files and the source URLs to their digest, which lets
+    a re-scrape skip unchanged writes and already downloaded sources.
+    Several processes can share the store: the manifest is updated under a file lock, merged with the entries
+    written by the other processes.
+    """
+
+    def __init__(self, directory: str = CONTENT_DIRECTORY):
+        self.directory = directory
+        self.store_directory = os.path.join(directory, '.store')
+        self.blob_directory = os.path.join(self.store_directory, 'blobs')
+        self.manifest_path = os.path.join(self.store_directory, 'manifest.json')
+        self.manifest_lock_path = os.path.join(self.store_directory, 'manifest.lock')
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_directory, exist_ok=True)
+        self.manifest = self._read_manifest()
+
+    def write_bytes(self, filename: str, data: bytes, source_url: str | None = None) -> bool:
+        """
+        Store an in-memory payload under a step filename.
+
+        Args:
+            filename: Name of the step file, e.g. content_123.html
+            data: Payload to store
+            source_url: URL the payload was downloaded from, if any
+
+        Returns:
+            True if the step file was written, False if it already had this content
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        if not self._has_blob(digest):
+            temporary_path = self._create_temporary_file()
+            with open(temporary_path, 'wb') as f:
+                f.write(data)
+            self._commit_blob(temporary_path, digest)
+        return self._link(filename, digest, source_url)
+
+    def write_stream(self, filename: str, chunks: Iterable[bytes], source_url: str | None = None) -> bool:
+        """
+        Store a streamed payload under a step filename, hashing it while it is written.
+
+        Args:
+            filename: Name of the step file, e.g. content_123.pdf
+            chunks: Chunks of the payload, e.g. response.iter_content()
+            source_url: URL the payload was downloaded from, if any
+
+        Returns:
+            True if the step file was written, False if it already had this content
+        """
+        temporary_path = self._create_temporary_file()
+        digest = hashlib.sha256()
+        try:
+            with open(temporary_path, 'wb') as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+        except Exception:
+            os.remove(temporary_path)
+            raise
+        self._commit_blob(temporary_path, digest.hexdigest())
+        return self._link(filename, digest.hexdigest(), source_url)
+
+    def ingest_file(self, filename: str, file_path: str, source_url: str | None = None) -> bool:
+        """
+        Move a file downloaded by an external tool (e.g. yt-dlp) into the store.
+
+        Args:
+            filename: Name of the step file, e.g. content_123.mp4
+            file_path: Path of the downloaded file, which is consumed
+            source_url: URL the file was downloaded from, if any
+
+        Returns:
+            True if the step file was written, False if it already had this content
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        self._commit_blob(file_path, digest.hexdigest())
+        return self._link(filename, digest.hexdigest(), source_url)
+
+    def link_source(self, filename: str, source_url: str) -> bool:
+        """
+        Link a step file to the payload already downloaded from the same URL, to skip downloading it again.
+
+        Args:
+            filename: Name of the step file
+            source_url: URL the payload would be downloaded from
+
+        Returns:
+            True if the payload is already in the store and the step file points to it
+        """
+        digest = self.manifest['sources'].get(source_url)
+        if digest is None or not self._has_blob(digest):
+            return False
+        self._link(filename, digest, source_url)
+        return True
+
+    @contextmanager
+    def download_path(self, suffix: str = ''):
+        """
+        Get a new path in the store directory where an external tool can download a file before ingest_file.
+        The path is in a directory of its own, removed on exit with whatever the tool left there (e.g. a .part file
+        of an interrupted download), so that a download never resumes nor skips because of a previous one.
+
+        Args:
+            suffix: Extension of the file, e.g. .mp4
+
+        Yields:
+            Path of a file which does not exist yet
+        """
+        download_directory = tempfile.mkdtemp(dir=self.store_directory, prefix='.download_')
+        try:
+            yield os.path.join(download_directory, f"download{suffix}")
+        finally:
+            shutil.rmtree(download_directory, ignore_errors=True)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_directory, digest[:2], digest)
+
+    def _has_blob(self, digest: str) -> bool:
+        return os.path.exists(self._blob_path(digest))
+
+    def _create_temporary_file(self) -> str:
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.store_directory, prefix='.tmp_')
+        os.close(file_descriptor)
+        return temporary_path
+
+    def _commit_blob(self, temporary_path: str, digest: str) -> None:
+        """Move a fully written payload to its blob path, or drop it if the blob already exists."""
+        blob_path = self._blob_path(digest)
+        if os.path.exists(blob_path):
+            os.remove(temporary_path)
+            return
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(temporary_path, blob_path)
+
+    def _link(self, filename: str, digest: str, source_url: str | None) -> bool:
+        """Point a step file to a blob, unless it already does."""
+        file_path = os.path.join(self.directory, filename)
+        blob_path = self._blob_path(digest)
+        with self._lock:
+            manifest_changes = {'files': {}, 'sources': {}}
+            if source_url and self.manifest['sources'].get(source_url) != digest:
+                manifest_changes['sources'][source_url] = digest
+            is_unchanged = (
+                self.manifest['files'].get(filename) == digest
+                and os.path.exists(file_path)
+                and self._has_payload(file_path, blob_path, digest)
+            )
+            if not is_unchanged:
+                # Link next to the destination then rename, so readers never see a missing or partial file
+                temporary_path = os.path.join(self.directory, f".{filename}.{os.getpid()}.tmp")
+                try:
+                    os.link(blob_path, temporary_path)
+                except OSError:
+                    # Filesystems without hard links get a copy instead
+                    shutil.copyfile(blob_path, temporary_path)
+                os.replace(temporary_path, file_path)
+                manifest_changes['files'][filename] = digest
+            if manifest_changes['files'] or manifest_changes['sources']:
+                self._update_manifest(manifest_changes)
+
+        if is_unchanged:
+            logger.info(f"{filename} is unchanged, skipping the write")
+            return False
+        content_file_index.invalidate(filename)
+        return True
+
+    def _has_payload(self, file_path: str, blob_path: str, digest: str) -> bool:
+        """Whether a step file holds the payload of a blob, as a hard link to it or, without hard links, as a copy."""
+        if os.path.samefile(file_path, blob_path):
+            return True
+        if os.path.getsize(file_path) != os.path.getsize(blob_path):
+            return False
+        file_digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                file_digest.update(chunk)
+        return file_digest.hexdigest() == digest
+
+    def _read_manifest(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {'files': {}, 'sources': {}}
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _update_manifest(self, changes: dict) -> None:
+        """
+        Write entries to the manifest, merged with the manifest on disk which other processes may have updated.
+        The read, merge and write happen under an exclusive lock on a lock file, held by one process at a time,
+        and the manifest is written to a temporary file of its own before replacing the previous one.
+        """
+        with open(self.manifest_lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                manifest = self._read_manifest()
+                for section, entries in changes.items():
+                    manifest[section].update(entries)
+                file_descriptor, temporary_path = tempfile.mkstemp(dir=self.store_directory, prefix='.manifest_')
+                try:
+                    with os.fdopen(file_descriptor, 'w', encoding='utf-8') as f:
+                        json.dump(manifest, f)
+                    os.replace(temporary_path, self.manifest_path)
+                except Exception:
+                    os.remove(temporary_path)
+                    raise
+                self.manifest = manifest
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_content_store = None
+
+
+def get_content_store() -> ContentStore:
+    """Get the content store shared by the scrapers of this process."""
+    global _content_store
+    if _content_store is None:
+        _content_store = ContentStore()
+    return _content_store
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+import requests
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.remote.webdriver import WebDriver
+from webdriver_manager.chrome import ChromeDriverManager
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+
+class DriverFactory(ABC):
+    """
+    Source of the browsers driven by the scrappers.
+    create starts a browser session and release is called once the session has been quit.
+    """
+
+    @abstractmethod
+    def create(self, options: Options) -> WebDriver:
+        """
+        Start a browser session.
+
+        Args:
+            options: Options of Chrome
+
+        Returns:
+            The driver of the session
+        """
+
+    def release(self, driver: WebDriver) -> None:
+        """Give back what the session of a quit driver held, nothing by default."""
+
+
+class LocalDriverFactory(DriverFactory):
+    """Starts Chrome on this machine through the chromedriver installed by ChromeDriverManager."""
+
+    def create(self, options: Options) -> WebDriver:
+        # Set up the driver with options and the link to the ChromeDriverManager
+        service = Service(ChromeDriverManager().install())
+        return webdriver.Chrome(service=service, options=options)
+
+
+class RemoteEndpoint:
+    """
+    Remote WebDriver endpoint, a Selenium Grid or a standalone chromedriver, accepting up to capacity sessions.
+    """
+
+    def __init__(self, url: str, capacity: int = 1):
+        self.url = url.rstrip('/')
+        self.capacity = capacity
+        self.active_sessions = 0
+        self.is_healthy = True
+        self.last_health_check_time = 0.0
+
+    def check_health(self, timeout: float = 5.0) -> bool:
+        """
+        Ask the endpoint whether it can start new sessions, through the /status route of the WebDriver protocol.
+
+        Args:
+            timeout: Timeout of the request in seconds
+
+        Returns:
+            True if the endpoint answered that it is ready
+        """
+        try:
+            response = requests.get(f"{self.url}/status", timeout=timeout)
+            return response.status_code == 200 and bool(response.json().get('value', {}).get('ready'))
+        except Exception as e:
+            logger.warning(f"Health check of {self.url} failed: {str(e)}")
+            return False
+
+    def __str__(self) -> str:
+        return f"{self.url} ({self.active_sessions}/{self.capacity} sessions)"
+
+
+class RemoteDriverFactory(DriverFactory):
+    """
+    Spreads the browser sessions over remote WebDriver endpoints.
+    Each session goes to the healthy endpoint with the most free capacity; when every endpoint is full,
+    create waits for a session to be released. An endpoint failing its health check or a session creation
+    is left aside until its next successful health check. The health checks are made without holding the lock,
+    so that a slow endpoint does not hold up the creations and releases on the other ones.
+    """
+
+    def __init__(self, endpoints: list[RemoteEndpoint], health_check_interval: float = 30.0, acquire_timeout: float = 600.0):
+        if not endpoints:
+            raise ValueError("At least one remote endpoint is required")
+        self.endpoints = endpoints
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self._endpoints_by_session: dict[str, RemoteEndpoint] = {}
+        self._condition = threading.Condition()
+
+    def create(self, options: Options) -> WebDriver:
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            endpoint = self._acquire_endpoint(deadline)
+            try:
+                logger.info(f"Starting a remote browser on {endpoint}")
+                driver = webdriver.Remote(command_executor=endpoint.url, options=options)
+            except Exception as e:
+                logger.error(f"Failed to start a browser on {endpoint.url}: {str(e)}")
+                with self._condition:
+                    endpoint.active_sessions -= 1
+                    endpoint.is_healthy = False
+                    self._condition.notify_all()
+                continue
+            with self._condition:
+                self._endpoints_by_session[driver.session_id] = endpoint
+            return driver
+
+    def release(self, driver: WebDriver) -> None:
+        with self._condition:
+            endpoint = self._endpoints_by_session.pop(driver.session_id, None)
+            if endpoint is not None:
+                endpoint.active_sessions -= 1
+                self._condition.notify_all()
+
+    def _acquire_endpoint(self, deadline: float) -> RemoteEndpoint:
+        while True:
+            self._refresh_health()
+            with self._condition:
+                available_endpoints = [
+                    endpoint for endpoint in self.endpoints
+                    if endpoint.is_healthy and endpoint.active_sessions < endpoint.capacity
+                ]
+                if available_endpoints:
+                    endpoint = max(available_endpoints, key=lambda e: e.capacity - e.active_sessions)
+                    endpoint.active_sessions += 1
+                    return endpoint
+
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0:
+                    raise RuntimeError(f"No remote browser available: {', '.join(map(str, self.endpoints))}")
+                # Wake up on a release, or to check again the health of the endpoints
+                self._condition.wait(timeout=min(remaining_time, self.health_check_interval))
+
+    def _refresh_health(self) -> None:
+        with self._condition:
+            now = time.monotonic()
+            due_endpoints = [
+                endpoint for endpoint in self.endpoints
+                if now - endpoint.last_health_check_time >= self.health_check_interval
+            ]
+            # Marked as checked right away, so that the threads acquiring at the same time do not check them too
+            for endpoint in due_endpoints:
+                endpoint.last_health_check_time = now
+        if not due_endpoints:
+            return
+
+        health_checks = [(endpoint, endpoint.check_health()) for endpoint in due_endpoints]
+        with self._condition:
+            for endpoint, is_healthy in health_checks:
+                endpoint.is_healthy = is_healthy
+            self._condition.notify_all()
+
+
+def parse_remote_endpoints(value: str) -> list[RemoteEndpoint]:
+    """
+    Parse a comma-separated list of endpoints, each one being a url optionally followed by |capacity,
+    e.g. "http://grid:4444|4,http://localhost:9515".
+
+    Args:
+        value: The list of endpoints
+
+    Returns:
+        The RemoteEndpoint objects
+
+    Raises:
+        ValueError: If a capacity is not a positive integer
+    """
+    endpoints = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        url, _, capacity = entry.partition('|')
+        if capacity and (not capacity.isdigit() or int(capacity) < 1):
+            raise ValueError(f"Invalid capacity in remote endpoint '{entry}'")
+        endpoints.append(RemoteEndpoint(url=url.strip(), capacity=int(capacity or 1)))
+    return endpoints
+
+
+@lru_cache(maxsize=None)
+def get_driver_factory() -> DriverFactory:
+    """
+    Get the driver factory of the process: the remote endpoints listed in SELENIUM_REMOTE_URLS if set,
+    the local Chrome otherwise. The factory is shared so that the capacities hold across the scrappers.
+    """
+    remote_urls = os.getenv('SELENIUM_REMOTE_URLS', '')
+    if remote_urls.strip():
+        return RemoteDriverFactory(endpoints=parse_remote_endpoints(remote_urls))
+    return LocalDriverFactory()
@@ -0,0 +1,142 @@
+import contextvars
+import itertools
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Job whose stage is running in the current thread, attached to the events it publishes
+_current_job_id: contextvars.ContextVar[str | None] = contextvars.ContextVar('scrape_event_job_id', default=None)
+
+
+class Subscription:
+    """
+    Queue of the events received by one subscriber.
+    The queue is bounded: a subscriber that does not keep up loses the oldest events instead of slowing the scraper.
+    """
+
+    def __init__(self, bus: 'EventBus', job_id: str | None = None, max_queued: int = 1000):
+        self.bus = bus
+        self.job_id = job_id
+        self.dropped_count = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued)
+
+    def get(self, timeout: float | None = None) -> dict | None:
+        """
+        Wait for the next event.
+
+        Args:
+            timeout: Maximum number of seconds to wait, forever if None
+
+        Returns:
+            The event, or None if no event was published before the timeout
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _deliver(self, event: dict) -> None:
+        if self.job_id is not None and event['job_id'] != self.job_id:
+            return
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped_count += 1
+                except queue.Empty:
+                    pass
+
+
+class EventBus:
+    """
+    In-process publish/subscribe channel for the events of the scraping stages.
+    Publishing is a single list check while nobody is subscribed, so the scrapers can publish unconditionally.
+    """
+
+    def __init__(self):
+        self._subscriptions: tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def subscribe(self, job_id: str | None = None, max_queued: int = 1000) -> Subscription:
+        """
+        Start receiving the published events.
+
+        Args:
+            job_id: Only receive the events of this job, all the events if None
+            max_queued: Maximum number of events kept for the subscriber
+
+        Returns:
+            The Subscription, to close when done
+        """
+        subscription = Subscription(bus=self, job_id=job_id, max_queued=max_queued)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+        if subscription.dropped_count:
+            logger.warning(f"Event subscriber closed after dropping {subscription.dropped_count} events")
+
+    def publish(self, event_type: str, **data) -> None:
+        """
+        Send an event to every subscriber.
+
+        Args:
+            event_type: Type of the event, e.g. 'page_started' or 'download_progress'
+            **data: JSON-serialisable payload of the event
+        """
+        # The tuple is replaced on (un)subscription, never mutated, so it can be read without the lock
+        subscriptions = self._subscriptions
+        if not subscriptions:
+            return
+        event = {
+            'id': next(self._ids),
+            'type': event_type,
+            'time': time.time(),
+            'job_id': _current_job_id.get(),
+            'data': data,
+        }
+        for subscription in subscriptions:
+            subscription._deliver(event)
+
+
+event_bus = EventBus()
+
+
+def publish(event_type: str, **data) -> None:
+    """Publish a scraping event on the event bus of the process."""
+    event_bus.publish(event_type, **data)
+
+
+@contextmanager
+def job_events(job_id: str):
+    """Attach the events published in the block to a job, so that subscribers can follow only this job."""
+    token = _current_job_id.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job_id.reset(token)
@@ -0,0 +1,282 @@
+import hashlib
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from django.conf import settings
+from .events import publish
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Priorities of the URLs, the lowest first: the listing pages discover the trainings, which list the steps
+PRIORITY_LISTING = 0
+PRIORITY_TRAINING = 1
+PRIORITY_STEP = 2
+
+# Stage loading the URLs of each priority, in the events published about them
+STAGES_BY_PRIORITY = {PRIORITY_LISTING: 'paths', PRIORITY_TRAINING: 'steps', PRIORITY_STEP: 'contents'}
+
+# Fetch records kept when the visited index is a Bloom filter, the most recent ones
+BLOOM_FETCH_RECORDS_LIMIT = 10_000
+
+
+class BloomFilter:
+    """
+    Set of strings in a bounded amount of memory, answering "maybe present" or "surely absent".
+    Sized for an expected number of items and a rate of false positives, a false positive
+    making the frontier take a URL never loaded for a visited one.
+    Once the expected number of items is reached, the items go to a new filter twice as large with a lower
+    error rate, so that an underestimated capacity costs memory instead of false positives.
+    """
+
+    # Ratio of the error rate of each added filter to the previous one, bounding the total error rate
+    ERROR_RATE_RATIO = 0.5
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self._slices: list[_BloomSlice] = [_BloomSlice(self.capacity, error_rate * (1 - self.ERROR_RATE_RATIO))]
+        self.count = 0
+
+    def add(self, item: str) -> None:
+        current_slice = self._slices[-1]
+        if current_slice.count >= current_slice.capacity:
+            current_slice = _BloomSlice(current_slice.capacity * 2, current_slice.error_rate * self.ERROR_RATE_RATIO)
+            self._slices.append(current_slice)
+        current_slice.add(item)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in bloom_slice for bloom_slice in self._slices)
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class _BloomSlice:
+    """Bloom filter of a fixed capacity, one of the filters of a BloomFilter."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Optimal number of bits and of hash functions for the capacity and the error rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        # Double hashing: k positions from two independent hashes
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+@dataclass(slots=True)
+class FetchRecord:
+    """Last load of a URL in the run."""
+    url: str
+    priority: int
+    fetch_count: int = 0
+    last_fetch_time: float = 0.0
+    last_duration: float = 0.0
+    last_succeeded: bool = False
+    last_worker: str = ''
+
+
+class CrawlFrontier:
+    """
+    URLs of a scraping run, shared by its workers.
+    The workers pull the queued URLs by priority, the listing pages before the trainings and the trainings before
+    the steps, and load them through claim(): a URL is loaded at most once per run, unless it is explicitly
+    re-queued. Each load is recorded with its time, duration and outcome.
+    The visited index is a set, or a Bloom filter for runs expected to load more URLs than CRAWL_FRONTIER_BLOOM_THRESHOLD,
+    the pages of the steps included.
+    A URL whose load failed is forgotten, so that a later attempt loads it again.
+    """
+
+    def __init__(self, expected_urls: int = 0, error_rate: float = 0.001):
+        self.uses_bloom_filter = expected_urls >= settings.CRAWL_FRONTIER_BLOOM_THRESHOLD
+        self._visited: set[str] | BloomFilter = BloomFilter(expected_urls, error_rate) if self.uses_bloom_filter else set()
+        self._fetch_records: OrderedDict[str, FetchRecord] = OrderedDict()
+        self._heap: list[tuple[int, int, str]] = []
+        self._queued: dict[str, object] = {}
+        # URLs allowed to be loaded once more, e.g. after a failed load, a Bloom filter cannot forget a URL
+        self._requeued: set[str] = set()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self.counts = {'queued': 0, 'loaded': 0, 'reloaded': 0, 'skipped': 0, 'failed': 0}
+
+    def add(self, url: str, priority: int = PRIORITY_STEP, payload=None) -> bool:
+        """
+        Queue a URL, unless it was already loaded or queued in the run.
+
+        Args:
+            url: URL to load
+            priority: One of the PRIORITY_ constants, the lowest pulled first
+            payload: Value handed back with the URL by pop(), e.g. the ID of the training
+
+        Returns:
+            True if the URL was queued
+        """
+        with self._lock:
+            if url in self._queued or (url in self._visited and url not in self._requeued):
+                self.counts['skipped'] += 1
+                return False
+            self._push(url, priority, payload)
+            return True
+
+    def requeue(self, url: str, priority: int = PRIORITY_STEP, payload=None) -> None:
+        """
+        Queue a URL again even if it was already loaded, e.g. to read a page whose state changed.
+
+        Args:
+            url: URL to load again
+            priority: One of the PRIORITY_ constants
+            payload: Value handed back with the URL by pop()
+        """
+        with self._lock:
+            self._requeued.add(url)
+            if url not in self._queued:
+                self._push(url, priority, payload)
+
+    def _push(self, url: str, priority: int, payload) -> None:
+        self._queued[url] = payload
+        heapq.heappush(self._heap, (priority, next(self._sequence), url))
+        self.counts['queued'] += 1
+
+    def pop(self) -> tuple[str, object] | None:
+        """
+        Take the queued URL with the highest priority, the first queued among equal priorities.
+
+        Returns:
+            The URL and its payload, None if nothing is queued
+        """
+        with self._lock:
+            if not self._heap:
+                return None
+            _, _, url = heapq.heappop(self._heap)
+            return url, self._queued.pop(url)
+
+    def claim(self, url: str, priority: int = PRIORITY_STEP, requeue: bool = False) -> bool:
+        """
+        Mark a URL as loaded in the run, before a worker loads it.
+
+        Args:
+            url: URL about to be loaded
+            priority: One of the PRIORITY_ constants
+            requeue: Load the URL even if it was already loaded in the run, e.g. for a retry
+
+        Returns:
+            False if the URL was already loaded in the run and is not re-queued, it must not be loaded again
+        """
+        with self._lock:
+            if url in self._visited:
+                if not requeue and url not in self._requeued:
+                    self.counts['skipped'] += 1
+                    return False
+                self._requeued.discard(url)
+                self.counts['reloaded'] += 1
+            else:
+                self._visited.add(url)
+            self.counts['loaded'] += 1
+            record = self._fetch_records.pop(url, None) or FetchRecord(url=url, priority=priority)
+            record.fetch_count += 1
+            record.last_fetch_time = time.time()
+            record.last_worker = threading.current_thread().name
+            self._fetch_records[url] = record
+            if self.uses_bloom_filter and len(self._fetch_records) > BLOOM_FETCH_RECORDS_LIMIT:
+                self._fetch_records.popitem(last=False)
+            return True
+
+    def record_fetch(self, url: str, duration: float, succeeded: bool) -> None:
+        """
+        Record the outcome of the load of a claimed URL.
+        A failed load is removed from the visited index, the URL not having been loaded.
+
+        Args:
+            url: URL loaded
+            duration: Seconds spent loading the page
+            succeeded: Whether the page loaded
+        """
+        with self._lock:
+            record = self._fetch_records.get(url)
+            if record is not None:
+                record.last_duration = duration
+                record.last_succeeded = succeeded
+            if not succeeded:
+                self.counts['failed'] += 1
+                if self.uses_bloom_filter:
+                    self._requeued.add(url)
+                else:
+                    self._visited.discard(url)
+
+    def get_fetch_record(self, url: str) -> FetchRecord | None:
+        """Last load of a URL in the run, None if never loaded (or forgotten on a run using a Bloom filter)."""
+        with self._lock:
+            return self._fetch_records.get(url)
+
+    def was_loaded(self, url: str) -> bool:
+        with self._lock:
+            return url in self._visited
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    def get_report(self) -> dict:
+        """Number of URLs queued, loaded, reloaded, skipped because already loaded, and failed in the run."""
+        with self._lock:
+            return {**self.counts, 'visited_index': 'bloom' if self.uses_bloom_filter else 'set'}
+
+
+def load_url(scrapper, url: str, priority: int, requeue: bool = False, load=None) -> None:
+    """
+    Load a URL in the browser of a scrapper, through the frontier of its run if it has one.
+    A URL the run already loaded is not loaded again while the browser displays it. Otherwise it is loaded again,
+    with an error event: the page may never have been loaded, a Bloom filter taking a few new URLs for visited ones.
+
+    Args:
+        scrapper: SeleniumScrapper, whose frontier attribute is the frontier of the run or None
+        url: URL to load
+        priority: One of the PRIORITY_ constants
+        requeue: Load the URL even if the run already loaded it
+        load: Function loading the URL, driver.get by default
+
+    Raises:
+        Exception: The error of the load, recorded as a failed fetch
+    """
+    load = load or scrapper.driver.get
+    frontier = scrapper.frontier
+    if frontier is None:
+        load(url)
+        return
+    if not frontier.claim(url, priority=priority, requeue=requeue):
+        if scrapper.driver.current_url == url:
+            logger.info(f"{url} was already loaded in this run and is displayed, not loading it again")
+            return
+        message = f"{url} is marked as loaded in this run but is not displayed, loading it again"
+        logger.error(message)
+        publish('error', stage=STAGES_BY_PRIORITY.get(priority), url=url, message=message)
+        frontier.claim(url, priority=priority, requeue=True)
+    start_time = time.monotonic()
+    try:
+        load(url)
+    except Exception:
+        frontier.record_fetch(url, time.monotonic() - start_time, succeeded=False)
+        raise
+    frontier.record_fetch(url, time.monotonic() - start_time, succeeded=True)
@@ -0,0 +1,279 @@
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from .records import PathRecord, PathTrainingRecord, StepRecord, TrainingRecord
+from .logger import get_logger
+from .path_extraction import _generate_path_id
+from .training_extraction import (
+    _create_training_id,
+    build_path_training_links,
+    merge_path_training_links,
+    merge_shared_trainings,
+)
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Patterns of the URLs of the API requests behind the listing of the paths and behind the view of a training,
+# searched in the request URLs, to update from the network tab of the browser if the platform moves its API
+PATHS_RESPONSE_URL_PATTERN = os.getenv('SCRAPPER_PATHS_RESPONSE_URL_PATTERN') or r'/api/.*training-?paths'
+STEPS_RESPONSE_URL_PATTERN = os.getenv('SCRAPPER_STEPS_RESPONSE_URL_PATTERN') or r'/api/.*trainings?/[^/?]+/(steps|modules)'
+
+# Maximum number of seconds to wait for the API responses of a page, and interval between two reads of the log
+RESPONSE_TIMEOUT = 10.0
+RESPONSE_POLL_INTERVAL = 0.1
+
+# Keys under which the payloads of the platform may hold each field, the first key present is used
+PATH_KEYS = {
+    'title': ['title', 'name', 'label'],
+    'progression': ['progression', 'progress', 'completion', 'completionRate'],
+    'score': ['score', 'averageScore', 'successRate'],
+    'trainings': ['trainings', 'courses', 'modules', 'items'],
+}
+TRAINING_KEYS = {
+    'title': ['title', 'name', 'label'],
+    'progression': ['progression', 'progress', 'completion', 'completionRate'],
+    'score': ['score', 'averageScore', 'successRate'],
+    'type': ['type', 'trainingType', 'format', 'kind'],
+}
+STEP_KEYS = {
+    'id': ['id', 'stepId', 'step_id'],
+    'title': ['title', 'name', 'label'],
+    'type': ['type', 'moduleType', 'itemType', 'kind'],
+    'is_validated': ['validated', 'isValidated', 'completed', 'isCompleted', 'done'],
+    'is_blocked': ['locked', 'isLocked', 'blocked', 'isBlocked'],
+}
+
+
+@dataclass
+class CapturedResponse:
+    """JSON response received by the browser."""
+    url: str
+    payload: object
+
+
+class NetworkCapture:
+    """
+    Reader of the JSON responses received by the browser, from the performance log of Chrome.
+    The scrapper must have been started with capture_network, which turns the performance log on.
+    The log holds the responses of every tab while the bodies can only be read from the tab in front,
+    so the finished responses are kept until a take matching them runs in their tab.
+    A take waits for the requests of the page matching its URL pattern to finish, the API requests of a page
+    being sent by its scripts after the page itself has loaded.
+    """
+
+    def __init__(self, driver, max_pending_responses: int = 200):
+        self.driver = driver
+        # Chrome only, a plain remote driver has no access to the DevTools protocol
+        self.is_available = hasattr(driver, 'execute_cdp_cmd')
+        self.max_pending_responses = max_pending_responses
+        # URL of each finished JSON response not taken yet, by request ID, in the order they finished
+        self.pending_urls: dict[str, str] = {}
+        self._json_urls_by_request_id: dict[str, str] = {}
+        # URL of each request sent and not finished yet, by request ID
+        self._in_flight_urls: dict[str, str] = {}
+
+    def take(self, url_pattern: str, url_part: str | None = None, timeout: float = RESPONSE_TIMEOUT) -> list[CapturedResponse]:
+        """
+        Read the JSON responses of the requests whose URL matches a pattern, which have not been taken yet.
+        Wait until such a response has finished and no other matching request is still loading, at most timeout seconds.
+
+        Args:
+            url_pattern: Regular expression searched in the request URLs, e.g. STEPS_RESPONSE_URL_PATTERN
+            url_part: Only take the responses whose URL also contains this text, e.g. the ID of the training
+            timeout: Maximum number of seconds to wait for the responses
+
+        Returns:
+            The responses in the order they finished loading, empty if the capture is not available
+            or if no matching response finished in time
+        """
+        if not self.is_available:
+            return []
+
+        def matches(url: str) -> bool:
+            return re.search(url_pattern, url) is not None and (url_part is None or url_part in url)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            self._read_log()
+            if not self.is_available:
+                return []
+            has_response = any(matches(url) for url in self.pending_urls.values())
+            is_loading = any(matches(url) for url in self._in_flight_urls.values())
+            if has_response and not is_loading:
+                break
+            if time.monotonic() >= deadline:
+                logger.info(f"No complete response matching {url_pattern} after {timeout} seconds")
+                break
+            time.sleep(RESPONSE_POLL_INTERVAL)
+
+        responses = []
+        for request_id, url in list(self.pending_urls.items()):
+            if not matches(url):
+                continue
+            del self.pending_urls[request_id]
+            payload = self._get_response_payload(request_id)
+            if payload is not None:
+                responses.append(CapturedResponse(url=url, payload=payload))
+        return responses
+
+    def _read_log(self) -> None:
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception as e:
+            logger.warning(f"Network capture unavailable: {str(e)}")
+            self.is_available = False
+            return
+
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            params = message.get('params', {})
+            if message.get('method') == 'Network.requestWillBeSent':
+                self._in_flight_urls[params.get('requestId')] = params.get('request', {}).get('url', '')
+            elif message.get('method') == 'Network.responseReceived':
+                response = params.get('response', {})
+                if 'json' in response.get('mimeType', ''):
+                    self._json_urls_by_request_id[params['requestId']] = response.get('url', '')
+            elif message.get('method') == 'Network.loadingFinished':
+                request_id = params.get('requestId')
+                self._in_flight_urls.pop(request_id, None)
+                if request_id in self._json_urls_by_request_id:
+                    self.pending_urls[request_id] = self._json_urls_by_request_id.pop(request_id)
+            elif message.get('method') == 'Network.loadingFailed':
+                self._in_flight_urls.pop(params.get('requestId'), None)
+                self._json_urls_by_request_id.pop(params.get('requestId'), None)
+
+        # Forget the oldest responses nobody took, e.g. the ones of the pages left before reading them,
+        # and the requests never finished, e.g. the ones of a tab closed while they loaded
+        for request_id in list(self.pending_urls)[:-self.max_pending_responses]:
+            del self.pending_urls[request_id]
+        for request_id in list(self._in_flight_urls)[:-self.max_pending_responses]:
+            del self._in_flight_urls[request_id]
+
+    def _get_response_payload(self, request_id: str):
+        try:
+            body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            return json.loads(body['body'])
+        except Exception as e:
+            # The body is gone once the page that requested it has been left
+            logger.debug(f"Failed to read the response body of request {request_id}: {str(e)}")
+            return None
+
+
+def _get_value(item: dict, keys: list[str], default=None):
+    return next((item[key] for key in keys if key in item and item[key] is not None), default)
+
+
+def _to_ratio(value) -> float:
+    """Convert a progression or a score, given as a ratio, a percentage or a text like '42%', to a ratio."""
+    text = str(value).strip()
+    try:
+        ratio = float(text.strip('%') or 0)
+    except ValueError:
+        return 0.0
+    return ratio / 100 if text.endswith('%') or ratio > 1 else ratio
+
+
+def _find_items(payload) -> list[dict]:
+    """
+    Find the list of objects of a JSON payload, either the payload itself or the first list of objects
+    found in its envelope, e.g. {"data": [...]}.
+    """
+    if isinstance(payload, list):
+        if payload and all(isinstance(item, dict) for item in payload):
+            return payload
+        return []
+    if isinstance(payload, dict):
+        for value in payload.values():
+            if isinstance(value, (dict, list)) and (items := _find_items(value)):
+                return items
+    return []
+
+
+def build_paths_and_trainings_from_responses(
+    responses: list[CapturedResponse],
+) -> tuple[list[PathRecord], list[TrainingRecord], list[PathTrainingRecord]]:
+    """
+    Build the paths and trainings of a listing page from the responses of its API requests,
+    taken with PATHS_RESPONSE_URL_PATTERN. Each object of a response is a path, with the list of its trainings.
+    The ids are built like the DOM extraction builds them, so both modes save the same rows.
+
+    Args:
+        responses: JSON responses of the paths requests of the page
+
+    Returns:
+        The paths, the trainings shared by several paths only once, and the links between them,
+        empty if the responses hold no path
+    """
+    paths, trainings, links = [], [], []
+    for response in responses:
+        for item in _find_items(response.payload):
+            title = str(_get_value(item, PATH_KEYS['title'], '')).strip()
+            if not title:
+                logger.warning(f"Skipping a path without title in {response.url}")
+                continue
+            path_id = _generate_path_id(title)
+            paths.append(PathRecord(
+                id=path_id,
+                platform_id=path_id,
+                title=title,
+                progression=_to_ratio(_get_value(item, PATH_KEYS['progression'], 0)),
+                score=_to_ratio(_get_value(item, PATH_KEYS['score'], 0)),
+            ))
+            path_trainings = []
+            for training_item in _get_value(item, PATH_KEYS['trainings'], []):
+                training_title = str(_get_value(training_item, TRAINING_KEYS['title'], '')).strip()
+                training_type = str(_get_value(training_item, TRAINING_KEYS['type'], 'unknown')).strip()
+                training_id = _create_training_id(training_title, training_type)
+                path_trainings.append(TrainingRecord(
+                    id=training_id,
+                    platform_id=training_id,
+                    title=training_title,
+                    progression=_to_ratio(_get_value(training_item, TRAINING_KEYS['progression'], 0)),
+                    score=_to_ratio(_get_value(training_item, TRAINING_KEYS['score'], 0)),
+                    type=training_type,
+                ))
+            trainings.extend(path_trainings)
+            links.extend(build_path_training_links(path_id=path_id, trainings=path_trainings))
+        logger.info(f"Built {len(paths)} paths and {len(trainings)} trainings from {response.url}")
+    # A path listed twice in the responses is linked to its trainings once
+    return paths, merge_shared_trainings(trainings), merge_path_training_links(links)
+
+
+def build_steps_from_responses(responses: list[CapturedResponse], training_id) -> list[StepRecord]:
+    """
+    Build the steps of a training from the responses of the API requests of its view,
+    taken with STEPS_RESPONSE_URL_PATTERN. Each object of the last response is a step, the previous ones
+    being superseded, e.g. by a reload of the view.
+
+    Args:
+        responses: JSON responses of the steps requests of the training view
+        training_id: ID of the training
+
+    Returns:
+        The steps in the order of the payload, empty if the responses hold no step
+    """
+    if not responses:
+        return []
+    response = responses[-1]
+    steps = []
+    for item in _find_items(response.payload):
+        step_id = str(_get_value(item, STEP_KEYS['id'], ''))
+        if not step_id.isdigit():
+            logger.warning(f"Skipping a step without numeric id in {response.url}")
+            continue
+        steps.append(StepRecord(
+            id=int(step_id),
+            platform_id=int(step_id),
+            training_id=training_id,
+            title=str(_get_value(item, STEP_KEYS['title'], '')).strip(),
+            type=str(_get_value(item, STEP_KEYS['type'], '')).lower().replace('icon-module-', ''),
+            is_validated=bool(_get_value(item, STEP_KEYS['is_validated'], False)),
+            is_blocked=bool(_get_value(item, STEP_KEYS['is_blocked'], False)),
+        ))
+    return steps
@@ -1,8 +1,9 @@
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
-from platform_new.models.models import Path
+from .records import PathRecord
 from .logger import get_logger
+from .snapshot import SnapshotElement
 
 # Create logger for this module
 logger = get_logger(__name__)
@@ -15,15 +16,15 @@ PATH_SELECTORS = {
 }
 
 
-def build_path_from_card(card: WebElement) -> Path:
+def build_path_from_card(card: WebElement | SnapshotElement) -> PathRecord:
     """
     Extracts path information from a path card WebElement.
 
     Args:
-        card (WebElement): The WebElement containing the path card data
+        card (WebElement | SnapshotElement): The element containing the path card data, live or from a page snapshot
 
     Returns:
-        Path: A Path object containing the extracted information
+        PathRecord: A Path record containing the extracted information
 
     Raises:
         NoSuchElementException: If required elements are not found in the card
@@ -39,7 +40,7 @@ def build_path_from_card(card: WebElement) -> Path:
         if title == '':
             raise ValueError(f"Path title cannot be empty. title='{title}'")
         
-        return Path(
+        return PathRecord(
             id=path_id,
             platform_id=path_id,
             title=title,
@@ -58,7 +59,7 @@ def build_path_from_card(card: WebElement) -> Path:
         raise 
 
 
-def _extract_path_title(card: WebElement) -> str:
+def _extract_path_title(card: WebElement | SnapshotElement) -> str:
     """
     Extract path title from the card.
     
@@ -72,7 +73,7 @@ def _extract_path_title(card: WebElement) -> str:
     return title_element.text.strip()
 
 
-def _extract_path_progression(card: WebElement) -> float:
+def _extract_path_progression(card: WebElement | SnapshotElement) -> float:
     """
     Extract path progression from the first progress bar.
     
@@ -89,7 +90,7 @@ def _extract_path_progression(card: WebElement) -> float:
     return 0.0
 
 
-def _extract_path_score(card: WebElement) -> float:
+def _extract_path_score(card: WebElement | SnapshotElement) -> float:
     """
     Extract path score from the second progress bar.
     
@@ -4,33 +4,69 @@ from selenium.webdriver.common.by import By
 from selenium.common.exceptions import WebDriverException, NoSuchElementException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from platform_new.models.models import Path, Training
+from platform_new.scrapper.records import PathRecord, PathTrainingRecord, TrainingRecord
 from platform_new.scrapper.scrapper import SeleniumScrapper
 
 # Import the new modules
 from .path_extraction import build_path_from_card
-from .training_extraction import build_trainings_from_card
+from .training_extraction import build_trainings_from_card, merge_path_training_links, merge_shared_trainings
+from .network_capture import PATHS_RESPONSE_URL_PATTERN, build_paths_and_trainings_from_responses
+from .snapshot import get_extraction_backend, take_page_snapshot
 from .pagination import get_number_of_pages_for_paths, navigate_to_next_page
+from .frontier import PRIORITY_LISTING, load_url
+from .archive import PAGE_KIND_PATHS, archive_page
+from .events import publish
 from .logger import get_logger
 
 # Create logger for this module
 logger = get_logger(__name__)
 
 
-def get_scrapped_path_and_training_objects(scrapper: SeleniumScrapper) -> tuple[list[Path], list[Training]]:
+def get_scrapped_path_and_training_objects(
+    scrapper: SeleniumScrapper,
+) -> tuple[list[PathRecord], list[TrainingRecord], list[PathTrainingRecord]]:
     """
     Scrapping path and training objects from all pages of the training platform.
     Path are the highest level objects which contain a list of trainings. 
     Trainings are lower level objects which contain a list of steps.
+    A training shared by several paths is returned once, with one link per path,
+    and a path listed on several pages is linked to its trainings once.
 
     Args:
         scrapper: SeleniumScrapper instance to interact with the webpage
 
     Returns:
-        A tuple containing a list of Path objects and a list of Training objects made from scraped data
+        A tuple containing a list of Path objects, a list of Training objects and the links between them made from scraped data
 
     Raises:
-        WebDriverException: If there are issues accessing the webpage
+        Exception: If the paths could not be scraped, e.g. the page of the paths was not reached
+    """
+    scrapped_path_objects: list[PathRecord] = []
+    scrapped_training_objects: list[TrainingRecord] = []
+    scrapped_link_objects: list[PathTrainingRecord] = []
+    known_training_ids: set[str] = set()
+    known_link_ids: set[str] = set()
+    for _, paths_from_page, trainings_from_page, links_from_page in iter_scrapped_path_and_training_objects(scrapper=scrapper):
+        scrapped_path_objects.extend(paths_from_page)
+        scrapped_training_objects.extend(merge_shared_trainings(trainings_from_page, known_training_ids))
+        scrapped_link_objects.extend(merge_path_training_links(links_from_page, known_link_ids))
+    return scrapped_path_objects, scrapped_training_objects, scrapped_link_objects
+
+
+def iter_scrapped_path_and_training_objects(scrapper: SeleniumScrapper):
+    """
+    Scrap the path and training objects page by page, yielding each page as soon as it is scraped,
+    so that the trainings of the first page can be processed while the next pages are scraped.
+
+    Args:
+        scrapper: SeleniumScrapper instance to interact with the webpage
+
+    Yields:
+        Tuples (page number, list of Path objects, list of Training objects, list of PathTraining links) of each page,
+        the trainings shared by several paths of the page being listed once
+
+    Raises:
+        Exception: The error which stopped the scraping of the paths, once logged and published
     """
     try:
         # Navigate to training paths page with retry logic
@@ -44,21 +80,20 @@ def get_scrapped_path_and_training_objects(scrapper: SeleniumScrapper) -> tuple[
 
         num_pages = get_number_of_pages_for_paths(scrapper=scrapper)
 
-        scrapped_path_objects, scrapped_training_objects = _scrap_paths_and_trainings_from_all_pages(
-            scrapper=scrapper,
-            num_pages=num_pages
-        )
-
-        return scrapped_path_objects, scrapped_training_objects
+        yield from _iter_paths_and_trainings_from_all_pages(scrapper=scrapper, num_pages=num_pages)
 
     except Exception as e:
         logger.error(f"Failed to scrape path objects: {str(e)}")
-        return [], []
+        publish('error', stage='paths', message=f"Failed to scrape path objects: {str(e)}")
+        # The stage and the pipeline fail instead of reporting a run without any page as a success
+        raise
 
 
 def navigate_to_page(scrapper: SeleniumScrapper, url: str, max_attempts: int = 10, delay: int = 3) -> bool:
     """
     Navigate to a page with retry logic.
+    The first attempt does not load the page again if the run already loaded it and the browser displays it,
+    the retries load it again explicitly.
     
     Args:
         scrapper: SeleniumScrapper instance
@@ -75,7 +110,7 @@ def navigate_to_page(scrapper: SeleniumScrapper, url: str, max_attempts: int = 1
         
     for attempt in range(max_attempts):
         logger.info(f"Navigating to {url} (attempt {attempt + 1}/{max_attempts})")
-        scrapper.driver.get(url)
+        load_url(scrapper, url, priority=PRIORITY_LISTING, requeue=attempt > 0)
         time.sleep(delay)
         
         # Check if we're actually on the expected page
@@ -90,7 +125,7 @@ def navigate_to_page(scrapper: SeleniumScrapper, url: str, max_attempts: int = 1
     return False
 
 
-def _scrap_paths_and_trainings_from_all_pages(scrapper: SeleniumScrapper, num_pages: int) -> tuple[list[Path], list[Training]]:
+def _iter_paths_and_trainings_from_all_pages(scrapper: SeleniumScrapper, num_pages: int):
     """
     Process all pages in order to collect path and training objects from each page.
     
@@ -98,21 +133,25 @@ def _scrap_paths_and_trainings_from_all_pages(scrapper: SeleniumScrapper, num_pa
         scrapper: SeleniumScrapper instance
         num_pages: Total number of pages to process
         
-    Returns:
-        Tuple of (list[Path], list[Training]) containing all scraped objects
+    Yields:
+        Tuples (page number, list of Path objects, list of Training objects, list of PathTraining links) of each page
     """
-    scrapped_path_objects: list[Path] = []
-    scrapped_training_objects: list[Training] = []
-
     # Process each page and navigate to next page if available
     for page in range(1, num_pages + 1):
         logger.info(f"Processing page {page}")
-        paths_from_page, trainings_from_page = _scrap_paths_and_trainings_from_single_page(
+        publish('page_started', page=page, num_pages=num_pages)
+        paths_from_page, trainings_from_page, links_from_page = _scrap_paths_and_trainings_from_single_page(
             scrapper=scrapper,
             page=page
         )
-        scrapped_path_objects.extend(paths_from_page)
-        scrapped_training_objects.extend(trainings_from_page)
+        publish(
+            'page_finished',
+            page=page,
+            num_pages=num_pages,
+            paths=len(paths_from_page),
+            trainings=len(trainings_from_page),
+        )
+        yield page, paths_from_page, trainings_from_page, links_from_page
 
         has_next_page = navigate_to_next_page(
             scrapper=scrapper,
@@ -123,10 +162,11 @@ def _scrap_paths_and_trainings_from_all_pages(scrapper: SeleniumScrapper, num_pa
         if not has_next_page:
             break
 
-    return scrapped_path_objects, scrapped_training_objects
 
-
-def _scrap_paths_and_trainings_from_single_page(scrapper: SeleniumScrapper, page: int) -> tuple[list[Path], list[Training]]:
+def _scrap_paths_and_trainings_from_single_page(
+    scrapper: SeleniumScrapper,
+    page: int,
+) -> tuple[list[PathRecord], list[TrainingRecord], list[PathTrainingRecord]]:
     """
     Process a single page of path and training objects.
 
@@ -135,33 +175,60 @@ def _scrap_paths_and_trainings_from_single_page(scrapper: SeleniumScrapper, page
         page: Current page number being processed
 
     Returns:
-        List of Path objects and Training objects from the current page
+        List of Path objects, Training objects and PathTraining links from the current page
     """
     try:
+        # Build the page from the JSON responses behind it if they are captured, without opening the cards
+        if scrapper.network_capture is not None:
+            responses = scrapper.network_capture.take(PATHS_RESPONSE_URL_PATTERN)
+            paths_on_page, trainings_on_page, links_on_page = build_paths_and_trainings_from_responses(responses)
+            if paths_on_page:
+                return paths_on_page, trainings_on_page, links_on_page
+            logger.info(f"No paths found in the network responses of page {page}, falling back to the DOM")
+
         # Find all path training cards on current page and open them
         cards = _find_and_open_cards_on_page(scrapper)
+        path_cards = trainings_cards = cards
+        path_backend = get_extraction_backend('paths')
+        trainings_backend = get_extraction_backend('trainings')
+        if 'snapshot' in (path_backend, trainings_backend):
+            # Let the opened cards load their trainings once for all the cards, then copy the page
+            time.sleep(3)
+            snapshot_cards = take_page_snapshot(scrapper.driver).find_elements(By.CSS_SELECTOR, '.training-path-subscription-card')
+            if len(snapshot_cards) == len(cards):
+                path_cards = snapshot_cards if path_backend == 'snapshot' else cards
+                trainings_cards = snapshot_cards if trainings_backend == 'snapshot' else cards
+            else:
+                logger.warning(f"Snapshot of page {page} has {len(snapshot_cards)} cards instead of {len(cards)}, using the DOM")
 
         # Extract path data from each path training card
         paths_on_page = []
         trainings_on_page = []
-        for card in cards:
+        links_on_page = []
+        for path_card, trainings_card in zip(path_cards, trainings_cards):
             try:
-                path = build_path_from_card(card=card)
+                path = build_path_from_card(card=path_card)
                 logger.info(f"Path {path.id} extracted from card")
                 paths_on_page.append(path)
-                trainings = build_trainings_from_card(card=card, path_id=str(path.id))
+                trainings, links = build_trainings_from_card(card=trainings_card, path_id=str(path.id))
                 logger.info(f"Trainings {trainings} extracted from card")
                 trainings_on_page.extend(trainings)
+                links_on_page.extend(links)
 
             except Exception as e:
                 logger.error(f"Failed to process card: {e}")
+                publish('error', stage='paths', page=page, message=f"Failed to process card: {e}")
                 continue
 
-        return paths_on_page, trainings_on_page
+        # The cards are open and loaded by now, so the archived page holds the trainings
+        archive_page(scrapper.driver, kind=PAGE_KIND_PATHS, key=page, metadata={'page': page})
+        # The trainings shared by several paths of the page are saved once, and so are the links of a path listed twice
+        return paths_on_page, merge_shared_trainings(trainings_on_page), merge_path_training_links(links_on_page)
 
     except Exception as e:
         logger.error(f"Error processing page {page}: {str(e)}")
-        return [], []
+        publish('error', stage='paths', page=page, message=f"Error processing page {page}: {str(e)}")
+        return [], [], []
 
 
 def _find_and_open_cards_on_page(scrapper: SeleniumScrapper) -> list:
@@ -0,0 +1,268 @@
+import contextvars
+import queue
+import threading
+import time
+from django.db import connection
+from platform_new.models.models import Path, PathTraining, Step, Training
+from platform_new.scrapper.frontier import CrawlFrontier
+from platform_new.scrapper.content_scrapping import get_scrapped_content_objects_for_training_module
+from platform_new.scrapper.path_training_scrapping import iter_scrapped_path_and_training_objects
+from platform_new.scrapper.scheduler import build_refresh_plan, record_training_checked
+from platform_new.scrapper.scrapper import SeleniumScrapper
+from platform_new.scrapper.step_scrapping import get_scrapped_step_objects_for_training_module
+from platform_new.scrapper.training_extraction import merge_path_training_links, merge_shared_trainings
+from scrappingchef.utils import bulk_create_or_update
+from .logger import get_logger
+from .progress import StageCancelled, StageProgress
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Marker telling a worker that no more work will come
+_END = object()
+
+# Seconds between two checks of the stop flag while waiting on a queue
+_POLL_INTERVAL = 1.0
+
+
+class PipelineStopped(Exception):
+    """Raised inside the pipeline threads once the pipeline has been stopped."""
+
+
+class ScrapePipeline:
+    """
+    Crawler running the paths, steps and contents stages at the same time.
+    The paths page scrapper saves each page of paths and trainings, then hands the trainings due for a refresh
+    to the step workers through a bounded queue. The step workers save the steps of each training and hand
+    the trainings with contents left to scrap to the content workers through a second bounded queue.
+    Every worker drives its own browser. Parents are always saved before their children are handed over,
+    and the bounded queues slow down the upstream stages when the downstream ones fall behind.
+    A training listed in several paths is handed over once per run, the other paths only get their link to it.
+    The browsers share the frontier of the run, so that no page is loaded twice: the content workers receive
+    the steps scraped by the step workers instead of loading the view of the training again.
+    """
+
+    def __init__(
+        self,
+        step_workers: int = 2,
+        content_workers: int = 1,
+        scrap_contents: bool = True,
+        full: bool = False,
+        queue_size: int = 20,
+        progress: StageProgress | None = None,
+    ):
+        self.step_workers = max(1, step_workers)
+        self.content_workers = max(1, content_workers) if scrap_contents else 0
+        self.scrap_contents = scrap_contents
+        self.full = full
+        self.progress = progress or StageProgress()
+        self.training_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.content_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.frontier = CrawlFrontier()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._start_time = 0.0
+        self.counts = {
+            'pages': 0, 'paths': 0, 'trainings': 0, 'shared_trainings': 0, 'scheduled_trainings': 0, 'steps': 0, 'contents': 0,
+        }
+        self.known_training_ids: set[str] = set()
+        self.known_link_ids: set[str] = set()
+        self.training_durations: dict[str, float] = {'steps': 0.0, 'contents': 0.0}
+        self.first_item_times: dict[str, float] = {}
+        self.errors: list[str] = []
+
+    def run(self) -> dict:
+        """
+        Run the pipeline until every stage is done.
+
+        Returns:
+            Dictionary with the number of objects saved per type, the errors, the duration,
+            the delay after which each stage handled its first item, and the time saved on the shared trainings
+
+        Raises:
+            StageCancelled: If the cancellation of the pipeline has been requested
+        """
+        self._start_time = time.monotonic()
+        step_threads = self._start_workers('steps', self.step_workers, self._run_step_worker)
+        content_threads = self._start_workers('contents', self.content_workers, self._run_content_worker)
+
+        try:
+            try:
+                self._produce_trainings()
+            except PipelineStopped:
+                pass
+            except Exception as e:
+                self._fail(f"Paths scrapping failed: {str(e)}")
+
+            # Each stage is closed once the stage feeding it is done, so that queued work is never lost
+            self._close_stage(self.training_queue, step_threads)
+            self._close_stage(self.content_queue, content_threads)
+        except KeyboardInterrupt:
+            # Let the workers finish the training they are scraping, so that what they scraped is saved
+            logger.warning("Interrupted, stopping the pipeline workers after their current training")
+            self._stop.set()
+            for thread in step_threads + content_threads:
+                thread.join()
+            raise
+
+        if self.progress.is_cancelled():
+            raise StageCancelled()
+        report = {
+            **self.counts,
+            'errors': self.errors,
+            'duration': round(time.monotonic() - self._start_time, 3),
+            'first_item_delays': self.first_item_times,
+            'saved_seconds': self._get_saved_seconds(),
+            'frontier': self.frontier.get_report(),
+        }
+        logger.info(f"Pipeline done: {report}")
+        return report
+
+    def _start_workers(self, stage: str, count: int, target) -> list[threading.Thread]:
+        # Each thread runs in a copy of the context, so that its events are attached to the job of the pipeline
+        threads = [
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._run_worker, target),
+                name=f"pipeline-{stage}-{index + 1}",
+                daemon=True,
+            )
+            for index in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _close_stage(self, work_queue: queue.Queue, threads: list[threading.Thread]) -> None:
+        for _ in threads:
+            self._put(work_queue, _END, force=True)
+        for thread in threads:
+            thread.join()
+
+    def _produce_trainings(self) -> None:
+        with SeleniumScrapper() as scrapper:
+            scrapper.frontier = self.frontier
+            for page, paths, trainings, links in iter_scrapped_path_and_training_objects(scrapper=scrapper):
+                self._check_stopped()
+                # The trainings already listed in the paths of the previous pages are scraped once
+                trainings = merge_shared_trainings(trainings, self.known_training_ids)
+                # A path listed on several pages is linked to its trainings once, a link given twice failing the upsert
+                links = merge_path_training_links(links, self.known_link_ids)
+                # The paths must be saved before their trainings, and the trainings before their steps
+                bulk_create_or_update(model_class=Path, objects=paths)
+                bulk_create_or_update(model_class=Training, objects=trainings)
+                bulk_create_or_update(model_class=PathTraining, objects=links)
+                training_ids = [training.id for training in trainings]
+                due_training_ids = []
+                if training_ids:
+                    due_training_ids = build_refresh_plan(stage='steps', training_ids=training_ids, full=self.full).training_ids
+
+                with self._lock:
+                    self.counts['pages'] += 1
+                    self.counts['paths'] += len(paths)
+                    self.counts['trainings'] += len(trainings)
+                    self.counts['shared_trainings'] += len(links) - len(trainings)
+                    self.counts['scheduled_trainings'] += len(due_training_ids)
+                    scheduled_count = self.counts['scheduled_trainings']
+                # The total grows as the pages are discovered, it is written once the lock of the counters is released
+                self.progress.set_total(scheduled_count)
+                self._mark_first_item('paths')
+                logger.info(f"Page {page}: {len(due_training_ids)}/{len(training_ids)} trainings handed to the step workers")
+
+                for training_id in due_training_ids:
+                    self._put(self.training_queue, training_id)
+
+    def _run_worker(self, target) -> None:
+        try:
+            target()
+        except PipelineStopped:
+            pass
+        except Exception as e:
+            # Stop the whole pipeline rather than letting the other stages wait on a dead worker,
+            # the next run resumes from the checkpoints and the refresh schedule
+            self._fail(f"{threading.current_thread().name} failed: {str(e)}")
+            self._stop.set()
+        finally:
+            # Worker threads have their own database connection, which is not closed by the request cycle
+            connection.close()
+
+    def _run_step_worker(self) -> None:
+        with SeleniumScrapper() as scrapper:
+            scrapper.frontier = self.frontier
+            for training_id in self._iter_queue(self.training_queue):
+                start_time = time.monotonic()
+                steps = get_scrapped_step_objects_for_training_module(scrapper=scrapper, training_id=training_id)
+                if steps and bulk_create_or_update(model_class=Step, objects=steps) is None:
+                    # The training stays due for the next refresh, and its contents wait for its steps to be saved
+                    logger.error(f"Failed to save the steps of training {training_id}")
+                    steps = []
+                if steps:
+                    record_training_checked(training_id=training_id, steps=steps)
+                    self._mark_first_item('steps')
+                with self._lock:
+                    self.counts['steps'] += len(steps)
+                    self.training_durations['steps'] += time.monotonic() - start_time
+                self.progress.advance()
+
+                if steps and self.scrap_contents and build_refresh_plan(stage='contents', training_ids=[training_id]).due:
+                    self._put(self.content_queue, (training_id, steps))
+
+    def _run_content_worker(self) -> None:
+        with SeleniumScrapper(extension_vimeo_video_downloader=True) as scrapper:
+            scrapper.frontier = self.frontier
+            for training_id, steps in self._iter_queue(self.content_queue):
+                start_time = time.monotonic()
+                contents = get_scrapped_content_objects_for_training_module(scrapper=scrapper, training_id=training_id, steps=steps)
+                if contents:
+                    self._mark_first_item('contents')
+                with self._lock:
+                    self.counts['contents'] += len(contents)
+                    self.training_durations['contents'] += time.monotonic() - start_time
+
+    def _iter_queue(self, work_queue: queue.Queue):
+        while True:
+            self._check_stopped()
+            try:
+                item = work_queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            yield item
+
+    def _put(self, work_queue: queue.Queue, item, force: bool = False) -> None:
+        # Waiting in short slices lets a stopped pipeline unblock the stages feeding a full queue
+        while True:
+            if not force:
+                self._check_stopped()
+            try:
+                work_queue.put(item, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                if force and self._stop.is_set():
+                    # Stopped workers no longer drain the queue, they leave on their own
+                    return
+
+    def _check_stopped(self) -> None:
+        if self._stop.is_set():
+            raise PipelineStopped()
+        if self.progress.is_cancelled():
+            self._stop.set()
+            raise PipelineStopped()
+
+    def _fail(self, message: str) -> None:
+        logger.error(message)
+        with self._lock:
+            self.errors.append(message)
+
+    def _get_saved_seconds(self) -> float:
+        # Each shared training would have cost another steps scrape, and another contents scrape when they are scraped
+        scraped_count = self.counts['scheduled_trainings']
+        if not scraped_count:
+            return 0.0
+        seconds_per_training = sum(self.training_durations.values()) / scraped_count
+        return round(self.counts['shared_trainings'] * seconds_per_training, 1)
+
+    def _mark_first_item(self, stage: str) -> None:
+        with self._lock:
+            self.first_item_times.setdefault(stage, round(time.monotonic() - self._start_time, 3))
@@ -0,0 +1,23 @@
+class StageCancelled(Exception):
+    """Raised inside a stage when its cancellation has been requested."""
+
+
+class StageProgress:
+    """
+    Receiver of the progress of a scraping stage.
+    This base implementation ignores the progress and never cancels, it is used when a stage runs standalone.
+    """
+
+    def set_total(self, total: int) -> None:
+        pass
+
+    def advance(self, count: int = 1) -> None:
+        pass
+
+    def is_cancelled(self) -> bool:
+        return False
+
+    def check_cancelled(self) -> None:
+        """Stop the stage by raising StageCancelled if its cancellation has been requested."""
+        if self.is_cancelled():
+            raise StageCancelled()
@@ -0,0 +1,204 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import django
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from platform_new.models.models import Content, Path, PathTraining, Step, Training
+from platform_new.scrapper.records import ContentRecord, PathRecord, PathTrainingRecord, StepRecord, TrainingRecord
+from platform_new.models.step_type import StepType
+from scrappingchef.utils import bulk_create_or_update
+from .archive import PAGE_KIND_PATHS, PAGE_KIND_STEP, PAGE_KIND_TRAINING, SnapshotArchive
+from .content_scrapping import save_content_to_file
+from .logger import get_logger
+from .path_extraction import build_path_from_card
+from .snapshot import SnapshotElement
+from .step_scrapping import SELECTORS, process_module_items
+from .training_extraction import build_trainings_from_card, merge_path_training_links, merge_shared_trainings
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Number of snapshots handed to a worker process at once
+_CHUNK_SIZE = 20
+
+
+def _parse(html: str, url: str = '') -> SnapshotElement:
+    return SnapshotElement(BeautifulSoup(html, 'html.parser'), page_url=url)
+
+
+def extract_paths_page(html: str, url: str = '') -> tuple[list[PathRecord], list[TrainingRecord], list[PathTrainingRecord]]:
+    """
+    Extract the paths and trainings of an archived page of the paths listing, with the extractors of the scraper.
+
+    Args:
+        html: HTML of the page, archived once its cards were open
+        url: URL of the page, against which its links are resolved
+
+    Returns:
+        The Path records, the Training records with the trainings shared by several paths once, and the PathTraining records of the page
+    """
+    paths, trainings, links = [], [], []
+    for card in _parse(html, url).find_elements(By.CSS_SELECTOR, '.training-path-subscription-card'):
+        try:
+            path = build_path_from_card(card=card)
+        except Exception as e:
+            logger.error(f"Failed to extract an archived path card: {str(e)}")
+            continue
+        paths.append(path)
+        card_trainings, card_links = build_trainings_from_card(card=card, path_id=str(path.id))
+        trainings.extend(card_trainings)
+        links.extend(card_links)
+    return paths, merge_shared_trainings(trainings), merge_path_training_links(links)
+
+
+def extract_training_view(html: str, training_id, url: str = '') -> list[StepRecord]:
+    """
+    Extract the steps of an archived training view, with the extractors of the scraper.
+
+    Args:
+        html: HTML of the training view
+        training_id: ID of the training
+        url: URL of the page, against which its links are resolved
+
+    Returns:
+        The Step records of the training
+    """
+    module_items = _parse(html, url).find_elements(By.CSS_SELECTOR, SELECTORS['module_item'])
+    return process_module_items(module_items, training_id)
+
+
+def extract_step_page(html: str, step_id: int, step_type: str, url: str = '', save_file: bool = True) -> ContentRecord | None:
+    """
+    Extract the content of an archived step page. The text of a text step is written again to its content file
+    from the archived page, like the scraper does. The PDF and video files are not downloaded again,
+    the extraction only checks that the page holds the content of its type.
+
+    Args:
+        html: HTML of the step page
+        step_id: ID of the step
+        step_type: Type of the step
+        url: URL of the page, against which its links are resolved
+        save_file: Write the content file of a text step, otherwise only extract its record
+
+    Returns:
+        The Content record of the step, None for the types without content or if the page has none
+    """
+    root = _parse(html, url)
+    if step_type == StepType.TEXT.value:
+        text_elements = root.find_elements(By.CSS_SELECTOR, '#textRender')
+        text_html = text_elements[0].get_attribute('innerHTML') if text_elements else ''
+        if not text_html:
+            return None
+        content = ContentRecord(id=step_id, step_id=step_id, filename=f"content_{step_id}.html", type="text")
+        if save_file:
+            save_content_to_file(content, text_html)
+        return content
+
+    elif step_type == StepType.DOCUMENT.value:
+        pdf_iframes = root.find_elements(By.CSS_SELECTOR, 'iframe.pdfrenderer')
+        if not pdf_iframes or 'file=' not in (pdf_iframes[0].get_attribute('src') or ''):
+            return None
+        return ContentRecord(id=step_id, step_id=step_id, filename=f"content_{step_id}.pdf", type="document")
+
+    elif step_type == StepType.VIDEO.value:
+        if not any('iframe.ly' in (iframe.get_attribute('src') or '') for iframe in root.find_elements(By.TAG_NAME, 'iframe')):
+            return None
+        return ContentRecord(id=step_id, step_id=step_id, filename=f"content_{step_id}.mp4", type="video")
+
+    return None
+
+
+def _extract_entries(archive_directory: str, entries: list[dict], save: bool = True) -> dict:
+    """Extract a chunk of snapshots in a worker process, returning the objects by model and writing the text contents if saving."""
+    archive = SnapshotArchive(archive_directory)
+    objects: dict[str, list] = {'paths': [], 'trainings': [], 'path_trainings': [], 'steps': [], 'contents': [], 'errors': []}
+    for entry in entries:
+        try:
+            html = archive.read(entry)
+            if entry['kind'] == PAGE_KIND_PATHS:
+                paths, trainings, links = extract_paths_page(html, entry.get('url', ''))
+                objects['paths'].extend(paths)
+                objects['trainings'].extend(trainings)
+                objects['path_trainings'].extend(links)
+            elif entry['kind'] == PAGE_KIND_TRAINING:
+                objects['steps'].extend(extract_training_view(html, entry['metadata']['training_id'], entry.get('url', '')))
+            elif entry['kind'] == PAGE_KIND_STEP:
+                content = extract_step_page(html, int(entry['metadata']['step_id']), entry['metadata']['type'], entry.get('url', ''), save_file=save)
+                if content is not None:
+                    objects['contents'].append(content)
+        except Exception as e:
+            objects['errors'].append(f"{entry['file']}: {str(e)}")
+    return objects
+
+
+def _drop_orphans(objects: list, parent_field: str, parent_model, extracted_parents: list) -> list:
+    parent_ids = {str(getattr(obj, parent_field)) for obj in objects}
+    known_parent_ids = {str(parent.id) for parent in extracted_parents}
+    known_parent_ids |= {
+        str(parent_id) for parent_id in parent_model.objects.filter(id__in=parent_ids - known_parent_ids).values_list('id', flat=True)  # type: ignore
+    }
+    kept_objects = [obj for obj in objects if str(getattr(obj, parent_field)) in known_parent_ids]
+    if len(kept_objects) < len(objects):
+        logger.warning(f"Skipping {len(objects) - len(kept_objects)} records whose {parent_model.__name__} is unknown")
+    return kept_objects
+
+
+def _setup_worker() -> None:
+    # Worker processes started with spawn import the models from scratch
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'scrappingchef.settings')
+    django.setup()
+
+
+def reextract_archive(archive: SnapshotArchive, kinds: list[str] | None = None, workers: int | None = None, save: bool = True) -> dict:
+    """
+    Extract the records again from the archived pages, spreading the parsing over several processes.
+    The records are saved parents first, so the paths and trainings of the archive are saved before their steps,
+    and the steps before their contents. The worker processes write the content files of the text steps.
+
+    Args:
+        archive: The archive
+        kinds: Only extract these kinds of pages, all of them if None
+        workers: Number of worker processes, the number of CPUs by default
+        save: Save the extracted records, otherwise only count them
+
+    Returns:
+        Dictionary with the number of records extracted per model, the errors and the duration
+    """
+    start_time = time.monotonic()
+    entries = list(archive.iter_latest_entries(kinds=kinds))
+    chunks = [entries[index:index + _CHUNK_SIZE] for index in range(0, len(entries), _CHUNK_SIZE)]
+    logger.info(f"Extracting {len(entries)} archived pages in {len(chunks)} chunks")
+
+    objects: dict[str, list] = {'paths': [], 'trainings': [], 'path_trainings': [], 'steps': [], 'contents': [], 'errors': []}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_setup_worker) as executor:
+        for chunk_objects in executor.map(_extract_entries, [archive.directory] * len(chunks), chunks, [save] * len(chunks)):
+            for name, values in chunk_objects.items():
+                objects[name].extend(values)
+    for error in objects['errors']:
+        logger.error(f"Failed to extract an archived page: {error}")
+
+    # A page archived several times under different keys, or a training shared by several paths,
+    # yields the same records, keep the latest ones
+    for name in ('paths', 'trainings', 'path_trainings', 'steps', 'contents'):
+        objects[name] = list({obj.id: obj for obj in objects[name]}.values())
+    # The parents of the records must exist, in the database or among the extracted records
+    objects['steps'] = _drop_orphans(objects['steps'], 'training_id', Training, objects['trainings'])
+    objects['contents'] = _drop_orphans(objects['contents'], 'step_id', Step, objects['steps'])
+
+    if save:
+        for model_class, name in (
+            (Path, 'paths'), (Training, 'trainings'), (PathTraining, 'path_trainings'), (Step, 'steps'), (Content, 'contents'),
+        ):
+            if objects[name]:
+                bulk_create_or_update(model_class=model_class, objects=objects[name])
+
+    report = {
+        'pages': len(entries),
+        **{name: len(values) for name, values in objects.items() if name != 'errors'},
+        'errors': objects['errors'],
+        'saved': save,
+        'duration': round(time.monotonic() - start_time, 3),
+    }
+    logger.info(f"Re-extraction done: {report}")
+    return report
@@ -0,0 +1,210 @@
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+from platform_new.models.models import PathTraining, RefreshState, Training
+from .checkpoints import CONTENT_STEP_TYPES
+from .logger import get_logger
+from .records import StepRecord
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Multiplier of the base interval by state of the training: what a learner is working on changes the most often,
+# a completed training with all its steps validated the least often
+STATE_INTERVAL_FACTORS = {
+    'in_progress': 1,
+    'not_started': 2,
+    'completed': 4,
+}
+
+# Reasons for which a training is part of a refresh plan
+REASON_FULL = 'full'
+REASON_NEVER_CHECKED = 'never_checked'
+REASON_TRAINING_CHANGED = 'training_changed'
+REASON_INCOMPLETE = 'incomplete'
+REASON_DUE = 'due'
+
+
+@dataclass
+class RefreshPlan:
+    """Trainings to scrap in a refresh, with the reason of each one, and the number of trainings skipped."""
+    stage: str
+    due: dict[str, str] = field(default_factory=dict)
+    skipped: int = 0
+
+    @property
+    def training_ids(self) -> list:
+        return list(self.due)
+
+
+def _fingerprint(values) -> str:
+    return hashlib.sha1(repr(values).encode('utf-8')).hexdigest()
+
+
+def get_training_fingerprint(training: Training) -> str:
+    """Fingerprint of the fields of a training updated by the paths stage."""
+    return _fingerprint((training.title, training.type, training.progression, training.score))
+
+
+def get_steps_fingerprint(steps: list[StepRecord]) -> str:
+    """Fingerprint of the scraped steps of a training, their order included."""
+    return _fingerprint([
+        (str(step.id), step.title, step.type, bool(step.is_validated), bool(step.is_blocked))
+        for step in steps
+    ])
+
+
+def get_training_state(training: Training, steps: list[StepRecord]) -> str:
+    """
+    Classify a training as 'completed', 'not_started' or 'in_progress' from its progression and its steps.
+
+    Args:
+        training: The training
+        steps: Its steps
+
+    Returns:
+        Key of STATE_INTERVAL_FACTORS
+    """
+    if training.progression >= 1.0 and all(step.is_validated for step in steps):
+        return 'completed'
+    if training.progression <= 0 and not any(step.is_validated for step in steps):
+        return 'not_started'
+    return 'in_progress'
+
+
+def get_refresh_interval(state: str, unchanged_count: int) -> timedelta:
+    """
+    Time to wait before checking a training again, doubled by each check which found no change.
+
+    Args:
+        state: State of the training, key of STATE_INTERVAL_FACTORS
+        unchanged_count: Number of consecutive checks without change
+
+    Returns:
+        The interval, capped by REFRESH_MAX_INTERVAL_DAYS
+    """
+    base_interval = timedelta(hours=settings.REFRESH_BASE_INTERVAL_HOURS) * STATE_INTERVAL_FACTORS[state]
+    max_interval = timedelta(days=settings.REFRESH_MAX_INTERVAL_DAYS)
+    # The exponent is bounded so that the multiplication never overflows timedelta
+    return min(base_interval * 2 ** min(unchanged_count, 16), max_interval)
+
+
+def record_training_checked(training_id, steps: list[StepRecord], now: datetime | None = None) -> RefreshState | None:
+    """
+    Record that the steps of a training have been scraped, and schedule its next check.
+
+    Args:
+        training_id: ID of the training
+        steps: The scraped steps of the training
+        now: Time of the check, defaults to now
+
+    Returns:
+        The updated RefreshState, None if the training is not in the database
+    """
+    now = now or timezone.now()
+    training = Training.objects.filter(id=training_id).first()  # type: ignore
+    if training is None:
+        logger.warning(f"Cannot record the refresh of unknown training {training_id}")
+        return None
+
+    state, _ = RefreshState.objects.get_or_create(id=str(training.id), defaults={'training': training})  # type: ignore
+    training_fingerprint = get_training_fingerprint(training)
+    steps_fingerprint = get_steps_fingerprint(steps)
+    is_changed = (state.training_fingerprint, state.steps_fingerprint) != (training_fingerprint, steps_fingerprint)
+
+    state.unchanged_count = 0 if is_changed else state.unchanged_count + 1
+    if is_changed:
+        state.last_changed_time = now
+    state.training_fingerprint = training_fingerprint
+    state.steps_fingerprint = steps_fingerprint
+    state.last_checked_time = now
+    state.next_check_time = now + get_refresh_interval(get_training_state(training, steps), state.unchanged_count)
+    state.save()
+    logger.info(
+        f"Training {training.id} {'changed' if is_changed else 'unchanged'}, "
+        f"next check at {state.next_check_time.isoformat()}"
+    )
+    return state
+
+
+def build_refresh_plan(
+    stage: str,
+    training_ids: list | None = None,
+    path_ids: list | None = None,
+    full: bool = False,
+    now: datetime | None = None,
+) -> RefreshPlan:
+    """
+    Select the trainings likely to have changed since they were last scraped.
+    For the steps stage, a training is due when it was never checked, when the paths stage saw its progression
+    or score change, or when its back-off interval elapsed.
+    For the contents stage, a training is due when a content run of it was interrupted (its journal holds checkpoints)
+    or when some of its steps holding a content have no saved content yet.
+
+    Args:
+        stage: 'steps' or 'contents'
+        training_ids: Only consider these trainings
+        path_ids: Only consider the trainings of these paths
+        full: Select every training, ignoring the schedule
+        now: Time of the plan, defaults to now
+
+    Returns:
+        The RefreshPlan
+    """
+    now = now or timezone.now()
+    plan = RefreshPlan(stage=stage)
+
+    trainings = Training.objects.select_related('refresh_state')  # type: ignore
+    if training_ids:
+        trainings = trainings.filter(id__in=training_ids)
+    if path_ids:
+        trainings = trainings.filter(id__in=PathTraining.objects.filter(path_id__in=path_ids).values('training_id'))  # type: ignore
+    if stage == 'contents':
+        trainings = trainings.annotate(
+            steps_count=Count('steps', distinct=True),
+            checkpoints_count=Count('steps__checkpoint', distinct=True),
+            content_steps_count=Count('steps', filter=Q(steps__type__in=CONTENT_STEP_TYPES), distinct=True),
+            saved_content_steps_count=Count(
+                'steps__contents__step',
+                filter=Q(steps__type__in=CONTENT_STEP_TYPES),
+                distinct=True,
+            ),
+        )
+
+    for training in trainings.order_by('id'):
+        reason = _get_refresh_reason(stage, training, full, now)
+        if reason is None:
+            plan.skipped += 1
+        else:
+            plan.due[training.id] = reason
+
+    logger.info(f"Refresh plan for the {stage} stage: {len(plan.due)} trainings due, {plan.skipped} skipped")
+    return plan
+
+
+def _get_refresh_reason(stage: str, training: Training, full: bool, now: datetime) -> str | None:
+    if full:
+        return REASON_FULL
+
+    if stage == 'contents':
+        # A complete run clears its checkpoints, so a training with checkpoints has a run to resume,
+        # and one without a content for each of its content steps has contents left to scrape
+        is_incomplete = (
+            training.steps_count == 0
+            or training.checkpoints_count > 0
+            or training.saved_content_steps_count < training.content_steps_count
+        )
+        return REASON_INCOMPLETE if is_incomplete else None
+
+    try:
+        state = training.refresh_state
+    except RefreshState.DoesNotExist:  # type: ignore
+        return REASON_NEVER_CHECKED
+    if state.training_fingerprint != get_training_fingerprint(training):
+        return REASON_TRAINING_CHANGED
+    if state.next_check_time is None or state.next_check_time <= now:
+        return REASON_DUE
+    return None
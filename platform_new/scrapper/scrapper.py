@@ -1,12 +1,11 @@
 import os
 import time
-from selenium import webdriver
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from dotenv import load_dotenv
 
+from .drivers import DriverFactory, get_driver_factory
 from .logger import get_logger
+from .network_capture import NetworkCapture
 
 # Create logger for this module
 logger = get_logger(__name__)
@@ -16,6 +15,9 @@ load_dotenv()
 class SeleniumScrapper(): 
 
     driver = None
+    network_capture = None
+    # Frontier of the URLs of the run the scrapper takes part in, shared with the other scrappers of the run
+    frontier = None
     cookies = None
     internal_path_downloaded_contents=f"{os.environ['PATH_DOWNLOADED_CONTENTS']}/platform_new/"
     save_courses=True
@@ -26,9 +28,20 @@ class SeleniumScrapper():
     audio_download_code='Audio'
 
 
-    def __init__(self, extension_vimeo_video_downloader=False):
+    def __init__(
+        self,
+        extension_vimeo_video_downloader=False,
+        driver_factory: DriverFactory | None = None,
+        capture_network: bool | None = None,
+    ):
         # Set the options for the Chrome browser, useful to customize the scrapping behaviour
         options = Options()
+        # Record the network activity in the performance log, to extract the data from the JSON responses
+        # behind the pages instead of the DOM, enabled by SCRAPPER_NETWORK_CAPTURE=1 by default
+        if capture_network is None:
+            capture_network = os.getenv('SCRAPPER_NETWORK_CAPTURE', '') == '1'
+        if capture_network:
+            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
         # Run in headless mode, useful to avoid opening a browser window
         # Add the extension to download Vimeo videos if necessary
         if extension_vimeo_video_downloader:
@@ -42,20 +55,23 @@ class SeleniumScrapper():
             options.add_argument('--disable-gpu')
             options.add_argument('--disable-software-rasterizer')
 
-        # Set up the driver with options and the link to the ChromeDriverManager
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(
-            service=service,
-            options=options
-        )
+        # Start the browser locally or on a remote WebDriver endpoint, depending on SELENIUM_REMOTE_URLS
+        self.driver_factory = driver_factory or get_driver_factory()
+        self.driver = self.driver_factory.create(options)
+        self.network_capture = NetworkCapture(self.driver) if capture_network else None
 
         # Switch to the first window instead of the vimdeo extension window if the extension has been added
         if extension_vimeo_video_downloader:
             time.sleep(5)
             self.driver.switch_to.window(self.driver.window_handles[0])
 
-        self.logging()
-        self.get_cookies()
+        try:
+            self.logging()
+            self.get_cookies()
+        except Exception:
+            # Quit the browser, otherwise its session would hold the capacity of the endpoint
+            self.__exit__(None, None, None)
+            raise
 
 
     def logging(self):
@@ -102,4 +118,7 @@ class SeleniumScrapper():
             try:
                 self.driver.quit()
             except Exception as e:
-                logger.error(f"Error closing scrapper: {str(e)}")
\ No newline at end of file
+                logger.error(f"Error closing scrapper: {str(e)}")
+            finally:
+                # Free the capacity of the endpoint even if the session could not be quit cleanly
+                self.driver_factory.release(self.driver)
\ No newline at end of file
@@ -0,0 +1,143 @@
+import os
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from bs4.element import NavigableString, Tag
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Extraction backends: 'dom' reads every field from the live page, 'snapshot' from one copy of its HTML
+EXTRACTION_BACKENDS = ('dom', 'snapshot')
+
+# Elements whose text is never rendered, so never part of the text given by Selenium
+NON_RENDERED_TAGS = {'head', 'script', 'style', 'noscript', 'template'}
+# Elements rendered on lines of their own, whose text Selenium separates from the text around them
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'tr', 'ul',
+}
+# Attributes holding a URL, which Selenium returns resolved against the URL of the page like the DOM properties
+URL_ATTRIBUTES = {'href', 'src', 'action'}
+
+
+class SnapshotElement:
+    """
+    Element of a page snapshot, answering the WebElement calls made by the extractors:
+    find_element, find_elements, text and get_attribute. The lookups run on a copy of the page HTML
+    with soupsieve instead of going through the driver, so they cost no round trip and never get stale.
+    The text leaves out the elements hidden by their markup (hidden attribute, inline display or visibility style,
+    scripts), but not the ones hidden by a stylesheet rule, which only the browser knows about.
+    """
+
+    def __init__(self, tag: Tag, page_url: str = ''):
+        self.tag = tag
+        self.page_url = page_url
+
+    def find_element(self, by: str = By.CSS_SELECTOR, value: str = '') -> 'SnapshotElement':
+        element = self.tag.select_one(_to_css_selector(by, value))
+        if element is None:
+            raise NoSuchElementException(f"No element matching {by}={value} in the snapshot")
+        return SnapshotElement(element, page_url=self.page_url)
+
+    def find_elements(self, by: str = By.CSS_SELECTOR, value: str = '') -> list['SnapshotElement']:
+        return [SnapshotElement(element, page_url=self.page_url) for element in self.tag.select(_to_css_selector(by, value))]
+
+    @property
+    def text(self) -> str:
+        # Like the rendered text, without the indentation of the HTML source
+        if _is_hidden(self.tag):
+            return ''
+        lines = (' '.join(line.split()) for line in ''.join(_iter_rendered_strings(self.tag)).splitlines())
+        return '\n'.join(line for line in lines if line)
+
+    def get_attribute(self, name: str) -> str | None:
+        # Like the DOM property, the markup of the children of the element
+        if name == 'innerHTML':
+            return self.tag.decode_contents()
+        value = self.tag.get(name)
+        # Multi-valued attributes such as class are lists in BeautifulSoup and strings in Selenium
+        if isinstance(value, list):
+            return ' '.join(value)
+        if name in URL_ATTRIBUTES and value is not None and self.page_url:
+            return urljoin(self.page_url, value.strip())
+        return value
+
+
+def _is_hidden(tag: Tag) -> bool:
+    """Whether the markup of an element keeps it from being rendered."""
+    if tag.name in NON_RENDERED_TAGS or tag.has_attr('hidden'):
+        return True
+    if tag.name == 'input' and str(tag.get('type', '')).lower() == 'hidden':
+        return True
+    style = str(tag.get('style', '')).replace(' ', '').lower()
+    return 'display:none' in style or 'visibility:hidden' in style
+
+
+def _iter_rendered_strings(tag: Tag):
+    """Walk the text of the rendered descendants of an element, with a line break around the blocks."""
+    for child in tag.children:
+        if isinstance(child, Tag):
+            if _is_hidden(child):
+                continue
+            if child.name == 'br':
+                yield '\n'
+            elif child.name in BLOCK_TAGS:
+                yield '\n'
+                yield from _iter_rendered_strings(child)
+                yield '\n'
+            else:
+                yield from _iter_rendered_strings(child)
+        # Comments, doctypes and the contents of scripts and styles are subclasses of NavigableString
+        elif type(child) is NavigableString:
+            yield str(child)
+
+
+def _to_css_selector(by: str, value: str) -> str:
+    if by == By.CSS_SELECTOR:
+        return value
+    if by == By.CLASS_NAME:
+        return f".{value}"
+    if by == By.ID:
+        return f"#{value}"
+    if by == By.TAG_NAME:
+        return value
+    raise ValueError(f"Locator strategy '{by}' is not supported on a snapshot")
+
+
+def take_page_snapshot(driver) -> SnapshotElement:
+    """
+    Copy the HTML of the current page, in a single round trip to the browser, with its URL to resolve the links.
+
+    Args:
+        driver: WebDriver showing the page
+
+    Returns:
+        The root element of the snapshot
+    """
+    return SnapshotElement(BeautifulSoup(driver.page_source, 'html.parser'), page_url=driver.current_url)
+
+
+def get_extraction_backend(extractor: str) -> str:
+    """
+    Backend of an extractor, set in SCRAPPER_EXTRACTION_BACKENDS as a comma-separated list of
+    extractor=backend, e.g. "paths=snapshot,steps=snapshot". Extractors not listed use the DOM.
+
+    Args:
+        extractor: 'paths', 'trainings' or 'steps'
+
+    Returns:
+        One of EXTRACTION_BACKENDS
+    """
+    for entry in os.getenv('SCRAPPER_EXTRACTION_BACKENDS', '').split(','):
+        name, _, backend = entry.strip().partition('=')
+        if name.strip() != extractor:
+            continue
+        backend = backend.strip()
+        if backend in EXTRACTION_BACKENDS:
+            return backend
+        logger.warning(f"Unknown extraction backend '{backend}' for {extractor}, using the DOM")
+    return 'dom'
@@ -0,0 +1,521 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from django.db import connection
+from django.db.models import Count, Max, Q
+from platform_new.models.models import Path, PathTraining, Step, Training
+from platform_new.scrapper.frontier import PRIORITY_TRAINING, CrawlFrontier
+from platform_new.scrapper.content_scrapping import get_scrapped_content_objects_for_training_module
+from platform_new.scrapper.path_training_scrapping import get_scrapped_path_and_training_objects
+from platform_new.scrapper.pipeline import ScrapePipeline
+from platform_new.scrapper.scheduler import build_refresh_plan, record_training_checked
+from platform_new.scrapper.scrapper import SeleniumScrapper
+from platform_new.scrapper.step_scrapping import get_scrapped_step_objects_for_training_module, get_training_url
+from platform_new.scrapper.tabs import TabScheduler, get_browser_rss_bytes
+from platform_new.scrapper.write_behind import WriteBehindBuffer
+from scrappingchef.utils import bulk_create_or_update
+from .logger import get_logger
+from .progress import StageCancelled, StageProgress
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Number of steps expected of a training never scraped, to size the frontier of a run
+STEPS_PER_TRAINING_ESTIMATE = 20
+
+# Keys of the stage results which are not counts: the peaks of a browser, and the rates of the run
+PEAK_RESULT_KEYS = {'peak_browser_rss_mb'}
+RATE_RESULT_KEYS = {'trainings_per_minute', 'trainings_per_minute_per_gb', 'saved_seconds'}
+
+
+def scrap_paths_and_trainings_stage(progress: StageProgress | None = None) -> dict:
+    """
+    Scrap all available paths and trainings, create or update them in the database.
+
+    Args:
+        progress: Receiver of the progress of the stage
+
+    Returns:
+        Dictionary with the number of paths, trainings and links between them saved,
+        and the number of trainings listed in more than one path which are saved once
+    """
+    progress = progress or StageProgress()
+    progress.set_total(1)
+    with SeleniumScrapper() as scrapper:
+        scrapped_path_objects, scrapped_training_objects, scrapped_link_objects = get_scrapped_path_and_training_objects(scrapper=scrapper)
+        progress.check_cancelled()
+        bulk_create_or_update(model_class=Path, objects=scrapped_path_objects)
+        bulk_create_or_update(model_class=Training, objects=scrapped_training_objects)
+        bulk_create_or_update(model_class=PathTraining, objects=scrapped_link_objects)
+    progress.advance()
+    return {
+        'paths': len(scrapped_path_objects),
+        'trainings': len(scrapped_training_objects),
+        'path_trainings': len(scrapped_link_objects),
+        'shared_trainings': len(scrapped_link_objects) - len(scrapped_training_objects),
+    }
+
+
+def scrap_steps_stage(
+    training_ids: list | None = None,
+    full: bool = False,
+    tabs: int = 1,
+    progress: StageProgress | None = None,
+    frontier: CrawlFrontier | None = None,
+) -> dict:
+    """
+    Scrap the steps of trainings, the steps being written to the database while the next trainings are scraped.
+    Each scraped training is recorded in the refresh schedule, which backs off the trainings that don't change.
+    With several tabs, the next trainings load in background tabs while the current one is parsed.
+
+    Args:
+        training_ids: IDs of the trainings to scrap, queued in the frontier, the trainings due in the refresh schedule if None
+        full: With training_ids None, scrap all the trainings of the database instead of the due ones
+        tabs: Number of tabs of the browser, 1 to load the trainings one after the other
+        progress: Receiver of the progress of the stage, advanced once per training
+        frontier: Frontier of the run, whose queued trainings are pulled until none is left, a new one if None
+
+    Returns:
+        Dictionary with the number of trainings processed, of steps saved or failed, the throughput
+        and the peak memory of the browser, to compare the number of tabs, and the time saved on the shared trainings
+    """
+    progress = progress or StageProgress()
+    if training_ids is None:
+        training_ids = build_refresh_plan(stage='steps', full=full).training_ids
+    if frontier is None:
+        frontier = create_frontier(training_ids)
+    queue_trainings(frontier, training_ids)
+    progress.set_total(len(training_ids))
+
+    start_time = time.monotonic()
+    peak_rss_bytes = None
+    scrapped_training_ids = []
+    training_checks = PendingTrainingChecks()
+    with SeleniumScrapper() as scrapper, WriteBehindBuffer(model_class=Step, on_flush=training_checks.on_flush) as step_buffer:
+        scrapper.frontier = frontier
+        tab_scheduler = TabScheduler(scrapper=scrapper, tabs=tabs) if tabs > 1 else None
+        # Trainings pulled from the frontier, the first one being scraped while the next ones load in the background tabs
+        pulled_training_ids: list = []
+        try:
+            while True:
+                progress.check_cancelled()
+                pulled_training_ids.extend(pull_trainings(frontier, max(1, tabs) - len(pulled_training_ids)))
+                if not pulled_training_ids:
+                    break
+                training_id = pulled_training_ids.pop(0)
+                if tab_scheduler is not None:
+                    # The next trainings go to the tabs left free once the current training is opened
+                    tab_scheduler.prefetch_after_open([get_training_url(next_training_id) for next_training_id in pulled_training_ids])
+                steps = get_scrapped_step_objects_for_training_module(
+                    scrapper=scrapper,
+                    training_id=training_id,
+                    tab_scheduler=tab_scheduler,
+                )
+                # A training without steps is a failed scrape, it stays due for the next refresh
+                if steps:
+                    training_checks.add(training_id, steps)
+                step_buffer.put_many(steps)
+                scrapped_training_ids.append(training_id)
+                rss_bytes = get_browser_rss_bytes(scrapper)
+                if rss_bytes is not None:
+                    peak_rss_bytes = max(peak_rss_bytes or 0, rss_bytes)
+                progress.advance()
+        finally:
+            if tab_scheduler is not None:
+                tab_scheduler.close()
+
+    duration = time.monotonic() - start_time
+    return {
+        'trainings': len(scrapped_training_ids),
+        'steps': step_buffer.written_count,
+        'failed_steps': step_buffer.failed_count,
+        **get_throughput_report(len(scrapped_training_ids), duration, peak_rss_bytes),
+        **get_shared_trainings_report(scrapped_training_ids, duration),
+    }
+
+
+class PendingTrainingChecks:
+    """
+    Trainings whose steps wait in a write-behind buffer, recorded in the refresh schedule once all their steps are written.
+    A training with steps in a failed batch is not recorded, it stays due for the next refresh.
+    """
+
+    def __init__(self):
+        self._pending: dict = {}
+        self._lock = threading.Lock()
+
+    def add(self, training_id, steps: list) -> None:
+        """Wait for the steps of a training, before they are put in the buffer."""
+        with self._lock:
+            self._pending[training_id] = {'steps': steps, 'remaining': len(steps), 'failed': False}
+
+    def on_flush(self, steps: list, succeeded: bool) -> None:
+        """Count a flushed batch of the buffer, recording the trainings whose steps are now all written."""
+        completed_trainings = []
+        with self._lock:
+            for step in steps:
+                pending = self._pending.get(step.training_id)
+                if pending is None:
+                    continue
+                pending['remaining'] -= 1
+                pending['failed'] = pending['failed'] or not succeeded
+                if pending['remaining'] == 0:
+                    del self._pending[step.training_id]
+                    if pending['failed']:
+                        logger.warning(f"Steps of training {step.training_id} not saved, it stays due for the next refresh")
+                    else:
+                        completed_trainings.append((step.training_id, pending['steps']))
+        for training_id, training_steps in completed_trainings:
+            try:
+                record_training_checked(training_id=training_id, steps=training_steps)
+            except Exception as e:
+                logger.error(f"Failed to record the check of training {training_id}: {str(e)}")
+
+
+def create_frontier(training_ids: list) -> CrawlFrontier:
+    """
+    Create the frontier of a run, its visited index sized for the views of the trainings and the pages of their steps,
+    each step page being claimed in the frontier too. The steps are counted from the previous runs, and estimated
+    to STEPS_PER_TRAINING_ESTIMATE for the trainings never scraped.
+
+    Args:
+        training_ids: IDs of the trainings of the run
+
+    Returns:
+        The frontier
+    """
+    step_counts = Step.objects.filter(training_id__in=training_ids).values('training_id').annotate(count=Count('id'))  # type: ignore
+    known_step_count, known_training_count = 0, 0
+    for step_count in step_counts:
+        known_step_count += step_count['count']
+        known_training_count += 1
+    expected_step_count = known_step_count + (len(training_ids) - known_training_count) * STEPS_PER_TRAINING_ESTIMATE
+    return CrawlFrontier(expected_urls=len(training_ids) + expected_step_count)
+
+
+def queue_trainings(frontier: CrawlFrontier, training_ids: list) -> None:
+    """Queue the views of trainings in a frontier, in their order."""
+    for training_id in training_ids:
+        frontier.add(get_training_url(training_id), priority=PRIORITY_TRAINING, payload=training_id)
+
+
+def pull_trainings(frontier: CrawlFrontier, count: int = 1) -> list:
+    """Take at most count trainings from a frontier, fewer if it runs out."""
+    training_ids = []
+    while len(training_ids) < count:
+        item = frontier.pop()
+        if item is None:
+            break
+        training_ids.append(item[1])
+    return training_ids
+
+
+def get_throughput_report(trainings_count: int, duration: float, peak_rss_bytes: int | None) -> dict:
+    """
+    Throughput of a browser, overall and per GB of browser memory.
+
+    Args:
+        trainings_count: Number of trainings scraped
+        duration: Duration of the scraping in seconds
+        peak_rss_bytes: Peak resident memory of the browser, None if unknown
+
+    Returns:
+        Dictionary with the trainings per minute, the peak memory in MB and the trainings per minute per GB
+    """
+    trainings_per_minute = 60 * trainings_count / duration if duration > 0 else 0.0
+    report = {'trainings_per_minute': round(trainings_per_minute, 2)}
+    if peak_rss_bytes:
+        report['peak_browser_rss_mb'] = round(peak_rss_bytes / 2 ** 20, 1)
+        report['trainings_per_minute_per_gb'] = round(trainings_per_minute / (peak_rss_bytes / 2 ** 30), 2)
+    return report
+
+
+def get_shared_trainings_report(training_ids: list, duration: float) -> dict:
+    """
+    Scrape time saved by scraping the trainings shared by several paths once,
+    estimated from the average time per training of the run.
+
+    Args:
+        training_ids: IDs of the trainings scraped
+        duration: Duration of the scraping in seconds
+
+    Returns:
+        Dictionary with the number of path memberships scraped only once and the estimated seconds saved
+    """
+    if not training_ids:
+        return {'shared_trainings': 0, 'saved_seconds': 0.0}
+    memberships_count = PathTraining.objects.filter(training_id__in=training_ids).count()  # type: ignore
+    shared_count = max(0, memberships_count - len(training_ids))
+    return {'shared_trainings': shared_count, 'saved_seconds': round(shared_count * duration / len(training_ids), 1)}
+
+
+def merge_worker_results(results: list[dict], duration: float) -> dict:
+    """
+    Merge the results of the workers of a stage run in parallel. The counts are summed and the peaks are the highest
+    of the workers, while the rates are computed again from the summed counts over the wall-clock duration of the run,
+    the browsers of the workers running at the same time.
+
+    Args:
+        results: Results of the stage function of each worker, empty for the stopped workers
+        duration: Duration of the run in seconds
+
+    Returns:
+        Dictionary with the merged result
+    """
+    total_result: dict = {}
+    for result in results:
+        for key, value in result.items():
+            if key in PEAK_RESULT_KEYS:
+                total_result[key] = max(total_result.get(key, 0), value)
+            elif key not in RATE_RESULT_KEYS:
+                total_result[key] = total_result.get(key, 0) + value
+
+    trainings_count = total_result.get('trainings', 0)
+    if any('trainings_per_minute' in result for result in results):
+        total_result.update(get_throughput_report(trainings_count, duration, peak_rss_bytes=None))
+        # Per GB of the memory of all the browsers, each at its peak
+        browsers_rss_mb = sum(result.get('peak_browser_rss_mb', 0) for result in results)
+        if browsers_rss_mb:
+            total_result['trainings_per_minute_per_gb'] = round(total_result['trainings_per_minute'] / (browsers_rss_mb / 2 ** 10), 2)
+    if any('saved_seconds' in result for result in results):
+        shared_count = total_result.get('shared_trainings', 0)
+        total_result['saved_seconds'] = round(shared_count * duration / trainings_count, 1) if trainings_count else 0.0
+    return total_result
+
+
+def scrap_contents_stage(
+    training_ids: list | None = None,
+    resume: bool = True,
+    full: bool = False,
+    overlap_unblocking: bool = False,
+    progress: StageProgress | None = None,
+    frontier: CrawlFrontier | None = None,
+) -> dict:
+    """
+    Scrap the contents of trainings, each content being saved as soon as it is scraped.
+
+    Args:
+        training_ids: IDs of the trainings to scrap, queued in the frontier, the trainings with steps left to scrap if None
+        resume: Skip the steps completed by previous runs
+        full: With training_ids None, scrap all the trainings of the database
+        overlap_unblocking: Unblock the steps while scraping their contents rather than before
+        progress: Receiver of the progress of the stage, advanced once per training
+        frontier: Frontier of the run, whose queued trainings are pulled until none is left, a new one if None
+
+    Returns:
+        Dictionary with the number of trainings processed, of contents saved and the time saved on the shared trainings
+    """
+    progress = progress or StageProgress()
+    if training_ids is None:
+        training_ids = build_refresh_plan(stage='contents', full=full).training_ids
+    if frontier is None:
+        frontier = create_frontier(training_ids)
+    queue_trainings(frontier, training_ids)
+    progress.set_total(len(training_ids))
+
+    start_time = time.monotonic()
+    contents_count = 0
+    scrapped_training_ids = []
+    with SeleniumScrapper(extension_vimeo_video_downloader=True) as scrapper:
+        scrapper.frontier = frontier
+        while True:
+            progress.check_cancelled()
+            pulled_training_ids = pull_trainings(frontier)
+            if not pulled_training_ids:
+                break
+            training_id = pulled_training_ids[0]
+            contents = get_scrapped_content_objects_for_training_module(
+                scrapper=scrapper,
+                training_id=training_id,
+                resume=resume,
+                overlap_unblocking=overlap_unblocking,
+            )
+            contents_count += len(contents)
+            scrapped_training_ids.append(training_id)
+            progress.advance()
+
+    return {
+        'trainings': len(scrapped_training_ids),
+        'contents': contents_count,
+        **get_shared_trainings_report(scrapped_training_ids, time.monotonic() - start_time),
+    }
+
+
+def scrap_pipeline_stage(
+    step_workers: int = 2,
+    content_workers: int = 1,
+    scrap_contents: bool = True,
+    full: bool = False,
+    progress: StageProgress | None = None,
+) -> dict:
+    """
+    Scrap the paths, steps and contents at once, the trainings of each page flowing to the next stages right away.
+
+    Args:
+        step_workers: Number of browsers scraping the steps
+        content_workers: Number of browsers scraping the contents
+        scrap_contents: Also scrap the contents of the trainings
+        full: Scrap the steps of every training instead of the ones due in the refresh schedule
+        progress: Receiver of the progress of the stage, advanced once per training whose steps are scraped
+
+    Returns:
+        Dictionary with the number of objects saved per type, the errors and the timings of the pipeline
+    """
+    pipeline = ScrapePipeline(
+        step_workers=step_workers,
+        content_workers=content_workers,
+        scrap_contents=scrap_contents,
+        full=full,
+        progress=progress,
+    )
+    return pipeline.run()
+
+
+# Stages which can be executed as jobs, by name
+STAGES = {
+    'paths': scrap_paths_and_trainings_stage,
+    'steps': scrap_steps_stage,
+    'contents': scrap_contents_stage,
+    'pipeline': scrap_pipeline_stage,
+}
+
+
+def select_training_ids(
+    stage: str,
+    training_ids: list | None = None,
+    path_ids: list | None = None,
+    not_scrapped_since: datetime | None = None,
+) -> list:
+    """
+    Select the trainings a steps or contents stage should scrap.
+
+    Args:
+        stage: 'steps' or 'contents', which decides what "scrapped" means for the staleness filter
+        training_ids: Only keep these trainings
+        path_ids: Only keep the trainings of these paths
+        not_scrapped_since: Only keep the trainings whose steps (or contents) were not saved after this time
+
+    Returns:
+        IDs of the selected trainings, ordered by id
+    """
+    trainings = Training.objects.all()  # type: ignore
+    if training_ids:
+        trainings = trainings.filter(id__in=training_ids)
+    if path_ids:
+        trainings = trainings.filter(id__in=PathTraining.objects.filter(path_id__in=path_ids).values('training_id'))  # type: ignore
+    if not_scrapped_since is not None:
+        last_scrapped_field = 'steps__updated_time' if stage == 'steps' else 'steps__contents__updated_time'
+        trainings = trainings.annotate(last_scrapped_time=Max(last_scrapped_field)).filter(
+            Q(last_scrapped_time__isnull=True) | Q(last_scrapped_time__lt=not_scrapped_since)
+        )
+    return list(trainings.order_by('id').values_list('id', flat=True))
+
+
+class SharedStageProgress(StageProgress):
+    """
+    Progress shared by the workers of a stage, cancelled for all of them at once with cancel().
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def set_total(self, total: int) -> None:
+        # Every worker announces its own share of the work
+        with self._lock:
+            self.total += total
+
+    def advance(self, count: int = 1) -> None:
+        with self._lock:
+            self.processed += count
+            processed, total = self.processed, self.total
+        logger.info(f"Progress: {processed}/{total}")
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+
+def run_stage_in_workers(
+    stage: str,
+    training_ids: list,
+    workers: int = 1,
+    progress: SharedStageProgress | None = None,
+    **parameters,
+) -> dict:
+    """
+    Run a steps or contents stage on several workers, each with its own browser.
+    The trainings are queued in a frontier shared by the workers, each worker pulling the next training once done
+    with the previous one, so that a worker slowed down by long trainings doesn't hold back the others.
+
+    Args:
+        stage: 'steps' or 'contents'
+        training_ids: IDs of the trainings to scrap
+        workers: Number of workers running in parallel
+        progress: Progress shared by the workers
+        **parameters: Other keyword arguments of the stage function
+
+    Returns:
+        Dictionary with the results of the workers merged, the duration and result of each worker,
+        the errors of the failed workers and the report of the frontier.
+        Workers stopped by a cancellation or by an error report an empty result.
+    """
+    progress = progress or SharedStageProgress()
+    stage_function = STAGES[stage]
+    frontier = create_frontier(training_ids)
+    queue_trainings(frontier, training_ids)
+    progress.set_total(len(training_ids))
+
+    def run_worker() -> dict:
+        start_time = time.monotonic()
+        is_cancelled = False
+        try:
+            # The trainings are already queued in the shared frontier
+            result = stage_function(training_ids=[], progress=progress, frontier=frontier, **parameters)
+        except StageCancelled:
+            result, is_cancelled = {}, True
+        finally:
+            # Worker threads have their own database connection, which is not closed by the request cycle
+            connection.close()
+        return {
+            'trainings': result.get('trainings', 0),
+            'duration': round(time.monotonic() - start_time, 3),
+            'cancelled': is_cancelled,
+            'result': result,
+        }
+
+    workers = max(1, min(workers, len(training_ids)))
+    start_time = time.monotonic()
+    worker_reports, errors = [], []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'scrape-{stage}') as executor:
+        # Each worker runs in a copy of the context, so that its events are attached to the job of the stage
+        futures = [executor.submit(contextvars.copy_context().run, run_worker) for _ in range(workers)]
+        try:
+            for index, future in enumerate(futures):
+                try:
+                    worker_reports.append(future.result())
+                except Exception as e:
+                    # The trainings left in the frontier are pulled by the other workers
+                    logger.error(f"Worker {index + 1} of the {stage} stage failed: {str(e)}")
+                    errors.append(f"Worker {index + 1} failed: {str(e)}")
+                    worker_reports.append({
+                        'trainings': 0,
+                        'duration': round(time.monotonic() - start_time, 3),
+                        'cancelled': False,
+                        'error': str(e),
+                        'result': {},
+                    })
+        except KeyboardInterrupt:
+            # Let the workers finish the training they are scraping, so that what they scraped is saved
+            logger.warning("Interrupted, stopping the workers after their current training")
+            progress.cancel()
+            raise
+
+    total_result = merge_worker_results([report['result'] for report in worker_reports], time.monotonic() - start_time)
+    return {'result': total_result, 'worker_reports': worker_reports, 'errors': errors, 'frontier': frontier.get_report()}
@@ -3,7 +3,13 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from platform_new.scrapper.scrapper import SeleniumScrapper
-from platform_new.models.models import Step, Training
+from platform_new.scrapper.records import StepRecord
+from platform_new.scrapper.tabs import TabScheduler
+from .network_capture import STEPS_RESPONSE_URL_PATTERN, build_steps_from_responses
+from .snapshot import get_extraction_backend, take_page_snapshot
+from .archive import PAGE_KIND_TRAINING, archive_page
+from .events import publish
+from .frontier import PRIORITY_TRAINING, load_url
 from .logger import get_logger
 
 # Create logger for this module
@@ -18,53 +24,86 @@ SELECTORS = {
 } 
 
 
-def get_scrapped_step_objects_for_training_module(scrapper: SeleniumScrapper, training_id: int) -> list[Step]:
+def get_training_url(training_id) -> str:
+    """URL of the view of a training, listing its steps."""
+    return os.environ['URL_NEW_PLATFORM_TRAINING'] + f"/view/{training_id}/"
+
+
+def get_step_url(training_id, step_id) -> str:
+    """URL of the page of a step, the href of its item in the view of the training."""
+    return os.environ['URL_NEW_PLATFORM_TRAINING'] + f"/view/{training_id}/step/{step_id}"
+
+
+def get_scrapped_step_objects_for_training_module(
+    scrapper: SeleniumScrapper,
+    training_id: int,
+    tab_scheduler: TabScheduler | None = None,
+) -> list[StepRecord]:
     """
     Scrapes step objects from the training modules.
 
     Args:
         scrapper (SeleniumScrapper): Instance of SeleniumScrapper to interact with the webpage
         training_id (int): ID of the training to scrape steps from
+        tab_scheduler (TabScheduler | None): Tabs of the browser, to use the tab which prefetched the training if any
 
     Returns:
-        list[Step]: List of Step objects containing the scraped data
+        list[StepRecord]: List of Step records containing the scraped data
 
     Raises:
         WebDriverException: If there are issues accessing the webpage
         NoSuchElementException: If required elements are not found
         StaleElementReferenceException: If elements become stale
     """
+    publish('training_started', stage='steps', training_id=training_id)
     # Replace the navigation code with the new function call
-    if not navigate_to_training_page(scrapper, training_id):
+    if not navigate_to_training_page(scrapper, training_id, tab_scheduler=tab_scheduler):
         return []
+    archive_page(scrapper.driver, kind=PAGE_KIND_TRAINING, key=training_id, metadata={'training_id': training_id})
     try:
-        # Find all step module items
-        module_items = scrapper.driver.find_elements(By.CSS_SELECTOR, SELECTORS['module_item'])
-
-        # Process each module item to create a step object
-        steps = process_module_items(module_items, training_id)
-
+        steps = []
+        if scrapper.network_capture is not None:
+            # With several tabs, the log also holds the responses of the prefetched trainings
+            url_part = str(training_id) if tab_scheduler is not None else None
+            responses = scrapper.network_capture.take(STEPS_RESPONSE_URL_PATTERN, url_part=url_part)
+            steps = build_steps_from_responses(responses, training_id)
+
+        if not steps:
+            # Find all step module items, on a copy of the page to read their fields without round trips
+            if get_extraction_backend('steps') == 'snapshot':
+                module_items = take_page_snapshot(scrapper.driver).find_elements(By.CSS_SELECTOR, SELECTORS['module_item'])
+            else:
+                module_items = scrapper.driver.find_elements(By.CSS_SELECTOR, SELECTORS['module_item'])
+
+            # Process each module item to create a step object
+            steps = process_module_items(module_items, training_id)
+
+        publish('training_finished', stage='steps', training_id=training_id, steps=len(steps))
         return steps
 
     except Exception as e:
         logger.error(f"Error scraping steps: {str(e)}")
+        publish('error', stage='steps', training_id=training_id, message=f"Error scraping steps: {str(e)}")
         return []
 
 
-def navigate_to_training_page(scrapper: SeleniumScrapper, training_id: int) -> bool:
+def navigate_to_training_page(scrapper: SeleniumScrapper, training_id: int, tab_scheduler: TabScheduler | None = None) -> bool:
     """
     Navigates to the training view page and waits for module items to load.
+    The page is not loaded again if the run already loaded it and the browser displays it.
 
     Args:
         scrapper (SeleniumScrapper): Instance of SeleniumScrapper
         training_id (int): ID of the training to navigate to
+        tab_scheduler (TabScheduler | None): Tabs of the browser, to switch to the tab which prefetched the page if any
 
     Returns:
         bool: True if navigation was successful, False otherwise
     """
     try:
         # Navigate to training view page
-        scrapper.driver.get(os.environ['URL_NEW_PLATFORM_TRAINING'] + f"/view/{training_id}/")
+        load = tab_scheduler.open if tab_scheduler is not None else None
+        load_url(scrapper, get_training_url(training_id), priority=PRIORITY_TRAINING, load=load)
 
         # Wait for the training module items to load
         WebDriverWait(scrapper.driver, 10).until(
@@ -74,6 +113,7 @@ def navigate_to_training_page(scrapper: SeleniumScrapper, training_id: int) -> b
 
     except Exception as e:
         logger.error(f"Failed to navigate to training page {training_id}: {str(e)}")
+        publish('error', stage='steps', training_id=training_id, message=f"Failed to navigate to training page: {str(e)}")
         return False
 
 
@@ -89,7 +129,7 @@ def process_module_items(module_items, training_id):
     return steps
 
 
-def create_step_object(item, training_id: int, index: int) -> Step:
+def create_step_object(item, training_id: int, index: int) -> StepRecord:
     # Extract the title
     title_element = item.find_element(By.CSS_SELECTOR, SELECTORS['title'])
     title = title_element.get_attribute('title') or title_element.text.strip()
@@ -102,19 +142,19 @@ def create_step_object(item, training_id: int, index: int) -> Step:
         raise ValueError(f"Failed to extract valid step ID from href '{href}' for training {training_id}: {str(e)}")
 
     # Extract the type from the icon
-    icon_element = item.find_element(By.CSS_SELECTOR, '.item-icon-picto i')
+    icon_element = item.find_element(By.CSS_SELECTOR, SELECTORS['icon'])
     icon_classes = icon_element.get_attribute('class').split()
     step_type = next((cls.replace('icon-module-', '') for cls in icon_classes if cls.startswith('icon-module-')), 'unknown')
 
     # Extract the validation state
-    state_element = item.find_element(By.CSS_SELECTOR, '.training-view-module-item-state .state-box')
+    state_element = item.find_element(By.CSS_SELECTOR, SELECTORS['state'])
     is_step_validated = 'state-success' in state_element.get_attribute('class')
 
     # Extract the blocked state
     is_step_blocked = 'state-locked' in state_element.get_attribute('class')
 
     # Create Step object
-    step = Step(
+    step = StepRecord(
         id=step_id,
         platform_id=step_id,
         training_id=training_id,
@@ -0,0 +1,157 @@
+import subprocess
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from platform_new.scrapper.scrapper import SeleniumScrapper
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+
+class TabScheduler:
+    """
+    Drives several tabs of one logged-in browser, so that the next page loads in a background tab
+    while the current one is parsed. A tab shares the memory and the login of the browser, instead of starting another one.
+    Only the tab in front is driven by Selenium: the background tabs are started with a plain
+    window.location assignment, which returns without waiting for the page to load.
+    The next pages are prefetched once the current page is opened, which frees the tab that had prefetched it.
+    """
+
+    def __init__(self, scrapper: SeleniumScrapper, tabs: int = 2):
+        if scrapper.driver is None:
+            raise RuntimeError("Driver is not initialized")
+        self.driver = scrapper.driver
+        self.main_handle = self.driver.current_window_handle
+        self.handles = [self.main_handle]
+        for _ in range(max(1, tabs) - 1):
+            self.driver.switch_to.new_window('tab')
+            self.handles.append(self.driver.current_window_handle)
+        self.driver.switch_to.window(self.main_handle)
+        self.current_handle = self.main_handle
+        # URL being loaded by each background tab
+        self.prefetched_urls: dict[str, str] = {}
+        # URLs to prefetch once the next page is opened
+        self.next_urls: list[str] = []
+
+    def prefetch_after_open(self, urls: list[str]) -> None:
+        """
+        Prefetch pages in the background tabs as soon as the next page is opened.
+        Before it is opened, the tab prefetching the next page is still busy and may be the only background tab.
+
+        Args:
+            urls: URLs of the pages following the next one, in their order
+        """
+        self.next_urls = list(urls)
+
+    def prefetch(self, url: str) -> bool:
+        """
+        Start loading a page in a free background tab.
+
+        Args:
+            url: URL of the page
+
+        Returns:
+            False if every background tab is busy or the page is already loading
+        """
+        if url in self.prefetched_urls.values():
+            return False
+        free_handles = [
+            handle for handle in self.handles
+            if handle != self.current_handle and handle not in self.prefetched_urls
+        ]
+        if not free_handles:
+            return False
+        handle = free_handles[0]
+        self.driver.switch_to.window(handle)
+        self.driver.execute_script("window.location.href = arguments[0];", url)
+        self.driver.switch_to.window(self.current_handle)
+        self.prefetched_urls[handle] = url
+        return True
+
+    def open(self, url: str, wait_for_selector: str | None = None, timeout: int = 10) -> None:
+        """
+        Bring a page to the front: the tab prefetching it if any, the current tab otherwise.
+        The pages given to prefetch_after_open then start loading in the tabs left free.
+
+        Args:
+            url: URL of the page
+            wait_for_selector: CSS selector of an element to wait for
+            timeout: Maximum number of seconds to wait for the element
+
+        Raises:
+            TimeoutException: If the element does not appear
+        """
+        prefetched_handle = next((handle for handle, prefetched_url in self.prefetched_urls.items() if prefetched_url == url), None)
+        if prefetched_handle is not None:
+            del self.prefetched_urls[prefetched_handle]
+            self.driver.switch_to.window(prefetched_handle)
+            self.current_handle = prefetched_handle
+        else:
+            self.driver.switch_to.window(self.current_handle)
+            self.driver.get(url)
+
+        next_urls, self.next_urls = self.next_urls, []
+        for next_url in next_urls:
+            self.prefetch(next_url)
+
+        if wait_for_selector:
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, wait_for_selector))
+            )
+
+    def close(self) -> None:
+        """Close the background tabs and come back to the first one."""
+        for handle in self.handles[1:]:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception as e:
+                logger.error(f"Failed to close tab {handle}: {str(e)}")
+        self.driver.switch_to.window(self.main_handle)
+        self.handles = [self.main_handle]
+        self.current_handle = self.main_handle
+        self.prefetched_urls = {}
+        self.next_urls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def get_browser_rss_bytes(scrapper: SeleniumScrapper) -> int | None:
+    """
+    Resident memory of the local browser: chromedriver and all the Chrome processes it started.
+
+    Args:
+        scrapper: SeleniumScrapper with a local browser
+
+    Returns:
+        The sum of the RSS of the processes in bytes, None for a remote browser or if ps is unavailable
+    """
+    service = getattr(scrapper.driver, 'service', None)
+    process = getattr(service, 'process', None)
+    if process is None:
+        return None
+    try:
+        output = subprocess.run(['ps', '-eo', 'pid=,ppid=,rss='], capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"Failed to measure the browser memory: {str(e)}")
+        return None
+
+    children: dict[int, list[int]] = {}
+    rss_kilobytes: dict[int, int] = {}
+    for line in output.splitlines():
+        pid, ppid, rss = (int(value) for value in line.split())
+        children.setdefault(ppid, []).append(pid)
+        rss_kilobytes[pid] = rss
+
+    total_kilobytes = 0
+    pids_to_visit = [process.pid]
+    while pids_to_visit:
+        pid = pids_to_visit.pop()
+        total_kilobytes += rss_kilobytes.get(pid, 0)
+        pids_to_visit.extend(children.get(pid, []))
+    return total_kilobytes * 1024
@@ -0,0 +1,176 @@
+import time
+from django.db import DatabaseError, connection
+from platform_new.models.models import Content, ScrapeTask, Step, StepCheckpoint
+from platform_new.scrapper.checkpoints import CONTENT_STEP_TYPES, clear_checkpoints_if_complete, record_step_completed
+from platform_new.scrapper.content_scrapping import (
+    get_scrapped_content_objects_for_training_module,
+    navigate_to_step_page,
+    process_step_content,
+)
+from platform_new.scrapper.scheduler import record_training_checked
+from platform_new.scrapper.scrapper import SeleniumScrapper
+from platform_new.scrapper.step_scrapping import get_scrapped_step_objects_for_training_module
+from platform_new.task_queue import LeaseHeartbeat, claim_task, complete_task, enqueue_tasks, fail_task, get_default_worker_id
+from scrappingchef.utils import bulk_create_or_update
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+class TaskContext:
+    """
+    Executor of the tasks of a worker, holding its browser across tasks.
+    Every handler writes its results through the upsert path, so executing a task twice leaves the same rows.
+    """
+
+    def __init__(self):
+        self._scrapper: SeleniumScrapper | None = None
+
+    @property
+    def scrapper(self) -> SeleniumScrapper:
+        # The browser is only started by the first task, an idle worker costs no browser
+        if self._scrapper is None:
+            self._scrapper = SeleniumScrapper(extension_vimeo_video_downloader=True)
+        return self._scrapper
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._scrapper is not None:
+            self._scrapper.__exit__(exc_type, exc_val, exc_tb)
+
+    def execute(self, task: ScrapeTask) -> dict:
+        """
+        Execute a task.
+
+        Args:
+            task: The leased task
+
+        Returns:
+            JSON-serialisable result of the task
+
+        Raises:
+            ValueError: If the kind of the task is unknown
+            RuntimeError: If the scraping failed, the task is then retried
+        """
+        handlers = {
+            ScrapeTask.KIND_TRAINING_STEPS: self.scrap_training_steps,
+            ScrapeTask.KIND_TRAINING_CONTENTS: self.scrap_training_contents,
+            ScrapeTask.KIND_STEP_CONTENT: self.scrap_step_content,
+        }
+        if task.kind not in handlers:
+            raise ValueError(f"Unknown task kind '{task.kind}'")
+        return handlers[task.kind](task.target_id)
+
+    def scrap_training_steps(self, training_id: str) -> dict:
+        """
+        Scrap and save the steps of a training, then enqueue the scraping of their contents:
+        one task per unlocked step, and a training task for the locked steps which must be unlocked in order.
+        """
+        steps = get_scrapped_step_objects_for_training_module(scrapper=self.scrapper, training_id=training_id)
+        if not steps:
+            raise RuntimeError(f"No step scraped for training {training_id}")
+        if bulk_create_or_update(model_class=Step, objects=steps) is None:
+            raise RuntimeError(f"Failed to save the steps of training {training_id}")
+        record_training_checked(training_id=training_id, steps=steps)
+
+        completed_step_ids = {
+            str(step_id)
+            for step_id in StepCheckpoint.objects.filter(step__training_id=training_id).values_list('step_id', flat=True)  # type: ignore
+        }
+        remaining_steps = [step for step in steps if str(step.id) not in completed_step_ids]
+        unlocked_step_ids = [
+            step.id for step in remaining_steps
+            if not step.is_blocked and step.type in CONTENT_STEP_TYPES
+        ]
+        enqueue_tasks(kind=ScrapeTask.KIND_STEP_CONTENT, target_ids=unlocked_step_ids)
+        if any(step.is_blocked for step in remaining_steps):
+            enqueue_tasks(kind=ScrapeTask.KIND_TRAINING_CONTENTS, target_ids=[training_id], requeue_finished=True)
+        return {'steps': len(steps), 'step_content_tasks': len(unlocked_step_ids)}
+
+    def scrap_training_contents(self, training_id: str) -> dict:
+        """Scrap the contents of a training step by step, resuming from its checkpoints."""
+        contents = get_scrapped_content_objects_for_training_module(scrapper=self.scrapper, training_id=training_id)
+        return {'contents': len(contents)}
+
+    def scrap_step_content(self, step_id: str) -> dict:
+        """Scrap and save the content of a single unlocked step, opened directly by its url."""
+        step = Step.objects.get(id=step_id)  # type: ignore
+        if not navigate_to_step_page(scrapper=self.scrapper, step=step):
+            # The browser still displays the previous page, whose content must not be saved for this step
+            raise RuntimeError(f"Failed to load the page of step {step_id}")
+        content = process_step_content(self.scrapper, step)
+        if content is None:
+            if step.type in CONTENT_STEP_TYPES:
+                raise RuntimeError(f"No content scraped for step {step_id}")
+        elif bulk_create_or_update(model_class=Content, objects=[content]) is None:
+            raise RuntimeError(f"Failed to save the content of step {step_id}")
+        record_step_completed(step=step, content=content)
+        # The last step task of a training ends its run, the next one scrapes the contents again
+        clear_checkpoints_if_complete(step.training_id)
+        return {'content': content.filename if content is not None else None}
+
+
+def run_worker(
+    worker_id: str | None = None,
+    kinds: list[str] | None = None,
+    lease_seconds: int | None = None,
+    poll_interval: float = 5.0,
+    exit_when_idle: bool = False,
+    max_tasks: int | None = None,
+) -> dict:
+    """
+    Claim and execute tasks until the queue is empty (with exit_when_idle) or max_tasks tasks were executed.
+    The worker drives a single browser, started with its first task and reused for the next ones.
+
+    Args:
+        worker_id: ID of the worker, the host name and process id by default
+        kinds: Only execute tasks of these kinds
+        lease_seconds: Duration of the leases, SCRAPE_TASK_LEASE_SECONDS by default
+        poll_interval: Seconds to wait before polling again an empty queue
+        exit_when_idle: Stop once no task is available instead of waiting for new ones
+        max_tasks: Stop after executing this number of tasks
+
+    Returns:
+        Dictionary with the number of tasks done, failed and lost by the worker
+    """
+    worker_id = worker_id or get_default_worker_id()
+    counts = {'done': 0, 'failed': 0, 'lost': 0}
+    logger.info(f"Worker {worker_id} started")
+    with TaskContext() as context:
+        while max_tasks is None or sum(counts.values()) < max_tasks:
+            try:
+                task = claim_task(worker_id=worker_id, kinds=kinds, lease_seconds=lease_seconds)
+            except DatabaseError as e:
+                # A lost connection or a failover must not kill a long-running worker
+                logger.error(f"Worker {worker_id} failed to claim a task: {str(e)}")
+                connection.close()
+                time.sleep(poll_interval)
+                continue
+            if task is None:
+                if exit_when_idle:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            logger.info(f"Worker {worker_id} executing {task} (attempt {task.attempts}/{task.max_attempts})")
+            with LeaseHeartbeat(task, worker_id, lease_seconds) as heartbeat:
+                try:
+                    result, error = context.execute(task), None
+                except Exception as e:
+                    result, error = None, str(e)
+
+            if heartbeat.lost.is_set():
+                # The results were upserted, so whatever the new holder of the task writes stays consistent
+                counts['lost'] += 1
+            elif error is None:
+                complete_task(task, worker_id, result)
+                counts['done'] += 1
+            else:
+                logger.error(f"{task} failed: {error}")
+                fail_task(task, worker_id, error)
+                counts['failed'] += 1
+
+    logger.info(f"Worker {worker_id} stopped: {counts}")
+    return counts
@@ -2,8 +2,9 @@ import time
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
-from platform_new.models.models import Training
+from .records import PathTrainingRecord, TrainingRecord
 from .logger import get_logger
+from .snapshot import SnapshotElement
 
 # Create logger for this module
 logger = get_logger(__name__)
@@ -18,68 +19,126 @@ TRAINING_SELECTORS = {
 }
 
 
-def build_trainings_from_card(card: WebElement, path_id: str) -> list[Training]:
+def build_trainings_from_card(card: WebElement | SnapshotElement, path_id: str) -> tuple[list[TrainingRecord], list[PathTrainingRecord]]:
     """
     Extracts training information from a path training card WebElement.
+    A training is identified by its title and its type, so a training shared by several paths gets the same ID
+    from the card of each path, and each card only adds the link between its path and the training.
 
     Args:
-        card (WebElement): The WebElement containing the path training card data
+        card (WebElement | SnapshotElement): The element containing the path training card data, live or from a page snapshot
         path_id (str): The ID of the parent path
 
     Returns:
-        list[Training]: List of Training objects containing the extracted information
+        tuple[list[TrainingRecord], list[PathTrainingRecord]]: The Training records of the card and their links to the path
     """
     try:
         # Wait for the card to be loaded, avoid timing issues when code is executed too fast
-        time.sleep(3)
+        # A snapshot is taken once the cards are loaded
+        if not isinstance(card, SnapshotElement):
+            time.sleep(3)
         # Check that card is open
         card_open_icon = card.find_element(By.CSS_SELECTOR, '.deploy--open')
         if card_open_icon is None:
-            return []
+            return [], []
         
         # Find training rows within the body of the card (training are table rows)
         card_body = card.find_element(By.CSS_SELECTOR, 'tbody')
         training_rows = card_body.find_elements(By.CSS_SELECTOR, 'tr')
 
-        trainings = []
-        for index, row in enumerate(training_rows):
-            training = _build_training_from_row(row=row, path_id=path_id, index=index)
-            # TODO: it's possible that the training was already built for another path, then we only need to add a new path_id
-            trainings.append(training)
-
-        return trainings
+        trainings = [_build_training_from_row(row=row) for row in training_rows]
+        return trainings, build_path_training_links(path_id=path_id, trainings=trainings)
 
     except (NoSuchElementException) as e:
         logger.error(f"Could not locate training rows in card element: {str(e)}")
-        return []
+        return [], []
     except Exception as e:
         logger.error(f"Unexpected error while processing trainings: {str(e)}")
-        return []
+        return [], []
+
+
+def build_path_training_links(path_id: str, trainings: list[TrainingRecord]) -> list[PathTrainingRecord]:
+    """
+    Build the links between a path and its trainings, in the order of the trainings within the path.
+    A training listed twice in the path is linked once, at its first position.
 
+    Args:
+        path_id: ID of the path
+        trainings: Training records of the path, in their order
 
-def _build_training_from_row(row: WebElement, path_id: str, index: int) -> Training:
+    Returns:
+        List of PathTraining records
+    """
+    return merge_path_training_links([
+        PathTrainingRecord(id=f"{path_id}__{training.id}", path_id=path_id, training_id=training.id, position=position)
+        for position, training in enumerate(trainings)
+    ])
+
+
+def merge_path_training_links(
+    links: list[PathTrainingRecord],
+    known_link_ids: set | None = None,
+) -> list[PathTrainingRecord]:
+    """
+    Keep a single record of each link between a path and a training, e.g. of a path listed on several pages.
+    The upsert of the links fails as a whole on a link given twice, Postgres refusing to update a row twice.
+
+    Args:
+        links: PathTraining records, possibly with the same link several times
+        known_link_ids: IDs of the links already kept, e.g. from the previous pages, updated in place
+
+    Returns:
+        The records of the links not seen before, at their first position
+    """
+    known_link_ids = known_link_ids if known_link_ids is not None else set()
+    merged_links = []
+    for link in links:
+        if link.id not in known_link_ids:
+            known_link_ids.add(link.id)
+            merged_links.append(link)
+    return merged_links
+
+
+def merge_shared_trainings(trainings: list[TrainingRecord], known_training_ids: set | None = None) -> list[TrainingRecord]:
+    """
+    Keep a single record of each training, the trainings shared by several paths being extracted once per path.
+
+    Args:
+        trainings: Training records, possibly with the same training several times
+        known_training_ids: IDs of the trainings already kept, e.g. from the previous pages, updated in place
+
+    Returns:
+        The records of the trainings not seen before, in their first order
+    """
+    known_training_ids = known_training_ids if known_training_ids is not None else set()
+    merged_trainings = []
+    for training in trainings:
+        if training.id not in known_training_ids:
+            known_training_ids.add(training.id)
+            merged_trainings.append(training)
+    return merged_trainings
+
+
+def _build_training_from_row(row: WebElement | SnapshotElement) -> TrainingRecord:
     """
     Builds a Training object from a table row element.
 
     Args:
         row: WebElement representing the training row
-        path_id: ID of the parent path
-        index: Index of the training within the path
 
     Returns:
         Training object with extracted data
     """
     try:
         title = _extract_training_title(row)
-        training_id = _create_training_id(title, path_id, index)
+        training_type = _extract_training_type(row)
+        training_id = _create_training_id(title, training_type)
         progress = _extract_training_progress(row)
         score = _extract_training_score(row)
-        training_type = _extract_training_type(row)
 
-        return Training(
+        return TrainingRecord(
             id=training_id,
             platform_id=training_id,
-            path_id=path_id,
             title=title,
             progression=progress,
             type=training_type,
@@ -93,24 +152,27 @@ def _build_training_from_row(row: WebElement, path_id: str, index: int) -> Train
         raise
 
 
-def _create_training_id(title: str, path_id: str, index: int) -> str:
+def _create_training_id(title: str, training_type: str) -> str:
     """
-    Create a unique training ID from the training title, path ID, and index.
+    Create the training ID from the training title and type, which identify a training on the platform:
+    the same training listed in several paths gets the same ID, while two trainings sharing a title
+    but not a type (e.g. the e-learning and the virtual class of a course) keep distinct IDs.
     
     Args:
         title: Training title as string
-        path_id: Path ID as string
-        index: Index of training within the path
+        training_type: Training type as string
         
     Returns:
-        Unique training ID as string
+        Training ID as string
     """
-    # Create a unique identifier by combining title, path_id, and index
-    # This ensures uniqueness even if titles are similar
-    return f"training_{title.replace(' ', '_').replace('#', '').replace('-', '_')}_{path_id}_index_{index}"
+    return f"training_{_slugify(title)}__{_slugify(training_type)}"
+
+
+def _slugify(value: str) -> str:
+    return value.replace(' ', '_').replace('#', '').replace('-', '_')
 
 
-def _extract_training_title(row: WebElement) -> str:
+def _extract_training_title(row: WebElement | SnapshotElement) -> str:
     """
     Extract training title from the row.
     
@@ -124,7 +186,7 @@ def _extract_training_title(row: WebElement) -> str:
     return title_element.text.strip()
 
 
-def _extract_training_progress(row: WebElement) -> float:
+def _extract_training_progress(row: WebElement | SnapshotElement) -> float:
     """
     Extract training progress from the first progression bar.
     
@@ -144,7 +206,7 @@ def _extract_training_progress(row: WebElement) -> float:
     return float(progress_text if progress_text else '0') / 100
 
 
-def _extract_training_score(row: WebElement) -> float | None:
+def _extract_training_score(row: WebElement | SnapshotElement) -> float | None:
     """
     Extract training score from the score column.
     
@@ -168,7 +230,7 @@ def _extract_training_score(row: WebElement) -> float | None:
     return 0
 
 
-def _extract_training_type(row: WebElement) -> str:
+def _extract_training_type(row: WebElement | SnapshotElement) -> str:
     """
     Extract training type from the sub-data text.
     
@@ -0,0 +1,162 @@
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from django.db import connection
+from scrappingchef.utils import bulk_create_or_update
+from .logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+# Marker telling the writer thread to flush what remains and stop
+_STOP = object()
+
+# Seconds a put waits for room in the queue before checking again that the writer thread is alive
+PUT_TIMEOUT = 1.0
+
+
+class WriteBehindBuffer:
+    """
+    Background writer persisting scrapped objects while the scraping goes on.
+    Scrapers put objects into a bounded queue, and a writer thread upserts them to the database by batches
+    of batch_size objects, or every flush_interval seconds when objects are pending.
+    When the writer falls behind and the queue is full, put blocks the scraper (backpressure),
+    so the memory used by pending objects stays bounded whatever the size of the catalogue.
+    If the writer thread dies, the next put or close raises its exception instead of blocking on the full queue.
+    on_flush, if given, is called by the writer thread after each flush with the objects of the batch and whether
+    they were written, e.g. to record what only holds once the objects are in the database.
+    """
+
+    def __init__(
+        self,
+        model_class,
+        batch_size: int = 500,
+        flush_interval: float = 5.0,
+        max_pending: int = 5000,
+        on_flush=None,
+    ):
+        self.model_class = model_class
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.written_count = 0
+        self.failed_count = 0
+        self.flush_count = 0
+        self.flush_latencies: deque[float] = deque(maxlen=1000)
+        self._error: Exception | None = None
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"write-behind-{model_class.__name__}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def put(self, obj) -> None:
+        """Queue an object to persist, blocking while the queue is full."""
+        self._put(obj)
+
+    def put_many(self, objects) -> None:
+        """Queue several objects to persist, blocking while the queue is full."""
+        for obj in objects:
+            self._put(obj)
+
+    def close(self) -> None:
+        """Flush the pending objects and stop the writer thread, raising the exception of the writer thread if it died."""
+        if self._thread.is_alive():
+            self._put(_STOP)
+            self._thread.join()
+        logger.info(f"Write-behind buffer for {self.model_class.__name__} closed: {self.stats()}")
+        self._raise_writer_error()
+
+    def stats(self) -> dict:
+        """
+        Get the statistics of the buffer.
+
+        Returns:
+            Dictionary with the number of written and failed objects, the number of flushes and the flush latencies
+        """
+        latencies = list(self.flush_latencies)
+        return {
+            'written': self.written_count,
+            'failed': self.failed_count,
+            'flushes': self.flush_count,
+            'pending': self._queue.qsize(),
+            'flush_latency_avg': statistics.fmean(latencies) if latencies else 0.0,
+            'flush_latency_max': max(latencies) if latencies else 0.0,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.close()
+        except Exception as e:
+            # The exception of the writer thread already raised by a put is not raised a second time
+            if e is not exc_val:
+                raise
+
+    def _put(self, item) -> None:
+        while True:
+            self._raise_writer_error()
+            if not self._thread.is_alive():
+                raise RuntimeError(f"Write-behind writer for {self.model_class.__name__} is stopped")
+            try:
+                self._queue.put(item, timeout=PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+    def _raise_writer_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        batch = []
+        last_flush_time = time.monotonic()
+        try:
+            while True:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush_time))
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    self._flush(batch)
+                    return
+                if item is not None:
+                    batch.append(item)
+
+                is_interval_elapsed = time.monotonic() - last_flush_time >= self.flush_interval
+                if len(batch) >= self.batch_size or (batch and is_interval_elapsed):
+                    self._flush(batch)
+                    batch = []
+                if is_interval_elapsed:
+                    last_flush_time = time.monotonic()
+        except Exception as e:
+            logger.error(f"Write-behind writer for {self.model_class.__name__} failed: {str(e)}")
+            self._error = e
+        finally:
+            # The thread has its own database connection, which is not closed by the request cycle
+            connection.close()
+
+    def _flush(self, batch: list) -> None:
+        if not batch:
+            return
+        start_time = time.monotonic()
+        inserted_objects = bulk_create_or_update(model_class=self.model_class, objects=batch)
+        latency = time.monotonic() - start_time
+
+        self.flush_count += 1
+        self.flush_latencies.append(latency)
+        if inserted_objects is None:
+            self.failed_count += len(batch)
+        else:
+            self.written_count += len(batch)
+        logger.info(f"Flushed {len(batch)} {self.model_class.__name__} objects in {latency * 1000:.0f}ms")
+        if self.on_flush is not None:
+            self.on_flush(batch, inserted_objects is not None)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models.models import Path, Training, Step, Content
+from .models.models import Path, Training, Step, Content, ScrapeJob
 
 
 class ContentSerializer(serializers.ModelSerializer):
@@ -25,8 +25,24 @@ class TrainingSerializer(serializers.ModelSerializer):
 
 
 class PathSerializer(serializers.ModelSerializer):
-    trainings = TrainingSerializer(many=True, read_only=True)
+    trainings = serializers.SerializerMethodField()
 
     class Meta:
         model = Path
-        fields = ['id', 'title', 'progression', 'score', 'trainings']
\ No newline at end of file
+        fields = ['id', 'title', 'progression', 'score', 'trainings']
+
+    def get_trainings(self, path):
+        # The trainings in their order within the path, a training shared by several paths having one position per path
+        links = sorted(path.path_trainings.all(), key=lambda link: link.position)
+        return TrainingSerializer([link.training for link in links], many=True).data
+
+
+class ScrapeJobSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ScrapeJob
+        fields = [
+            'id', 'stage', 'parameters', 'status', 'progress', 'processed_count', 'total_count',
+            'result', 'message', 'cancel_requested', 'created_time', 'started_time', 'finished_time',
+        ]
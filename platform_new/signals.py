@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from platform_new.models.models import Path, Training, PathTraining, Step, Content, Tombstone
+from platform_new.response_cache import invalidate_response_cache
+
+# Models whose deletions are exposed as tombstones in the changes feed
+TRACKED_MODELS = [Path, Training, PathTraining, Step, Content]
+
+
+def record_tombstone(sender, instance, **kwargs) -> None:
+    """
+    Record a tombstone for a deleted row so that polling clients can drop it from their copy.
+    Cascading deletes send one signal per row, so children of a deleted path are recorded as well.
+    """
+    Tombstone.objects.create(model_name=sender.__name__, object_id=str(instance.pk))  # type: ignore
+    invalidate_response_cache()
+
+
+def invalidate_cached_responses(sender, instance, **kwargs) -> None:
+    """Invalidate the cached responses built from the previous state of the data."""
+    invalidate_response_cache()
+
+
+for model_class in TRACKED_MODELS:
+    post_delete.connect(record_tombstone, sender=model_class, dispatch_uid=f"tombstone_{model_class.__name__}")
+    post_save.connect(invalidate_cached_responses, sender=model_class, dispatch_uid=f"invalidate_{model_class.__name__}")
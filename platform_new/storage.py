@@ -0,0 +1,127 @@
+import threading
+from abc import ABC, abstractmethod
+import time
+from datetime import timedelta
+from functools import lru_cache
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, JsonResponse
+from platform_new.buckets import Bucket, get_bucket
+from platform_new.content_files import content_file_index, serve_content_file
+from platform_new.scrapper.logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+
+class ContentStorage(ABC):
+    """Backend delivering the content files to the clients of ContentFileView."""
+
+    @abstractmethod
+    def serve(self, request: HttpRequest, filename: str) -> HttpResponse:
+        """
+        Answer a request for a content file.
+
+        Args:
+            request: The HTTP request
+            filename: Name of the content file
+
+        Returns:
+            Response delivering the file, or a 404 JSON response if the file does not exist
+        """
+
+
+class LocalContentStorage(ContentStorage):
+    """Serve the content files directly from the local content directory."""
+
+    def serve(self, request: HttpRequest, filename: str) -> HttpResponse:
+        # Look the file up in the index instead of hitting the filesystem on every request
+        info = content_file_index.get(filename)
+        if info is None:
+            return JsonResponse({"error": "File not found"}, status=404)
+
+        try:
+            # Serve the file with support for range requests (video seeking) and conditional requests
+            return serve_content_file(request, filename, info)
+        except FileNotFoundError:
+            return JsonResponse({"error": "File not found"}, status=404)
+
+
+class BucketContentStorage(ContentStorage):
+    """
+    Redirect the clients to a short-lived signed URL of the file in the object store,
+    so the bytes are delivered by the object store instead of the app instance.
+    Signed URLs are cached per filename and reused until they get close to their expiration,
+    a file missing from the bucket is answered with a 404 like the local backend does.
+    """
+
+    def __init__(self, bucket: Bucket, expiration: timedelta, renewal_margin: timedelta):
+        self.bucket = bucket
+        self.expiration = expiration
+        self.renewal_margin = renewal_margin
+        self._signed_urls: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def serve(self, request: HttpRequest, filename: str) -> HttpResponse:
+        signed = self.get_signed_url(filename)
+        if signed is None:
+            return JsonResponse({"error": "File not found"}, status=404)
+
+        signed_url, expires_at = signed
+        response = HttpResponseRedirect(signed_url)
+        # Let the browser reuse the redirect as long as the signed URL stays valid
+        max_age = max(0, int(expires_at - time.time() - self.renewal_margin.total_seconds()))
+        response['Cache-Control'] = f'private, max-age={max_age}'
+        return response
+
+    def get_signed_url(self, filename: str) -> tuple[str, float] | None:
+        """
+        Get a signed URL of a file, from the cache if the cached one is not about to expire.
+        The existence of the file is checked before signing, signing itself never fails on a missing object.
+
+        Args:
+            filename: Name of the content file
+
+        Returns:
+            Tuple (signed URL, expiration timestamp), or None if the file is not in the bucket
+        """
+        now = time.time()
+        cached = self._signed_urls.get(filename)
+        if cached is not None and cached[1] - now > self.renewal_margin.total_seconds():
+            return cached
+
+        if not self.bucket.object_exists(filename):
+            return None
+
+        signed_url = self.bucket.generate_signed_url(filename, self.expiration)
+        signed = (signed_url, now + self.expiration.total_seconds())
+        with self._lock:
+            self._signed_urls[filename] = signed
+        return signed
+
+
+@lru_cache(maxsize=1)
+def get_content_storage() -> ContentStorage:
+    """
+    Get the content storage backend configured by the CONTENT_STORAGE_BACKEND setting.
+
+    Returns:
+        LocalContentStorage for 'local', BucketContentStorage for 'bucket'
+
+    Raises:
+        ValueError: If the configured backend is unknown
+    """
+    backend = settings.CONTENT_STORAGE_BACKEND
+    if backend == 'local':
+        return LocalContentStorage()
+    if backend == 'bucket':
+        bucket = get_bucket(
+            bucket_name=settings.CONTENT_BUCKET_NAME,
+            bucket_directory=settings.CONTENT_BUCKET_DIRECTORY,
+        )
+        logger.info(f"Content files are delivered from the bucket {bucket.name}")
+        return BucketContentStorage(
+            bucket=bucket,
+            expiration=timedelta(seconds=settings.CONTENT_SIGNED_URL_EXPIRATION),
+            renewal_margin=timedelta(seconds=settings.CONTENT_SIGNED_URL_RENEWAL_MARGIN),
+        )
+    raise ValueError(f"Unknown content storage backend '{backend}'")
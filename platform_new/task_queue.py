@@ -0,0 +1,202 @@
+import os
+import socket
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from platform_new.models.models import ScrapeTask
+from platform_new.scrapper.logger import get_logger
+
+# Create logger for this module
+logger = get_logger(__name__)
+
+
+def get_task_id(kind: str, target_id) -> str:
+    """ID of the task of a kind on a target: a target has at most one task of each kind in the queue."""
+    return f"{kind}:{target_id}"
+
+
+def enqueue_tasks(kind: str, target_ids: list, requeue_finished: bool = False) -> int:
+    """
+    Add tasks to the queue. Enqueueing a task already in the queue is a no-op, so enqueueing is idempotent.
+
+    Args:
+        kind: Kind of the tasks, one of ScrapeTask.KIND_CHOICES
+        target_ids: IDs of the trainings or steps the tasks work on
+        requeue_finished: Put back in the queue the tasks of these targets which are done or failed
+
+    Returns:
+        Number of tasks pending after the call among the given targets
+    """
+    task_ids = [get_task_id(kind, target_id) for target_id in target_ids]
+    ScrapeTask.objects.bulk_create(  # type: ignore
+        [ScrapeTask(id=task_id, kind=kind, target_id=str(target_id)) for task_id, target_id in zip(task_ids, target_ids)],
+        ignore_conflicts=True,
+    )
+    if requeue_finished:
+        ScrapeTask.objects.filter(  # type: ignore
+            id__in=task_ids,
+            status__in=[ScrapeTask.STATUS_DONE, ScrapeTask.STATUS_FAILED],
+        ).update(status=ScrapeTask.STATUS_PENDING, attempts=0, last_error='', updated_time=timezone.now())
+    pending_count = ScrapeTask.objects.filter(id__in=task_ids, status=ScrapeTask.STATUS_PENDING).count()  # type: ignore
+    logger.info(f"Enqueued {len(task_ids)} {kind} tasks, {pending_count} pending")
+    return pending_count
+
+
+def get_default_worker_id() -> str:
+    """ID of a worker process, unique across the hosts sharing the database."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def claim_task(worker_id: str, kinds: list[str] | None = None, lease_seconds: int | None = None) -> ScrapeTask | None:
+    """
+    Lease the oldest task available to a worker: a pending task, or a leased one whose lease expired.
+    The row is locked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never claim the same task
+    and never wait for each other. A task whose lease expired after its last attempt is marked failed.
+
+    Args:
+        worker_id: ID of the worker
+        kinds: Only claim tasks of these kinds
+        lease_seconds: Duration of the lease, SCRAPE_TASK_LEASE_SECONDS by default
+
+    Returns:
+        The leased task, None if no task is available
+    """
+    lease_seconds = lease_seconds or settings.SCRAPE_TASK_LEASE_SECONDS
+    _fail_exhausted_leases()
+
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = ScrapeTask.objects.select_for_update(skip_locked=True).filter(  # type: ignore
+            Q(status=ScrapeTask.STATUS_PENDING)
+            | Q(status=ScrapeTask.STATUS_LEASED, lease_expires_time__lt=now)
+        )
+        if kinds:
+            tasks = tasks.filter(kind__in=kinds)
+        task = tasks.order_by('created_time').first()
+        if task is None:
+            return None
+
+        if task.status == ScrapeTask.STATUS_LEASED:
+            logger.warning(f"Lease of {task} held by {task.lease_owner} expired, claimed again by {worker_id}")
+        task.status = ScrapeTask.STATUS_LEASED
+        task.lease_owner = worker_id
+        task.lease_expires_time = now + timedelta(seconds=lease_seconds)
+        task.attempts += 1
+        task.save(update_fields=['status', 'lease_owner', 'lease_expires_time', 'attempts', 'updated_time'])
+    return task
+
+
+def _fail_exhausted_leases() -> None:
+    # Tasks whose worker died during their last attempt are not retried any further
+    ScrapeTask.objects.filter(  # type: ignore
+        status=ScrapeTask.STATUS_LEASED,
+        lease_expires_time__lt=timezone.now(),
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=ScrapeTask.STATUS_FAILED,
+        last_error='Lease expired on the last attempt',
+        finished_time=timezone.now(),
+        updated_time=timezone.now(),
+    )
+
+
+def extend_lease(task: ScrapeTask, worker_id: str, lease_seconds: int | None = None) -> bool:
+    """
+    Extend the lease of a task held by a worker.
+
+    Args:
+        task: The leased task
+        worker_id: ID of the worker holding the lease
+        lease_seconds: Duration of the lease from now, SCRAPE_TASK_LEASE_SECONDS by default
+
+    Returns:
+        False if the worker lost the lease, e.g. after missing heartbeats long enough for another worker to claim it
+    """
+    lease_seconds = lease_seconds or settings.SCRAPE_TASK_LEASE_SECONDS
+    now = timezone.now()
+    return bool(ScrapeTask.objects.filter(  # type: ignore
+        id=task.id,
+        status=ScrapeTask.STATUS_LEASED,
+        lease_owner=worker_id,
+    ).update(lease_expires_time=now + timedelta(seconds=lease_seconds), updated_time=now))
+
+
+def complete_task(task: ScrapeTask, worker_id: str, result: dict) -> bool:
+    """
+    Mark a leased task as done.
+
+    Returns:
+        False if the worker lost the lease meanwhile, the result of the worker now holding it prevails
+    """
+    now = timezone.now()
+    return bool(ScrapeTask.objects.filter(  # type: ignore
+        id=task.id,
+        status=ScrapeTask.STATUS_LEASED,
+        lease_owner=worker_id,
+    ).update(status=ScrapeTask.STATUS_DONE, result=result, last_error='', finished_time=now, updated_time=now))
+
+
+def fail_task(task: ScrapeTask, worker_id: str, error: str) -> bool:
+    """
+    Release a leased task after a failure: it goes back to the queue until it has been attempted max_attempts times.
+
+    Returns:
+        False if the worker lost the lease meanwhile
+    """
+    now = timezone.now()
+    is_exhausted = task.attempts >= task.max_attempts
+    return bool(ScrapeTask.objects.filter(  # type: ignore
+        id=task.id,
+        status=ScrapeTask.STATUS_LEASED,
+        lease_owner=worker_id,
+    ).update(
+        status=ScrapeTask.STATUS_FAILED if is_exhausted else ScrapeTask.STATUS_PENDING,
+        lease_owner='',
+        lease_expires_time=None,
+        last_error=error,
+        finished_time=now if is_exhausted else None,
+        updated_time=now,
+    ))
+
+
+class LeaseHeartbeat:
+    """
+    Thread extending the lease of a task every third of the lease while the task runs.
+    lost is set if the lease could not be extended, the result of the task is then discarded.
+    """
+
+    def __init__(self, task: ScrapeTask, worker_id: str, lease_seconds: int | None = None):
+        self.task = task
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds or settings.SCRAPE_TASK_LEASE_SECONDS
+        self.lost = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{task.id}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.wait(self.lease_seconds / 3):
+                try:
+                    is_extended = extend_lease(self.task, self.worker_id, self.lease_seconds)
+                except Exception as e:
+                    # A database hiccup is retried at the next beat, the lease is still valid until it expires
+                    logger.error(f"Heartbeat of {self.task} failed: {str(e)}")
+                    continue
+                if not is_extended:
+                    logger.error(f"{self.worker_id} lost the lease of {self.task}")
+                    self.lost.set()
+                    return
+        finally:
+            # The thread has its own database connection, which is not closed by the request cycle
+            connection.close()
@@ -0,0 +1,40 @@
+import fcntl
+import json
+import tempfile
+import threading
+from django.test import SimpleTestCase
+from platform_new.scrapper.archive import PAGE_KIND_STEP, SnapshotArchive
+
+
+class SnapshotArchiveTest(SimpleTestCase):
+
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.archive = SnapshotArchive(temporary_directory.name)
+
+    def test_add_waits_for_the_lock_on_the_index(self):
+        # The lock held by another process, e.g. a worker appending its own line, is taken on a file opened apart
+        with open(self.archive.index_path, 'a', encoding='utf-8') as index_file:
+            fcntl.flock(index_file, fcntl.LOCK_EX)
+            add_thread = threading.Thread(target=self.archive.add, args=(PAGE_KIND_STEP, 90211, '<html></html>'))
+            add_thread.start()
+            add_thread.join(timeout=0.2)
+            self.assertTrue(add_thread.is_alive())
+            fcntl.flock(index_file, fcntl.LOCK_UN)
+        add_thread.join(timeout=5)
+
+        self.assertFalse(add_thread.is_alive())
+        self.assertEqual([entry['key'] for entry in self.archive.iter_latest_entries()], ['90211'])
+
+    def test_index_gets_one_line_per_snapshot(self):
+        self.archive.add(kind=PAGE_KIND_STEP, key=90211, html='<html>first</html>', url='https://platform.example/step/90211')
+        self.archive.add(kind=PAGE_KIND_STEP, key=90211, html='<html>second</html>')
+
+        with open(self.archive.index_path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([entry['url'] for entry in entries], ['https://platform.example/step/90211', ''])
+        # The latest snapshot replaces the previous one
+        latest_entries = list(self.archive.iter_latest_entries())
+        self.assertEqual(len(latest_entries), 1)
+        self.assertEqual(self.archive.read(latest_entries[0]), '<html>second</html>')
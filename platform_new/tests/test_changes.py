@@ -0,0 +1,137 @@
+import base64
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from platform_new.changes import ChangesCursor, decode_cursor, encode_cursor, get_changes
+from platform_new.models.models import Path, Step, Training
+
+
+def create_training(index: int) -> Training:
+    return Training.objects.create(  # type: ignore
+        id=f"training_{index}", platform_id=f"training_{index}", title=f"Training {index}", progression=0, score=0, type='E-learning',
+    )
+
+
+@override_settings(CHANGES_FEED_OVERLAP_SECONDS=0)
+class ChangesFeedTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.path = Path.objects.create(id='path_1', platform_id='path_1', title='Path 1', progression=0, score=0)  # type: ignore
+        self.training = create_training(1)
+
+    def poll(self, cursor: str | None = None, **params) -> dict:
+        if cursor is not None:
+            params['cursor'] = cursor
+        response = self.client.get(reverse('adc_new:changes'), params, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_full_sync_then_cursor_round_trip(self):
+        full_sync = self.poll()
+        self.assertEqual([row['id'] for row in full_sync['paths']], ['path_1'])
+        self.assertEqual([row['id'] for row in full_sync['trainings']], ['training_1'])
+        self.assertEqual((full_sync['deleted'], full_sync['has_more']), ([], False))
+
+        self.training.title = 'Training 1, updated'
+        self.training.save()
+        first_poll = self.poll(full_sync['cursor'])
+
+        self.assertEqual([row['title'] for row in first_poll['trainings']], ['Training 1, updated'])
+        self.assertEqual(first_poll['paths'], [])
+        # The cursor of a poll leads to the next one
+        self.assertEqual(self.poll(first_poll['cursor'])['trainings'], [])
+
+    def test_since_returns_the_rows_updated_afterwards(self):
+        since = timezone.now()
+        create_training(2)
+
+        changes = self.poll(since=since.isoformat())
+
+        self.assertEqual([row['id'] for row in changes['trainings']], ['training_2'])
+        self.assertEqual(changes['paths'], [])
+
+    def test_empty_poll(self):
+        changes = self.poll(self.poll()['cursor'])
+
+        self.assertEqual({key: value for key, value in changes.items() if isinstance(value, list) and value}, {})
+        self.assertFalse(changes['has_more'])
+
+    def test_deleted_rows_come_as_tombstones(self):
+        Step.objects.create(id='1', platform_id=1, training=self.training, title='Step 1', type='text')  # type: ignore
+        cursor = self.poll()['cursor']
+
+        self.training.delete()
+        changes = self.poll(cursor)
+
+        # The steps of the training are deleted with it
+        self.assertEqual(
+            sorted((tombstone['type'], tombstone['id']) for tombstone in changes['deleted']),
+            [('steps', '1'), ('trainings', 'training_1')],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('adc_new:changes'), {'cursor': 'not a cursor'}, HTTP_ACCEPT='application/json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_of_a_timestamp_only_is_a_poll_cursor(self):
+        since = timezone.now()
+        previous_cursor = base64.urlsafe_b64encode(since.isoformat().encode()).decode().rstrip('=')
+
+        self.assertEqual(decode_cursor(previous_cursor), ChangesCursor(since=since))
+
+
+class ChangesFeedPaginationTest(TestCase):
+
+    def test_pages_cover_every_change_once(self):
+        since = timezone.now()
+        for index in range(5):
+            create_training(index)
+        Path.objects.create(id='path_1', platform_id='path_1', title='Path 1', progression=0, score=0)  # type: ignore
+        training = Training.objects.get(id='training_0')  # type: ignore
+        training.delete()
+
+        pages = [get_changes(ChangesCursor(since=since), page_size=2)]
+        while pages[-1]['has_more']:
+            pages.append(get_changes(decode_cursor(pages[-1]['cursor']), page_size=2))
+
+        self.assertTrue(all(sum(len(page[key]) for key in ('paths', 'trainings', 'deleted')) <= 2 for page in pages))
+        self.assertEqual([row['id'] for page in pages for row in page['paths']], ['path_1'])
+        self.assertEqual([row['id'] for page in pages for row in page['trainings']], [f"training_{index}" for index in range(1, 5)])
+        self.assertEqual([tombstone['id'] for page in pages for tombstone in page['deleted']], ['training_0'])
+        # The cursor of the last page leads to the next poll, from the start of the sync
+        self.assertEqual(decode_cursor(pages[-1]['cursor']).started_time, None)
+        self.assertGreaterEqual(decode_cursor(pages[-1]['cursor']).since, since)
+
+    def test_rows_sharing_an_updated_time_are_split_by_id(self):
+        for index in range(5):
+            create_training(index)
+        updated_time = timezone.now()
+        Training.objects.update(updated_time=updated_time)  # type: ignore
+
+        first_page = get_changes(ChangesCursor(since=None), page_size=3)
+        second_page = get_changes(decode_cursor(first_page['cursor']), page_size=3)
+
+        self.assertEqual([row['id'] for row in first_page['trainings']], ['training_0', 'training_1', 'training_2'])
+        self.assertEqual([row['id'] for row in second_page['trainings']], ['training_3', 'training_4'])
+        self.assertFalse(second_page['has_more'])
+
+    @override_settings(CHANGES_FEED_OVERLAP_SECONDS=60)
+    def test_row_committed_late_is_read_by_the_next_poll(self):
+        poll = get_changes(ChangesCursor(since=None))
+        # Its transaction began before the poll, its updated_time is earlier than the cursor
+        late_training = create_training(1)
+        Training.objects.filter(id=late_training.id).update(updated_time=decode_cursor(poll['cursor']).since - timedelta(seconds=5))  # type: ignore
+
+        next_poll = get_changes(decode_cursor(poll['cursor']))
+
+        self.assertEqual([row['id'] for row in next_poll['trainings']], ['training_1'])
+
+    def test_encoded_positions_round_trip(self):
+        now = timezone.now()
+        cursor = ChangesCursor(since=None, started_time=now, section=5, after=(now, 12))
+
+        self.assertEqual(decode_cursor(encode_cursor(cursor)), cursor)
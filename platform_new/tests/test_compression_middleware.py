@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from platform_new.changes import encode_cursor
+
+
+class CompressionMiddlewareCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url: str):
+        return self.client.get(url, HTTP_ACCEPT='application/json', HTTP_ACCEPT_ENCODING='gzip')
+
+    def test_hit_and_miss_vary_on_the_same_headers(self):
+        url = reverse('adc_new:changes')
+
+        miss = self.get(url)
+        hit = self.get(url)
+
+        self.assertFalse(getattr(miss, 'served_from_cache', False))
+        self.assertTrue(hit.served_from_cache)
+        # Other middlewares add their own headers, e.g. Origin for CORS
+        self.assertLessEqual({'Accept', 'Accept-Encoding'}, set(hit['Vary'].split(', ')))
+        self.assertEqual(set(miss['Vary'].split(', ')), set(hit['Vary'].split(', ')))
+
+    def test_polls_with_a_cursor_are_not_cached(self):
+        url = f"{reverse('adc_new:changes')}?cursor={encode_cursor(timezone.now())}"
+
+        self.get(url)
+        second_poll = self.get(url)
+
+        self.assertEqual(second_poll.status_code, 200)
+        self.assertFalse(getattr(second_poll, 'served_from_cache', False))
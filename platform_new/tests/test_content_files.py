@@ -0,0 +1,52 @@
+import hashlib
+import os
+import tempfile
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from platform_new.content_files import ContentFileIndex, serve_content_file
+
+
+@override_settings(CONTENT_FILE_MAX_AGE=3600, CONTENT_FILE_IMMUTABLE_MAX_AGE=31536000)
+class ContentFileCachingTest(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.index = ContentFileIndex(self.directory)
+
+    def serve(self, filename: str, data: bytes | None = None, **headers):
+        if data is not None:
+            with open(os.path.join(self.directory, filename), 'wb') as f:
+                f.write(data)
+        response = serve_content_file(RequestFactory().get(f"/contents/{filename}", **headers), filename, self.index.get(filename))
+        if hasattr(response, 'close'):
+            response.close()
+        return response
+
+    def test_step_files_are_revalidated_once_stale(self):
+        for filename in ('content_90213.pdf', 'content_90212.mp4'):
+            response = self.serve(filename, b'%PDF-1.4')
+
+            self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+            self.assertTrue(response['ETag'])
+
+    def test_file_named_by_its_digest_is_immutable(self):
+        data = b'%PDF-1.4'
+        response = self.serve(f"{hashlib.sha256(data).hexdigest()}.pdf", data)
+
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_texts_are_always_revalidated(self):
+        response = self.serve('content_90211.html', b'<p>Introduction</p>')
+
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+
+    def test_revalidation_with_the_etag_of_the_current_file(self):
+        etag = self.serve('content_90213.pdf', b'%PDF-1.4')['ETag']
+
+        response = self.serve('content_90213.pdf', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        # The file rewritten by a new scrape is sent again
+        response = self.serve('content_90213.pdf', b'%PDF-1.5, updated', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,119 @@
+import tempfile
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from platform_new.models.models import Content, StepCheckpoint, Training
+from platform_new.models.step_type import StepType
+from platform_new.scrapper import content_scrapping, content_store
+from platform_new.scrapper.content_store import ContentStore
+from platform_new.scrapper.records import StepRecord
+
+TRAINING_ID = 'training_Cooking_basics__E_learning'
+
+# Queries of a content run whatever its number of steps: the upsert of the steps, the read of the journal,
+# the completion check and the clearing of the journal
+QUERIES_PER_TRAINING = 4
+# Each step is journaled as soon as its content is saved, so that an interrupted run resumes from the next step:
+# the upsert of its content and the upsert of its checkpoint
+WRITES_PER_STEP = 2
+
+
+class FakeDriver:
+    """Browser displaying the text of any step page it loads, through the calls made by the content scraping."""
+
+    def __init__(self):
+        self.current_url = 'about:blank'
+
+    def get(self, url: str) -> None:
+        self.current_url = url
+
+    def find_element(self, by: str, value: str):
+        return object()
+
+    def set_script_timeout(self, timeout: float) -> None:
+        pass
+
+    def execute_async_script(self, script: str, expected_type: str, timeout: float) -> dict:
+        return {'type': StepType.TEXT.value, 'payload': f"<p>{self.current_url}</p>"}
+
+
+class FakeScrapper:
+
+    def __init__(self):
+        self.driver = FakeDriver()
+        self.frontier = None
+
+
+def build_steps(steps_count: int) -> list[StepRecord]:
+    return [
+        StepRecord(
+            id=index,
+            platform_id=index,
+            training_id=TRAINING_ID,
+            title=f"Step {index}",
+            type=StepType.TEXT.value,
+        )
+        for index in range(1, steps_count + 1)
+    ]
+
+
+@override_settings(SNAPSHOT_ARCHIVE_DIRECTORY='')
+class ContentRunQueriesTest(TestCase):
+    """The content run of a training writes each step as it is scraped, but never reads the steps back one by one."""
+
+    def setUp(self):
+        Training.objects.create(id=TRAINING_ID, platform_id=TRAINING_ID, title='Cooking basics', progression=0, score=0, type='E-learning')  # type: ignore
+        content_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(content_directory.cleanup)
+        content_store_patch = mock.patch.object(content_store, '_content_store', ContentStore(directory=content_directory.name))
+        content_store_patch.start()
+        self.addCleanup(content_store_patch.stop)
+
+    def run_contents(self, steps_count: int) -> CaptureQueriesContext:
+        steps = build_steps(steps_count)
+        # Only the view of the training is not loaded, the step pages go through the page and content functions
+        with (
+            mock.patch.object(content_scrapping, 'get_scrapped_step_objects_for_training_module', return_value=steps),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            contents = content_scrapping.get_scrapped_content_objects_for_training_module(
+                scrapper=FakeScrapper(),
+                training_id=TRAINING_ID,
+            )
+        self.assertEqual(len(contents), steps_count)
+        self.assertEqual(Content.objects.filter(step__training_id=TRAINING_ID).count(), steps_count)  # type: ignore
+        # The journal is cleared once every content is saved
+        self.assertFalse(StepCheckpoint.objects.exists())  # type: ignore
+        return queries
+
+    def test_queries_besides_the_step_writes_are_bounded_per_training(self):
+        few_steps_queries = count_training_queries(self.run_contents(steps_count=3))
+        many_steps_queries = count_training_queries(self.run_contents(steps_count=30))
+
+        self.assertEqual(many_steps_queries, few_steps_queries)
+        self.assertLessEqual(many_steps_queries, QUERIES_PER_TRAINING)
+
+    def test_each_step_costs_its_journal_writes_only(self):
+        steps_count = 10
+        queries = self.run_contents(steps_count=steps_count)
+
+        self.assertEqual(count_step_writes(queries), WRITES_PER_STEP * steps_count)
+        self.assertLessEqual(
+            len(queries), QUERIES_PER_TRAINING + WRITES_PER_STEP * steps_count, [query['sql'] for query in queries.captured_queries],
+        )
+
+
+def is_step_write(sql: str) -> bool:
+    statement = sql.lstrip().upper()
+    return statement.startswith('INSERT') and any(
+        f'"{model._meta.db_table.upper()}"' in statement for model in (Content, StepCheckpoint)
+    )
+
+
+def count_step_writes(queries: CaptureQueriesContext) -> int:
+    return sum(1 for query in queries.captured_queries if is_step_write(query['sql']))
+
+
+def count_training_queries(queries: CaptureQueriesContext) -> int:
+    return sum(1 for query in queries.captured_queries if not is_step_write(query['sql']))
@@ -0,0 +1,162 @@
+import os
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import unittest
+from unittest import mock
+import requests
+from django.test import SimpleTestCase
+from selenium.webdriver.chrome.options import Options
+from platform_new.scrapper import drivers
+from platform_new.scrapper.drivers import DriverFactory, RemoteDriverFactory, RemoteEndpoint
+
+# A standalone chromedriver, with the Chrome it drives, for the test opening a real remote session
+CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH') or shutil.which('chromedriver')
+
+
+class FakeRemote:
+    """Session of a remote browser, started without any endpoint behind its url."""
+
+    sessions_count = 0
+
+    def __init__(self, command_executor: str, options: Options):
+        FakeRemote.sessions_count += 1
+        self.command_executor = command_executor
+        self.session_id = f"session-{FakeRemote.sessions_count}"
+
+
+class RemoteDriverFactoryTest(SimpleTestCase):
+
+    def setUp(self):
+        self.first = RemoteEndpoint(url='http://first:4444', capacity=2)
+        self.second = RemoteEndpoint(url='http://second:4444', capacity=1)
+        self.factory = RemoteDriverFactory(endpoints=[self.first, self.second], health_check_interval=60, acquire_timeout=5)
+        self.health = {'http://first:4444': True, 'http://second:4444': True}
+        self.health_check_patch = mock.patch.object(
+            RemoteEndpoint, 'check_health', autospec=True, side_effect=lambda endpoint: self.health[endpoint.url],
+        )
+        self.remote_patch = mock.patch.object(drivers.webdriver, 'Remote', side_effect=FakeRemote)
+        self.health_check = self.health_check_patch.start()
+        self.remote = self.remote_patch.start()
+        self.addCleanup(self.health_check_patch.stop)
+        self.addCleanup(self.remote_patch.stop)
+
+    def test_checkout_goes_to_the_endpoint_with_the_most_free_capacity(self):
+        drivers_started = [self.factory.create(Options()) for _ in range(3)]
+
+        self.assertEqual(
+            [driver.command_executor for driver in drivers_started],
+            ['http://first:4444', 'http://first:4444', 'http://second:4444'],
+        )
+        self.assertEqual((self.first.active_sessions, self.second.active_sessions), (2, 1))
+        # Each endpoint is checked once per interval, not on every creation
+        self.assertEqual(self.health_check.call_count, 2)
+
+    def test_release_gives_the_session_back_to_a_waiting_checkout(self):
+        drivers_started = [self.factory.create(Options()) for _ in range(3)]
+        waiting_drivers = []
+        waiting_thread = threading.Thread(target=lambda: waiting_drivers.append(self.factory.create(Options())))
+        waiting_thread.start()
+
+        self.factory.release(drivers_started[2])
+        waiting_thread.join(timeout=5)
+
+        self.assertEqual([driver.command_executor for driver in waiting_drivers], ['http://second:4444'])
+        self.assertEqual((self.first.active_sessions, self.second.active_sessions), (2, 1))
+        # A session released twice, or unknown to the factory, frees nothing
+        self.factory.release(drivers_started[2])
+        self.assertEqual(self.second.active_sessions, 1)
+
+    def test_unhealthy_endpoint_is_replaced_until_it_recovers(self):
+        failures = [Exception('session not created')]
+
+        def start_remote(command_executor: str, options: Options) -> FakeRemote:
+            if failures:
+                raise failures.pop()
+            return FakeRemote(command_executor, options)
+
+        self.remote.side_effect = start_remote
+        self.factory.health_check_interval = 0.05
+
+        driver = self.factory.create(Options())
+
+        # The session failing on the first endpoint is started on the second one instead
+        self.assertEqual(driver.command_executor, 'http://second:4444')
+        self.assertEqual((self.first.active_sessions, self.second.active_sessions), (0, 1))
+        self.assertFalse(self.first.is_healthy)
+        self.factory.release(driver)
+
+        # Its next successful health check brings the endpoint back
+        self.second.capacity = 0
+        self.assertEqual(self.factory.create(Options()).command_executor, 'http://first:4444')
+        self.assertTrue(self.first.is_healthy)
+
+    def test_health_checks_are_made_without_holding_the_lock(self):
+        lock_states = []
+
+        def try_lock() -> None:
+            is_acquired = self.factory._condition.acquire(timeout=1)
+            lock_states.append(is_acquired)
+            if is_acquired:
+                self.factory._condition.release()
+
+        def check_health(endpoint: RemoteEndpoint) -> bool:
+            # The lock is reentrant, so it is tried from another thread
+            acquire_thread = threading.Thread(target=try_lock)
+            acquire_thread.start()
+            acquire_thread.join()
+            return True
+
+        self.health_check.side_effect = check_health
+        self.factory.create(Options())
+
+        self.assertEqual(lock_states, [True, True])
+
+
+class DriverFactoryTest(SimpleTestCase):
+
+    def test_create_must_be_implemented(self):
+        with self.assertRaises(TypeError):
+            DriverFactory()
+
+
+@unittest.skipUnless(CHROMEDRIVER_PATH, "Needs a chromedriver binary, on the PATH or in CHROMEDRIVER_PATH")
+class StandaloneChromedriverTest(SimpleTestCase):
+    """A real session through RemoteDriverFactory, against a chromedriver started on this machine."""
+
+    def setUp(self):
+        with socket.socket() as free_socket:
+            free_socket.bind(('127.0.0.1', 0))
+            port = free_socket.getsockname()[1]
+        self.chromedriver = subprocess.Popen(
+            [CHROMEDRIVER_PATH, f"--port={port}"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.addCleanup(self.chromedriver.wait, timeout=10)
+        self.addCleanup(self.chromedriver.terminate)
+        self.url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 10
+        while not RemoteEndpoint(url=self.url).check_health(timeout=1):
+            if time.monotonic() > deadline:
+                self.fail(f"chromedriver did not start on {self.url}")
+            time.sleep(0.1)
+
+    def test_session_is_opened_and_released(self):
+        endpoint = RemoteEndpoint(url=self.url, capacity=1)
+        factory = RemoteDriverFactory(endpoints=[endpoint])
+        options = Options()
+        for argument in ('--headless=new', '--no-sandbox', '--disable-dev-shm-usage'):
+            options.add_argument(argument)
+
+        driver = factory.create(options)
+        try:
+            self.assertEqual(endpoint.active_sessions, 1)
+            driver.get('data:text/html,<title>Remote session</title>')
+            self.assertEqual(driver.title, 'Remote session')
+        finally:
+            driver.quit()
+            factory.release(driver)
+
+        self.assertEqual(endpoint.active_sessions, 0)
+        self.assertEqual(requests.get(f"{self.url}/status", timeout=5).json()['value']['ready'], True)
@@ -0,0 +1,158 @@
+from django.test import SimpleTestCase, override_settings
+from platform_new.scrapper.events import event_bus
+from platform_new.scrapper.frontier import (
+    PRIORITY_LISTING,
+    PRIORITY_STEP,
+    PRIORITY_TRAINING,
+    BloomFilter,
+    CrawlFrontier,
+    load_url,
+)
+
+TRAINING_URL = 'https://platform.example/Training/view/1/'
+STEP_URL = 'https://platform.example/Training/view/1/step/90211'
+
+
+class FakeDriver:
+    """Browser whose displayed page is the last URL it loaded."""
+
+    def __init__(self):
+        self.current_url = 'about:blank'
+        self.loaded_urls = []
+
+    def get(self, url: str) -> None:
+        self.loaded_urls.append(url)
+        self.current_url = url
+
+
+class FakeScrapper:
+
+    def __init__(self, frontier: CrawlFrontier | None):
+        self.driver = FakeDriver()
+        self.frontier = frontier
+
+
+class BloomFilterTest(SimpleTestCase):
+
+    def test_items_added_are_always_present(self):
+        bloom_filter = BloomFilter(capacity=100)
+        # Ten times the capacity, spread over the filters added as it grows
+        items = [f"https://platform.example/step/{index}" for index in range(1000)]
+        for item in items:
+            bloom_filter.add(item)
+
+        self.assertTrue(all(item in bloom_filter for item in items))
+        self.assertEqual(len(bloom_filter), 1000)
+
+    def test_false_positives_stay_around_the_error_rate(self):
+        bloom_filter = BloomFilter(capacity=5000, error_rate=0.01)
+        for index in range(5000):
+            bloom_filter.add(f"https://platform.example/step/{index}")
+
+        false_positives = sum(f"https://platform.example/other/{index}" in bloom_filter for index in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+
+class CrawlFrontierTest(SimpleTestCase):
+
+    def test_claim_loads_a_url_once_unless_requeued(self):
+        frontier = CrawlFrontier()
+
+        self.assertTrue(frontier.claim(STEP_URL))
+        self.assertFalse(frontier.claim(STEP_URL))
+        self.assertTrue(frontier.claim(STEP_URL, requeue=True))
+        frontier.requeue(STEP_URL)
+        self.assertTrue(frontier.claim(STEP_URL))
+        self.assertFalse(frontier.claim(STEP_URL))
+
+        report = frontier.get_report()
+        self.assertEqual((report['loaded'], report['reloaded'], report['skipped']), (3, 2, 2))
+        self.assertEqual(frontier.get_fetch_record(STEP_URL).fetch_count, 3)
+
+    def test_pop_follows_the_priorities_then_the_order(self):
+        frontier = CrawlFrontier()
+        frontier.add(STEP_URL, priority=PRIORITY_STEP)
+        frontier.add(TRAINING_URL, priority=PRIORITY_TRAINING, payload=1)
+        frontier.add('https://platform.example/Training/paths', priority=PRIORITY_LISTING)
+        frontier.add('https://platform.example/Training/view/2/', priority=PRIORITY_TRAINING, payload=2)
+        # Queued twice, or already loaded, a URL is not queued again
+        self.assertFalse(frontier.add(TRAINING_URL, priority=PRIORITY_TRAINING, payload=1))
+
+        popped = [frontier.pop() for _ in range(len(frontier))]
+
+        self.assertEqual(popped, [
+            ('https://platform.example/Training/paths', None),
+            (TRAINING_URL, 1),
+            ('https://platform.example/Training/view/2/', 2),
+            (STEP_URL, None),
+        ])
+        self.assertIsNone(frontier.pop())
+
+    def test_record_fetch_forgets_a_failed_load(self):
+        frontier = CrawlFrontier()
+        frontier.claim(STEP_URL)
+
+        frontier.record_fetch(STEP_URL, duration=1.5, succeeded=False)
+
+        self.assertFalse(frontier.was_loaded(STEP_URL))
+        record = frontier.get_fetch_record(STEP_URL)
+        self.assertEqual((record.last_duration, record.last_succeeded), (1.5, False))
+        self.assertTrue(frontier.claim(STEP_URL))
+        frontier.record_fetch(STEP_URL, duration=0.5, succeeded=True)
+        self.assertTrue(frontier.get_fetch_record(STEP_URL).last_succeeded)
+        self.assertEqual(frontier.get_report()['failed'], 1)
+
+    @override_settings(CRAWL_FRONTIER_BLOOM_THRESHOLD=10)
+    def test_bloom_filter_frontier_loads_a_failed_url_again(self):
+        frontier = CrawlFrontier(expected_urls=10)
+        self.assertTrue(frontier.uses_bloom_filter)
+        frontier.claim(STEP_URL)
+
+        frontier.record_fetch(STEP_URL, duration=1.0, succeeded=False)
+
+        # The filter cannot forget the URL, it is re-queued instead
+        self.assertTrue(frontier.claim(STEP_URL))
+        self.assertFalse(frontier.claim(STEP_URL))
+        self.assertEqual(frontier.get_report()['visited_index'], 'bloom')
+
+
+class LoadUrlTest(SimpleTestCase):
+
+    def setUp(self):
+        self.subscription = event_bus.subscribe()
+        self.addCleanup(self.subscription.close)
+
+    def test_page_already_displayed_is_not_loaded_again(self):
+        scrapper = FakeScrapper(CrawlFrontier())
+        load_url(scrapper, TRAINING_URL, priority=PRIORITY_TRAINING)
+
+        load_url(scrapper, TRAINING_URL, priority=PRIORITY_TRAINING)
+
+        self.assertEqual(scrapper.driver.loaded_urls, [TRAINING_URL])
+        self.assertIsNone(self.subscription.get(timeout=0))
+
+    def test_page_marked_as_loaded_but_not_displayed_is_loaded_with_an_error(self):
+        frontier = CrawlFrontier()
+        # Like a false positive of the Bloom filter, the URL is in the visited index without having been loaded
+        frontier.claim(STEP_URL)
+        scrapper = FakeScrapper(frontier)
+
+        load_url(scrapper, STEP_URL, priority=PRIORITY_STEP)
+
+        self.assertEqual(scrapper.driver.loaded_urls, [STEP_URL])
+        event = self.subscription.get(timeout=0)
+        self.assertEqual((event['type'], event['data']['stage'], event['data']['url']), ('error', 'contents', STEP_URL))
+        self.assertTrue(frontier.get_fetch_record(STEP_URL).last_succeeded)
+
+    def test_failed_load_is_recorded_and_raised(self):
+        frontier = CrawlFrontier()
+        scrapper = FakeScrapper(frontier)
+
+        def fail(url: str) -> None:
+            raise TimeoutError('page load timed out')
+
+        with self.assertRaises(TimeoutError):
+            load_url(scrapper, STEP_URL, priority=PRIORITY_STEP, load=fail)
+
+        self.assertFalse(frontier.was_loaded(STEP_URL))
+        self.assertFalse(frontier.get_fetch_record(STEP_URL).last_succeeded)
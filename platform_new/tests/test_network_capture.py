@@ -0,0 +1,128 @@
+import json
+import os
+from unittest import mock
+from django.test import SimpleTestCase
+from platform_new.scrapper import network_capture
+from platform_new.scrapper.network_capture import (
+    PATHS_RESPONSE_URL_PATTERN,
+    STEPS_RESPONSE_URL_PATTERN,
+    CapturedResponse,
+    NetworkCapture,
+    build_paths_and_trainings_from_responses,
+    build_steps_from_responses,
+)
+from platform_new.scrapper.path_extraction import _generate_path_id
+from platform_new.scrapper.training_extraction import _create_training_id
+
+# Responses of the paths and steps requests and a performance log of Chrome, in the format of the DevTools protocol
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(__file__), 'fixtures', 'network')
+
+PATHS_URL = 'https://platform.example/api/v2/training-paths?page=1'
+STEPS_URL = 'https://platform.example/api/v2/trainings/training_Les_couteaux__E_learning/steps'
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURES_DIRECTORY, name), encoding='utf-8') as file:
+        return json.load(file)
+
+
+class FakeDriver:
+    """Chrome driver replaying a recorded performance log, one batch of messages per read of the log."""
+
+    def __init__(self, log_batches: list[list[dict]], bodies: dict[str, object]):
+        self.log_batches = list(log_batches)
+        self.bodies = bodies
+
+    def get_log(self, log_type: str) -> list[dict]:
+        batch = self.log_batches.pop(0) if self.log_batches else []
+        return [{'level': 'INFO', 'message': json.dumps({'message': message, 'webview': 'page'})} for message in batch]
+
+    def execute_cdp_cmd(self, command: str, params: dict) -> dict:
+        return {'body': json.dumps(self.bodies[params['requestId']])}
+
+
+@mock.patch.object(network_capture, 'RESPONSE_POLL_INTERVAL', 0)
+class NetworkCaptureTakeTest(SimpleTestCase):
+
+    def test_waits_for_the_matching_requests_to_finish(self):
+        driver = FakeDriver(
+            load_fixture('performance_log.json'),
+            bodies={'1000.1': load_fixture('paths_page.json'), '1000.2': {'data': [{'title': 'Nouveau message'}]}},
+        )
+        capture = NetworkCapture(driver)
+
+        responses = capture.take(PATHS_RESPONSE_URL_PATTERN)
+
+        self.assertEqual([response.url for response in responses], [PATHS_URL])
+        self.assertEqual(responses[0].payload, load_fixture('paths_page.json'))
+        # The whole log was read, and the response of another API is left for a take matching it
+        self.assertEqual(driver.log_batches, [])
+        self.assertEqual(list(capture.pending_urls.values()), ['https://platform.example/api/v2/notifications'])
+
+    def test_gives_up_on_a_request_never_finished(self):
+        driver = FakeDriver(load_fixture('performance_log.json')[:2], bodies={})
+        capture = NetworkCapture(driver)
+
+        self.assertEqual(capture.take(PATHS_RESPONSE_URL_PATTERN, timeout=0.05), [])
+
+    def test_is_empty_without_access_to_devtools(self):
+        capture = NetworkCapture(driver=object())
+
+        self.assertEqual(capture.take(PATHS_RESPONSE_URL_PATTERN), [])
+
+
+class BuildFromResponsesTest(SimpleTestCase):
+
+    def test_builds_the_paths_like_the_dom_extraction(self):
+        responses = [CapturedResponse(url=PATHS_URL, payload=load_fixture('paths_page.json'))]
+
+        paths, trainings, links = build_paths_and_trainings_from_responses(responses)
+
+        self.assertEqual(
+            [(path.id, path.title, path.progression, path.score) for path in paths],
+            [
+                (_generate_path_id('Les bases de la cuisine'), 'Les bases de la cuisine', 0.4, 0.0),
+                (_generate_path_id('Pâtisserie #1'), 'Pâtisserie #1', 0.0, 0.0),
+            ],
+        )
+        knives_id = _create_training_id('Les couteaux', 'E-learning')
+        # The training shared by both paths is built once, and linked to each path
+        self.assertEqual(
+            [training.id for training in trainings],
+            [
+                knives_id,
+                _create_training_id('Les fonds et les sauces', 'Classe virtuelle'),
+                _create_training_id('La pâte feuilletée', 'E-learning'),
+            ],
+        )
+        self.assertEqual((trainings[0].progression, trainings[0].score), (1.0, 0.85))
+        self.assertEqual(
+            [(link.path_id, link.training_id, link.position) for link in links if link.training_id == knives_id],
+            [(paths[0].id, knives_id, 0), (paths[1].id, knives_id, 0)],
+        )
+        self.assertEqual(len(links), 4)
+
+    def test_builds_the_steps_of_the_last_response(self):
+        training_id = _create_training_id('Les couteaux', 'E-learning')
+        responses = [
+            CapturedResponse(url=STEPS_URL, payload={'data': {'steps': [{'stepId': 1, 'title': 'Outdated'}]}}),
+            CapturedResponse(url=STEPS_URL, payload=load_fixture('training_steps.json')),
+        ]
+
+        steps = build_steps_from_responses(responses, training_id)
+
+        self.assertEqual(
+            [(step.id, step.type, step.is_validated, step.is_blocked) for step in steps],
+            [
+                (90211, 'text', True, False),
+                (90212, 'video', False, False),
+                (90213, 'document', False, True),
+                (90214, 'quiz', False, True),
+            ],
+        )
+        self.assertTrue(all(step.training_id == training_id for step in steps))
+
+    def test_steps_url_pattern_matches_the_view_requests(self):
+        self.assertRegex(STEPS_URL, STEPS_RESPONSE_URL_PATTERN)
+        self.assertNotRegex(PATHS_URL, STEPS_RESPONSE_URL_PATTERN)
+        self.assertNotRegex(STEPS_URL, PATHS_RESPONSE_URL_PATTERN)
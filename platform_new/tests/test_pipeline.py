@@ -0,0 +1,44 @@
+import os
+from unittest import mock
+from django.test import SimpleTestCase
+from platform_new.scrapper import path_training_scrapping, pipeline
+from platform_new.scrapper.events import event_bus
+from platform_new.scrapper.pipeline import ScrapePipeline
+
+PATHS_URL = 'https://platform.example/Training/paths'
+
+
+class FakeScrapper:
+    """Stands for a SeleniumScrapper whose browser never reaches the page of the paths."""
+
+    network_capture = None
+    frontier = None
+
+    def __init__(self, **kwargs):
+        self.driver = object()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+@mock.patch.dict(os.environ, {'URL_NEW_PLATFORM_TRAINING_PATHS': PATHS_URL})
+@mock.patch.object(path_training_scrapping, 'navigate_to_page', return_value=False)
+class PathsFailureTest(SimpleTestCase):
+
+    def test_iteration_raises_once_the_error_is_published(self, navigate_to_page):
+        with event_bus.subscribe() as subscription:
+            with self.assertRaisesMessage(RuntimeError, 'Failed to reach training paths page'):
+                list(path_training_scrapping.iter_scrapped_path_and_training_objects(scrapper=FakeScrapper()))
+
+            event = subscription.get(timeout=0)
+        self.assertEqual((event['type'], event['data']['stage']), ('error', 'paths'))
+
+    def test_pipeline_reports_the_failure_of_the_paths(self, navigate_to_page):
+        with mock.patch.object(pipeline, 'SeleniumScrapper', FakeScrapper):
+            report = ScrapePipeline(step_workers=1, scrap_contents=False).run()
+
+        self.assertEqual(report['pages'], 0)
+        self.assertEqual(report['errors'], ['Paths scrapping failed: Failed to reach training paths page'])
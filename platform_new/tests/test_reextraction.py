@@ -0,0 +1,134 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+from django.test import TestCase
+from platform_new.models.models import Content, Path, PathTraining, Step, Training
+from platform_new.scrapper import content_store, reextraction
+from platform_new.scrapper.archive import PAGE_KIND_PATHS, PAGE_KIND_STEP, PAGE_KIND_TRAINING, SnapshotArchive
+from platform_new.scrapper.content_store import ContentStore
+from platform_new.scrapper.reextraction import extract_step_page, reextract_archive
+from platform_new.scrapper.training_extraction import _create_training_id
+from scrappingchef.utils import bulk_create_or_update
+from .test_snapshot import PATHS_URL, TRAINING_ID, TRAINING_URL, read_page
+
+# Training whose view is archived but which is neither in the database nor on an archived paths page
+UNKNOWN_TRAINING_ID = _create_training_id('Les desserts', 'E-learning')
+
+TEXT_STEP_PAGE = '<html><body><div id="textRender"><p>Tenir le couteau <b>fermement</b>.</p></div></body></html>'
+VIDEO_STEP_PAGE = '<html><body><iframe src="https://cdn.iframe.ly/api/iframe?url=video"></iframe></body></html>'
+
+
+class ExtractStepPageTest(TestCase):
+
+    def setUp(self):
+        content_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(content_directory.cleanup)
+        self.content_directory = content_directory.name
+        content_store_patch = mock.patch.object(content_store, '_content_store', ContentStore(directory=self.content_directory))
+        content_store_patch.start()
+        self.addCleanup(content_store_patch.stop)
+
+    def read_content_file(self, filename: str) -> str:
+        with open(os.path.join(self.content_directory, filename), encoding='utf-8') as f:
+            return f.read()
+
+    def test_text_step_writes_its_content_file(self):
+        content = extract_step_page(TEXT_STEP_PAGE, 90211, 'text')
+
+        self.assertEqual(content.filename, 'content_90211.html')
+        # Like the innerHTML read by the scraper, the markup inside #textRender
+        self.assertEqual(self.read_content_file('content_90211.html'), '<p>Tenir le couteau <b>fermement</b>.</p>')
+
+    def test_text_step_without_text_has_no_content(self):
+        self.assertIsNone(extract_step_page('<html><body><div id="textRender"></div></body></html>', 90211, 'text'))
+        self.assertFalse(os.path.exists(os.path.join(self.content_directory, 'content_90211.html')))
+
+    def test_content_file_is_not_written_without_saving(self):
+        content = extract_step_page(TEXT_STEP_PAGE, 90211, 'text', save_file=False)
+
+        self.assertEqual(content.filename, 'content_90211.html')
+        self.assertFalse(os.path.exists(os.path.join(self.content_directory, 'content_90211.html')))
+
+
+class ReextractArchiveTest(TestCase):
+    """
+    Re-extraction of an archive holding the paths page, the views of a known and of an unknown training, and step pages.
+    The process pool is forked, so the worker processes share the content store patched in the test.
+    """
+
+    def setUp(self):
+        archive_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_directory.cleanup)
+        content_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(content_directory.cleanup)
+        self.content_directory = content_directory.name
+        content_store_patch = mock.patch.object(content_store, '_content_store', ContentStore(directory=self.content_directory))
+        content_store_patch.start()
+        self.addCleanup(content_store_patch.stop)
+
+        self.archive = SnapshotArchive(archive_directory.name)
+        self.archive.add(PAGE_KIND_PATHS, 1, read_page('paths_page.html'), url=PATHS_URL, metadata={'page': 1})
+        self.archive.add(
+            PAGE_KIND_TRAINING, TRAINING_ID, read_page('training_view.html'), url=TRAINING_URL, metadata={'training_id': TRAINING_ID},
+        )
+        # Same view with other step IDs, for a training the archive does not know
+        self.archive.add(
+            PAGE_KIND_TRAINING, UNKNOWN_TRAINING_ID, read_page('training_view.html').replace('9021', '9031'),
+            url=TRAINING_URL.replace(TRAINING_ID, UNKNOWN_TRAINING_ID), metadata={'training_id': UNKNOWN_TRAINING_ID},
+        )
+        for step_id, step_type, html in (
+            (90211, 'text', TEXT_STEP_PAGE), (90212, 'video', VIDEO_STEP_PAGE), (90311, 'text', TEXT_STEP_PAGE),
+        ):
+            self.archive.add(PAGE_KIND_STEP, step_id, html, metadata={'step_id': step_id, 'type': step_type})
+
+    def test_pages_are_extracted_in_worker_processes(self):
+        with mock.patch.object(reextraction, 'ProcessPoolExecutor', wraps=ProcessPoolExecutor) as executor_class:
+            report = reextract_archive(self.archive, workers=2)
+
+        self.assertEqual(executor_class.call_args.kwargs['max_workers'], 2)
+        self.assertEqual(report['errors'], [])
+        self.assertEqual((report['pages'], report['paths'], report['trainings'], report['path_trainings']), (6, 1, 2, 2))
+        self.assertEqual(set(Step.objects.values_list('id', flat=True)), {'90211', '90212', '90213'})  # type: ignore
+        self.assertEqual(
+            set(Content.objects.values_list('filename', 'type')),  # type: ignore
+            {('content_90211.html', 'text'), ('content_90212.mp4', 'video')},
+        )
+        # The text content was written by a worker process
+        with open(os.path.join(self.content_directory, 'content_90211.html'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), '<p>Tenir le couteau <b>fermement</b>.</p>')
+
+    def test_records_without_parent_are_dropped(self):
+        report = reextract_archive(self.archive, workers=2)
+
+        # The steps of the unknown training, then the content of their text step
+        self.assertEqual((report['steps'], report['contents']), (3, 2))
+        self.assertFalse(Step.objects.filter(training_id=UNKNOWN_TRAINING_ID).exists())  # type: ignore
+        self.assertFalse(Content.objects.filter(step_id=90311).exists())  # type: ignore
+
+    def test_records_whose_parent_is_in_the_database_are_kept(self):
+        Training.objects.create(  # type: ignore
+            id=UNKNOWN_TRAINING_ID, platform_id=UNKNOWN_TRAINING_ID, title='Les desserts', progression=0, score=0, type='E-learning',
+        )
+
+        report = reextract_archive(self.archive, workers=2)
+
+        self.assertEqual((report['steps'], report['contents']), (6, 3))
+        self.assertTrue(Content.objects.filter(step_id=90311).exists())  # type: ignore
+
+    def test_parents_are_saved_before_their_children(self):
+        with mock.patch.object(reextraction, 'bulk_create_or_update', wraps=bulk_create_or_update) as save:
+            reextract_archive(self.archive, workers=2)
+
+        self.assertEqual(
+            [call.kwargs['model_class'] for call in save.call_args_list], [Path, Training, PathTraining, Step, Content],
+        )
+        self.assertEqual(Path.objects.count(), 1)  # type: ignore
+
+    def test_nothing_is_saved_without_saving(self):
+        report = reextract_archive(self.archive, workers=2, save=False)
+
+        self.assertFalse(report['saved'])
+        self.assertEqual((report['steps'], report['contents']), (3, 2))
+        self.assertFalse(Step.objects.exists())  # type: ignore
+        self.assertFalse(os.path.exists(os.path.join(self.content_directory, 'content_90211.html')))
@@ -0,0 +1,103 @@
+import os
+from bs4 import BeautifulSoup
+from django.test import SimpleTestCase
+from selenium.webdriver.common.by import By
+from platform_new.scrapper.path_extraction import _generate_path_id
+from platform_new.scrapper.records import PathRecord, StepRecord, TrainingRecord
+from platform_new.scrapper.reextraction import extract_paths_page, extract_training_view
+from platform_new.scrapper.snapshot import SnapshotElement
+from platform_new.scrapper.step_scrapping import SELECTORS
+from platform_new.scrapper.training_extraction import _create_training_id
+
+# Pages of the platform as saved by the archive, their expected values being what the DOM backend reads in Chrome
+FIXTURES_DIRECTORY = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+
+TRAINING_ID = _create_training_id('Les couteaux', 'E-learning')
+TRAINING_URL = f"https://platform.example/Training/view/{TRAINING_ID}/"
+PATHS_URL = 'https://platform.example/Training/paths'
+
+
+def read_page(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIRECTORY, name), encoding='utf-8') as file:
+        return file.read()
+
+
+def parse(html: str, page_url: str = '') -> SnapshotElement:
+    return SnapshotElement(BeautifulSoup(html, 'html.parser'), page_url=page_url)
+
+
+class SnapshotElementTest(SimpleTestCase):
+
+    def test_text_leaves_out_what_is_not_rendered(self):
+        root = parse(
+            '<div id="card">Title <span hidden>hidden</span><span style="display:none">none</span>'
+            '<span style="visibility: hidden">invisible</span><script>var x = 1;</script><style>.a {}</style>'
+            '<input type="hidden" value="token"><!-- comment -->shown</div>'
+        )
+
+        self.assertEqual(root.find_element(By.ID, 'card').text, 'Title shown')
+
+    def test_text_puts_the_blocks_on_lines_of_their_own(self):
+        root = parse('<div id="card"><p>First</p><p>Second<br>line</p><span>inline</span> text</div>')
+
+        self.assertEqual(root.find_element(By.ID, 'card').text, 'First\nSecond\nline\ninline text')
+
+    def test_text_of_a_hidden_element_is_empty(self):
+        root = parse('<div><span class="tooltip" style="display: none">Tooltip</span></div>')
+
+        self.assertEqual(root.find_element(By.CLASS_NAME, 'tooltip').text, '')
+
+    def test_links_are_resolved_against_the_page_url(self):
+        root = parse('<a href="step/1?from=view"><img src="/static/logo.png"></a>', page_url=TRAINING_URL)
+
+        self.assertEqual(root.find_element(By.TAG_NAME, 'a').get_attribute('href'), f"{TRAINING_URL}step/1?from=view")
+        self.assertEqual(root.find_element(By.TAG_NAME, 'img').get_attribute('src'), 'https://platform.example/static/logo.png')
+
+    def test_other_attributes_are_left_as_they_are(self):
+        root = parse('<i class="icon icon-module-video" data-step="step/1"></i>', page_url=TRAINING_URL)
+        icon = root.find_element(By.TAG_NAME, 'i')
+
+        self.assertEqual(icon.get_attribute('class'), 'icon icon-module-video')
+        self.assertEqual(icon.get_attribute('data-step'), 'step/1')
+        self.assertIsNone(icon.get_attribute('title'))
+
+
+class SavedPagesParityTest(SimpleTestCase):
+    """The snapshot backend extracts from a saved page the same records as the DOM backend from the live page."""
+
+    def test_training_view(self):
+        html = read_page('training_view.html')
+
+        steps = extract_training_view(html, TRAINING_ID, url=TRAINING_URL)
+
+        self.assertEqual(steps, [
+            StepRecord(id=90211, platform_id=90211, training_id=TRAINING_ID, title='Introduction', type='text', is_validated=True),
+            StepRecord(id=90212, platform_id=90212, training_id=TRAINING_ID, title='Affûter un couteau', type='video'),
+            StepRecord(
+                id=90213, platform_id=90213, training_id=TRAINING_ID, title='Fiche récapitulative', type='document', is_blocked=True,
+            ),
+        ])
+        # Like the href property read by Selenium, the links of the items are absolute
+        self.assertEqual(
+            [item.get_attribute('href') for item in parse(html, TRAINING_URL).find_elements(By.CSS_SELECTOR, SELECTORS['module_item'])],
+            [
+                f"{TRAINING_URL}step/90211?from=view",
+                f"{TRAINING_URL}step/90212",
+                f"{TRAINING_URL}step/90213",
+            ],
+        )
+
+    def test_paths_page(self):
+        paths, trainings, links = extract_paths_page(read_page('paths_page.html'), url=PATHS_URL)
+
+        path_id = _generate_path_id('Les bases de la cuisine')
+        self.assertEqual(paths, [PathRecord(id=path_id, platform_id=path_id, title='Les bases de la cuisine', progression=0.4, score=0.0)])
+        knives_id = TRAINING_ID
+        sauces_id = _create_training_id('Les fonds et les sauces', 'Classe virtuelle')
+        self.assertEqual(trainings, [
+            TrainingRecord(id=knives_id, platform_id=knives_id, title='Les couteaux', progression=1.0, score=0.85, type='E-learning'),
+            TrainingRecord(
+                id=sauces_id, platform_id=sauces_id, title='Les fonds et les sauces', progression=0.5, score=0, type='Classe virtuelle',
+            ),
+        ])
+        self.assertEqual([(link.training_id, link.position) for link in links], [(knives_id, 0), (sauces_id, 1)])
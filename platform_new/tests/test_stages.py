@@ -0,0 +1,110 @@
+import time
+from unittest import mock
+from django.test import SimpleTestCase
+from platform_new.scrapper import stages
+from platform_new.scrapper.frontier import CrawlFrontier
+from platform_new.scrapper.records import StepRecord
+from platform_new.scrapper.stages import PendingTrainingChecks, merge_worker_results, pull_trainings, run_stage_in_workers
+
+
+def build_steps(training_id: str, count: int) -> list[StepRecord]:
+    return [
+        StepRecord(id=index, platform_id=index, training_id=training_id, title=f"Step {index}", type='text')
+        for index in range(count)
+    ]
+
+
+@mock.patch.object(stages, 'record_training_checked')
+class PendingTrainingChecksTest(SimpleTestCase):
+
+    def test_training_is_recorded_once_all_its_steps_are_written(self, record_training_checked):
+        checks = PendingTrainingChecks()
+        steps = build_steps('training_a', 3)
+        checks.add('training_a', steps)
+
+        checks.on_flush(steps[:2], succeeded=True)
+        record_training_checked.assert_not_called()
+        checks.on_flush(steps[2:], succeeded=True)
+
+        record_training_checked.assert_called_once_with(training_id='training_a', steps=steps)
+
+    def test_training_with_a_failed_batch_is_not_recorded(self, record_training_checked):
+        checks = PendingTrainingChecks()
+        failed_steps, written_steps = build_steps('training_a', 2), build_steps('training_b', 2)
+        checks.add('training_a', failed_steps)
+        checks.add('training_b', written_steps)
+
+        # A batch holding the steps of both trainings, then the last step of the first one failing
+        checks.on_flush(failed_steps[:1] + written_steps, succeeded=True)
+        checks.on_flush(failed_steps[1:], succeeded=False)
+
+        record_training_checked.assert_called_once_with(training_id='training_b', steps=written_steps)
+
+
+class MergeWorkerResultsTest(SimpleTestCase):
+
+    def test_counts_are_summed_and_peaks_are_the_highest(self):
+        total_result = merge_worker_results([
+            {'trainings': 3, 'steps': 40, 'failed_steps': 1, 'peak_browser_rss_mb': 512.0},
+            {'trainings': 2, 'steps': 25, 'failed_steps': 0, 'peak_browser_rss_mb': 768.0},
+        ], duration=60)
+
+        self.assertEqual(total_result['trainings'], 5)
+        self.assertEqual(total_result['steps'], 65)
+        self.assertEqual(total_result['failed_steps'], 1)
+        self.assertEqual(total_result['peak_browser_rss_mb'], 768.0)
+
+    def test_rates_are_computed_again_over_the_wall_clock_duration(self):
+        # Two workers scraping side by side for the same two minutes
+        total_result = merge_worker_results([
+            {
+                'trainings': 6, 'trainings_per_minute': 3.0, 'peak_browser_rss_mb': 512.0, 'trainings_per_minute_per_gb': 6.0,
+                'shared_trainings': 2, 'saved_seconds': 40.0,
+            },
+            {
+                'trainings': 4, 'trainings_per_minute': 2.0, 'peak_browser_rss_mb': 512.0, 'trainings_per_minute_per_gb': 4.0,
+                'shared_trainings': 1, 'saved_seconds': 30.0,
+            },
+        ], duration=120)
+
+        self.assertEqual(total_result['trainings_per_minute'], 5.0)
+        # Per GB of the two browsers
+        self.assertEqual(total_result['trainings_per_minute_per_gb'], 5.0)
+        # 12 seconds per training of the run
+        self.assertEqual(total_result['saved_seconds'], 36.0)
+
+    def test_stopped_workers_add_nothing(self):
+        total_result = merge_worker_results([{'trainings': 2, 'contents': 10, 'shared_trainings': 0, 'saved_seconds': 0.0}, {}], duration=30)
+
+        self.assertEqual(total_result, {'trainings': 2, 'contents': 10, 'shared_trainings': 0, 'saved_seconds': 0.0})
+
+
+class RunStageInWorkersTest(SimpleTestCase):
+
+    def test_result_of_the_workers_is_merged(self):
+        def scrap_steps(training_ids, progress, frontier, **parameters):
+            # Each training takes the same time, the workers scraping side by side
+            training_count = 0
+            while pull_trainings(frontier):
+                time.sleep(0.05)
+                training_count += 1
+                progress.advance()
+            return {
+                'trainings': training_count,
+                'trainings_per_minute': 60 * training_count / 0.05,
+                'peak_browser_rss_mb': 1024.0,
+                'trainings_per_minute_per_gb': 60 * training_count / 0.05,
+            }
+
+        with mock.patch.dict(stages.STAGES, {'steps': scrap_steps}), \
+                mock.patch.object(stages, 'create_frontier', return_value=CrawlFrontier()):
+            report = run_stage_in_workers(stage='steps', training_ids=[f"training_{index}" for index in range(4)], workers=2)
+
+        result = report['result']
+        self.assertEqual(report['errors'], [])
+        self.assertEqual(result['trainings'], 4)
+        self.assertEqual(result['peak_browser_rss_mb'], 1024.0)
+        # About 4 trainings in 0.1 second, far from the summed rates of the workers
+        self.assertLess(result['trainings_per_minute'], 60 * 4 / 0.1)
+        self.assertGreater(result['trainings_per_minute'], 60 * 4 / 1)
+        self.assertEqual(result['trainings_per_minute_per_gb'], round(result['trainings_per_minute'] / 2, 2))
@@ -0,0 +1,83 @@
+import io
+import json
+import multiprocessing
+import os
+import unittest
+from unittest import mock
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TransactionTestCase
+from platform_new.models.models import ScrapeTask
+from platform_new.scrapper.task_worker import TaskContext
+from platform_new.task_queue import enqueue_tasks
+
+# SKIP LOCKED only takes effect on Postgres, the other databases would pass the test without proving anything
+POSTGRES_CONFIGURED = (
+    settings.DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+    and bool(settings.DATABASES['default']['NAME'])
+)
+
+TASKS_COUNT = 200
+WORKERS_COUNT = 8
+
+
+def execute_task(context: TaskContext, task: ScrapeTask) -> dict:
+    """Stands for the scraping of a task, recording the process which executed it."""
+    return {'pid': os.getpid()}
+
+
+def run_scrape_worker(worker_id: str, start_barrier, counts_queue) -> None:
+    """Run the scrape_worker command in a worker process, on the connection of the process, until the queue is empty."""
+    try:
+        start_barrier.wait()
+        output = io.StringIO()
+        call_command('scrape_worker', worker_id=worker_id, exit_when_idle=True, poll_interval=0, stdout=output)
+        counts_queue.put((worker_id, os.getpid(), json.loads(output.getvalue())))
+    except Exception as e:
+        counts_queue.put((worker_id, os.getpid(), {'error': str(e)}))
+    finally:
+        connection.close()
+
+
+@unittest.skipUnless(POSTGRES_CONFIGURED, "Needs a Postgres database, e.g. `make local_postgres` and its DB_* variables")
+class ClaimTaskConcurrencyTest(TransactionTestCase):
+    """Several scrape_worker processes executing the same queue at once, each on its own database connection."""
+
+    # Without Postgres, no test database is created for the skipped test
+    databases = {'default'} if POSTGRES_CONFIGURED else set()
+
+    def test_each_task_is_executed_exactly_once(self):
+        enqueue_tasks(kind=ScrapeTask.KIND_STEP_CONTENT, target_ids=list(range(TASKS_COUNT)))
+        # The forked processes must not share the connection of the test, each one opens its own
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        start_barrier = context.Barrier(WORKERS_COUNT)
+        counts_queue = context.Queue()
+
+        # Patched before the fork, the workers execute the tasks without a browser
+        with mock.patch.object(TaskContext, 'execute', execute_task):
+            workers = [
+                context.Process(target=run_scrape_worker, args=(f"worker-{index}", start_barrier, counts_queue))
+                for index in range(WORKERS_COUNT)
+            ]
+            for worker in workers:
+                worker.start()
+            worker_counts = {}
+            for _ in workers:
+                worker_id, pid, counts = counts_queue.get(timeout=120)
+                worker_counts[pid] = counts
+            for worker in workers:
+                worker.join(timeout=30)
+
+        self.assertEqual([counts for counts in worker_counts.values() if 'error' in counts], [])
+        self.assertEqual(sum(counts['done'] for counts in worker_counts.values()), TASKS_COUNT)
+        self.assertEqual(sum(counts['failed'] + counts['lost'] for counts in worker_counts.values()), 0)
+        # Every task was leased once, and executed by the process which completed it
+        tasks = ScrapeTask.objects.all()  # type: ignore
+        self.assertEqual(tasks.count(), TASKS_COUNT)
+        self.assertTrue(all(task.attempts == 1 and task.status == ScrapeTask.STATUS_DONE for task in tasks))
+        executed_counts = {pid: 0 for pid in worker_counts}
+        for task in tasks:
+            executed_counts[task.result['pid']] += 1
+        self.assertEqual(executed_counts, {pid: counts['done'] for pid, counts in worker_counts.items()})
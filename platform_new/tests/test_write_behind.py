@@ -0,0 +1,45 @@
+from unittest import mock
+from django.db import DatabaseError
+from django.test import SimpleTestCase
+from platform_new.models.models import Step
+from platform_new.scrapper import write_behind
+from platform_new.scrapper.write_behind import WriteBehindBuffer
+
+
+@mock.patch.object(write_behind, 'PUT_TIMEOUT', 0.01)
+class WriteBehindBufferTest(SimpleTestCase):
+
+    def test_put_raises_the_error_of_a_dead_writer_instead_of_blocking(self):
+        error = DatabaseError('connection lost')
+        with mock.patch.object(write_behind, 'bulk_create_or_update', side_effect=error):
+            buffer = WriteBehindBuffer(model_class=Step, batch_size=1, max_pending=1)
+
+            # The first object kills the writer, the next ones fill the queue nobody reads anymore
+            with self.assertRaises(DatabaseError) as context:
+                buffer.put_many(range(10))
+            self.assertIs(context.exception, error)
+            with self.assertRaises(DatabaseError):
+                buffer.close()
+
+    def test_context_raises_the_error_of_the_writer_on_exit(self):
+        with mock.patch.object(write_behind, 'bulk_create_or_update', side_effect=DatabaseError('connection lost')):
+            with self.assertRaises(DatabaseError):
+                with WriteBehindBuffer(model_class=Step, batch_size=10) as buffer:
+                    buffer.put('step')
+
+    def test_close_writes_the_pending_objects(self):
+        with mock.patch.object(write_behind, 'bulk_create_or_update', side_effect=lambda model_class, objects: objects) as upsert:
+            with WriteBehindBuffer(model_class=Step, batch_size=10) as buffer:
+                buffer.put_many(['first', 'second'])
+
+        upsert.assert_called_once_with(model_class=Step, objects=['first', 'second'])
+        self.assertEqual(buffer.stats()['written'], 2)
+
+    def test_on_flush_receives_each_batch_and_its_outcome(self):
+        flushes = []
+        outcomes = iter([['first', 'second'], None])
+        with mock.patch.object(write_behind, 'bulk_create_or_update', side_effect=lambda model_class, objects: next(outcomes)):
+            with WriteBehindBuffer(model_class=Step, batch_size=2, on_flush=lambda batch, succeeded: flushes.append((batch, succeeded))) as buffer:
+                buffer.put_many(['first', 'second', 'third'])
+
+        self.assertEqual(flushes, [(['first', 'second'], True), (['third'], False)])
@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import index, PathsHierarchyView, ContentFileView
+from .views import index, PathsHierarchyView, ChangesView, ContentFileView, ScrapeJobListView, ScrapeJobView, ScrapeJobCancelView
+from .decorators import compressed_cache, local_environment_required
 from django.conf import settings
 from django.conf.urls.static import static
 import os
@@ -17,8 +18,14 @@ urlpatterns = [
     path("list_scrapped_trainings/", views.list_scrapped_trainings, name="list_scrapped_trainings"),
     path("list_scrapped_steps/", views.list_scrapped_steps, name="list_scrapped_steps"),
     path("list_scrapped_contents/", views.list_scrapped_contents, name="list_scrapped_contents"),
-    path('api/paths-hierarchy/', PathsHierarchyView.as_view(), name='paths-hierarchy'),
+    path('api/paths-hierarchy/', compressed_cache(PathsHierarchyView.as_view()), name='paths-hierarchy'),
+    # Only the full snapshot of the feed is cached, each poll carries a cursor or a timestamp of its own
+    path('api/changes/', compressed_cache(ChangesView.as_view(), uncached_params=('cursor', 'since')), name='changes'),
     path('api/content/<str:filename>/', ContentFileView.as_view(), name='content_file'),
+    path('api/jobs/', local_environment_required(ScrapeJobListView.as_view()), name='scrape_jobs'),
+    path('api/jobs/<str:job_id>/', local_environment_required(ScrapeJobView.as_view()), name='scrape_job'),
+    path('api/jobs/<str:job_id>/cancel/', local_environment_required(ScrapeJobCancelView.as_view()), name='cancel_scrape_job'),
+    path('api/events/', views.scrape_events, name='scrape_events'),
 ]
 
 
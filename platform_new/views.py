@@ -1,73 +1,93 @@
+import json
 import os
 from venv import logger
 from dotenv import load_dotenv
-from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseForbidden, FileResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import HttpRequest, HttpResponse, JsonResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import render
-from platform_new.models.models import Content, Path, Training, Step
-from platform_new.scrapper.content_scrapping import get_scrapped_content_objects_for_training_module
-from platform_new.scrapper.path_training_scrapping import get_scrapped_path_and_training_objects
-from platform_new.scrapper.step_scrapping import get_scrapped_step_objects_for_training_module
-from platform_new.scrapper.scrapper import SeleniumScrapper
-from platform_new.decorators import local_environment_required
-from scrappingchef.utils import bulk_create_or_update
+from django.urls import reverse
+from platform_new.models.models import Content, Path, PathTraining, Training, Step, ScrapeJob
+from platform_new.decorators import compressed_cache, local_environment_required
+from platform_new.jobs import cancel_job, enqueue_job
+from platform_new.scrapper.events import event_bus
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from platform_new.serializers import PathSerializer
-from django.conf import settings
-import mimetypes
+from platform_new.serializers import PathSerializer, ScrapeJobSerializer
+from platform_new.changes import ChangesCursor, decode_cursor, get_changes, parse_since
+from platform_new.storage import get_content_storage
 load_dotenv()
 
+# Seconds without event after which the event stream sends a heartbeat
+SSE_HEARTBEAT_INTERVAL = 15
+
 def index(request):
     return render(request, 'index.html')
 
-def scrap_contents_for_training(request: HttpRequest, training_id: int) -> list[Content]:
-    try:
-        scrapper = SeleniumScrapper(extension_vimeo_video_downloader=True)
-        contents = get_scrapped_content_objects_for_training_module(scrapper=scrapper, training_id=training_id)
-        content_objects_inserted = bulk_create_or_update(model_class=Content, objects=contents)
-        context = {"contents": content_objects_inserted}
-        return render(request, "platform_new/contents.html", context)
-    except Exception as e:
-        return JsonResponse({"error": "Scraping service temporarily unavailable"}, status=503)
+def _job_accepted_response(request: HttpRequest, job: ScrapeJob) -> JsonResponse:
+    """Answer a scraping request with the id of the job executing it and the url to poll its status."""
+    return JsonResponse({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": request.build_absolute_uri(reverse('adc_new:scrape_job', args=[job.id])),
+    }, status=202)
 
 
 @local_environment_required
-def scrap_all_steps(request: HttpRequest) -> HttpResponse:
-    try:
-        scrapper = SeleniumScrapper()
+def scrape_events(request: HttpRequest) -> StreamingHttpResponse:
+    """
+    Stream the events of the running scrapes as server-sent events.
+    Args:
+        request (HttpRequest): The HTTP request object, whose optional `job` parameter restricts the stream to one job
 
-        training_ids = Training.objects.values_list('id', flat=True)  # type: ignore
-        if not training_ids:
-            return JsonResponse({"error": "No trainings found in database"}, status=404)
+    Returns:
+        StreamingHttpResponse: text/event-stream response, open until the client disconnects
+    """
+    subscription = event_bus.subscribe(job_id=request.GET.get('job'))
+
+    def stream():
+        try:
+            # Tell the browser to wait a few seconds before reconnecting when the stream is interrupted
+            yield "retry: 5000\n\n"
+            while True:
+                event = subscription.get(timeout=SSE_HEARTBEAT_INTERVAL)
+                if event is None:
+                    # Comment line keeping the connection open through proxies
+                    yield ": heartbeat\n\n"
+                    continue
+                data = json.dumps(event, cls=DjangoJSONEncoder)
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
-        scrapped_steps_objects = []
-        for training_id in training_ids:
-            steps = get_scrapped_step_objects_for_training_module(scrapper=scrapper, training_id=training_id)
-            scrapped_steps_objects.extend(steps)
 
-        if not scrapped_steps_objects:
-            return JsonResponse({"error": "Failed to scrape any steps"}, status=503)
+@local_environment_required
+def scrap_contents_for_training(request: HttpRequest, training_id: int) -> HttpResponse:
+    # The contents are saved step by step, and the run resumes where a previous one stopped unless restart is set
+    resume = request.GET.get('restart') is None
+    job = enqueue_job(stage='contents', parameters={'training_ids': [training_id], 'resume': resume})
+    return _job_accepted_response(request, job)
 
-        step_objects_inserted = bulk_create_or_update(model_class=Step, objects=scrapped_steps_objects)
 
-        context = {"steps": scrapped_steps_objects}
-        return render(request, "platform_new/steps.html", context)
+@local_environment_required
+def scrap_all_steps(request: HttpRequest) -> HttpResponse:
+    if not Training.objects.exists():  # type: ignore
+        return JsonResponse({"error": "No trainings found in database"}, status=404)
 
-    except Exception as e:
-        logger.error(f"Unexpected error in scrap_steps: {str(e)}")
-        return JsonResponse({"error": "Scraping service temporarily unavailable"}, status=503)
+    # Only the trainings due in the refresh schedule are scrapped, unless a full refresh is requested
+    job = enqueue_job(stage='steps', parameters={'full': request.GET.get('full') is not None})
+    return _job_accepted_response(request, job)
 
 
+@local_environment_required
 def scrap_steps_for_training(request: HttpRequest, training_id: int) -> HttpResponse:
-    try:
-        scrapper = SeleniumScrapper()
-        scrapped_steps_objects = get_scrapped_step_objects_for_training_module(scrapper=scrapper, training_id=training_id)
-        step_objects_inserted = bulk_create_or_update(model_class=Step, objects=scrapped_steps_objects)  # type: ignore
-        context = {"steps": step_objects_inserted}
-        return render(request, "platform_new/steps.html", context)
-    except Exception as e:
-        return JsonResponse({"error": "Scraping service temporarily unavailable"}, status=503)
-
+    job = enqueue_job(stage='steps', parameters={'training_ids': [training_id]})
+    return _job_accepted_response(request, job)
 
 
 @local_environment_required
@@ -75,41 +95,20 @@ def scrap_all_paths_and_trainings(
     request: HttpRequest
 ) -> HttpResponse:
     """
-    Scrap all available paths and trainings, create or update them.
-    Create the paths and trainings in the database if they don't exist, only update the fields if they already exist.
-    Render the paths and trainings in a template.
+    Start the scrapping of all available paths and trainings in a background job.
+    The job creates the paths and trainings in the database if they don't exist, and only updates their fields if they already exist.
+    The scrapped paths and trainings are then listed by list_scrapped_paths and list_scrapped_trainings.
     Args:
-        request (Any | None, optional): Defaults to None.
+        request (HttpRequest): The HTTP request object
 
     Returns:
-        HttpResponse: object with a rendered text which is a combination of a template with a context dictionary
+        JsonResponse: 202 response with the id of the job and the url to poll its status
     """
-    try:
-        # Use context manager to ensure scrapper is always closed
-        with SeleniumScrapper() as scrapper:
-            # Get the path objects scrapped from the platform
-            scrapped_path_objects, scrapped_training_objects = get_scrapped_path_and_training_objects(scrapper=scrapper)
-
-            # Create or update the path objects in the database
-            path_objects_inserted = bulk_create_or_update(model_class=Path, objects=scrapped_path_objects)
-
-            # Create or update the training objects in the database
-            training_objects_inserted = bulk_create_or_update(model_class=Training, objects=scrapped_training_objects)
-
-            # Render both paths and trainings tables in the same template
-            context = {
-                "paths": path_objects_inserted,
-                "trainings": training_objects_inserted
-            }
-            # Use paths_and_trainings.html template which will be followed by trainings.html template
-            return render(request, "platform_new/paths_and_trainings.html", context)
-
-    except Exception as e:
-        # Log the error and return a friendly response
-        print(f"Scraping error: {str(e)}")
-        return JsonResponse({"error": "Scraping service temporarily unavailable"}, status=503)
+    job = enqueue_job(stage='paths')
+    return _job_accepted_response(request, job)
 
 
+@compressed_cache
 def list_scrapped_paths(
     request: HttpRequest
 ) -> HttpResponse:
@@ -149,6 +148,7 @@ def list_scrapped_paths(
         }, status=500)
 
 
+@compressed_cache
 def list_scrapped_trainings(
     request: HttpRequest
 ) -> HttpResponse:
@@ -166,17 +166,8 @@ def list_scrapped_trainings(
     """
     try:
         # Get all trainings and serialize them
-        trainings = Training.objects.all().values(  # type: ignore
-            'id',
-            'platform_id',
-            'path__title',
-            'title',
-            'progression',
-            'score',
-            'type',
-            'created_time',
-            'updated_time'
-        )
+        # A training can belong to several paths, whose titles are listed in one query
+        trainings = Training.objects.prefetch_related('paths').all()  # type: ignore
 
         context = {"trainings": trainings}
         return render(request, "platform_new/trainings.html", context)
@@ -190,6 +181,7 @@ def list_scrapped_trainings(
         }, status=500)
 
 
+@compressed_cache
 def list_scrapped_steps(request: HttpRequest) -> HttpResponse:
     try:
         steps = Step.objects.all().values(  # type: ignore
@@ -212,6 +204,7 @@ def list_scrapped_steps(request: HttpRequest) -> HttpResponse:
         return JsonResponse({"status": "error", "message": "An error occurred while retrieving steps"}, status=500)
 
 
+@compressed_cache
 def list_scrapped_contents(request: HttpRequest) -> HttpResponse:
     try:
         contents = Content.objects.all().values(  # type: ignore
@@ -233,37 +226,71 @@ def list_scrapped_contents(request: HttpRequest) -> HttpResponse:
 class PathsHierarchyView(APIView):
     def get(self, request):
         paths = Path.objects.prefetch_related(  # type: ignore
-            'trainings',
-            'trainings__steps',
-            'trainings__steps__contents'
+            Prefetch('path_trainings', queryset=PathTraining.objects.select_related('training').order_by('position')),  # type: ignore
+            'path_trainings__training__steps',
+            'path_trainings__training__steps__contents'
         ).all()
         serializer = PathSerializer(paths, many=True)
         return Response({'paths': serializer.data})
 
 
-class ContentFileView(APIView):
-    def get(self, request, filename: str) -> FileResponse:
-        # Define the directory containing the content files
-        content_directory = os.path.join(settings.BASE_DIR, 'platform_new', 'contents')
-
-        # Construct the full file path
-        file_path = os.path.join(content_directory, filename)
-
-        # Check if the file exists
-        if os.path.isfile(file_path):
-            # Determine the content type based on the file extension
-            content_type, _ = mimetypes.guess_type(file_path)
-
-            # Set Content-Disposition based on the file type
-            if content_type == 'application/pdf':
-                disposition = 'inline'
-            elif content_type and content_type.startswith('video/'):
-                disposition = 'inline'  # Display video inline
+class ChangesView(APIView):
+    """
+    Delta-sync feed of the hierarchy.
+    Accepts either a `cursor` returned by a previous page or poll, or a `since` ISO 8601 timestamp,
+    and returns only the paths, trainings, steps and contents updated afterwards plus the ids deleted meanwhile.
+    Without any parameter, the whole hierarchy is returned as flat lists along with a cursor.
+    The changes come by pages: while `has_more` is true, the cursor returned leads to the next page.
+    """
+    def get(self, request):
+        cursor = request.query_params.get('cursor')
+        since = request.query_params.get('since')
+        try:
+            if cursor:
+                changes_cursor = decode_cursor(cursor)
             else:
-                disposition = 'attachment'  # Default to attachment for other types
+                changes_cursor = ChangesCursor(since=parse_since(since) if since else None)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        return Response(get_changes(changes_cursor))
 
-            response = FileResponse(open(file_path, 'rb'), content_type=content_type)
-            response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
-            return response
-        else:
-            return JsonResponse({"error": "File not found"}, status=404)
+
+class ContentFileView(APIView):
+    def get(self, request, filename: str) -> HttpResponse:
+        # Either serve the file from the local directory or redirect to a signed URL of the object store
+        return get_content_storage().serve(request, filename)
+
+
+class ScrapeJobListView(APIView):
+    """List the latest scrape jobs, or enqueue a new one with a POST of {"stage": ..., "parameters": {...}}."""
+    def get(self, request):
+        jobs = ScrapeJob.objects.order_by('-created_time')[:50]  # type: ignore
+        return Response({'jobs': ScrapeJobSerializer(jobs, many=True).data})
+
+    def post(self, request):
+        try:
+            job = enqueue_job(stage=request.data.get('stage'), parameters=request.data.get('parameters') or {})
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return Response(ScrapeJobSerializer(job).data, status=202)
+
+
+class ScrapeJobView(APIView):
+    """Status and progress of a scrape job."""
+    def get(self, request, job_id: str):
+        try:
+            job = ScrapeJob.objects.get(id=job_id)  # type: ignore
+        except ScrapeJob.DoesNotExist:  # type: ignore
+            return Response({'error': 'Job not found'}, status=404)
+        return Response(ScrapeJobSerializer(job).data)
+
+
+class ScrapeJobCancelView(APIView):
+    """Request the cancellation of a scrape job."""
+    def post(self, request, job_id: str):
+        try:
+            job = cancel_job(job_id)
+        except ScrapeJob.DoesNotExist:  # type: ignore
+            return Response({'error': 'Job not found'}, status=404)
+        return Response(ScrapeJobSerializer(job).data, status=202)
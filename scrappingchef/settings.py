@@ -52,6 +52,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'platform_new.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -103,6 +104,61 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Holds the rendered hierarchy and list pages along with their compressed variants
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cached responses are invalidated whenever the scrapped data changes in this process,
+# the timeout bounds their lifetime when the database is filled by another process (e.g. database_migration)
+COMPRESSED_RESPONSE_CACHE_TIMEOUT = int(os.getenv('COMPRESSED_RESPONSE_CACHE_TIMEOUT', 300))
+# Responses smaller than this number of bytes are not worth compressing
+COMPRESSION_MIN_LENGTH = 200
+
+# Maximum number of rows and tombstones of a page of the changes feed
+CHANGES_FEED_PAGE_SIZE = int(os.getenv('CHANGES_FEED_PAGE_SIZE', 1000))
+# Seconds read again before the cursor of a poll, for the rows committed after the previous poll with an earlier updated_time
+CHANGES_FEED_OVERLAP_SECONDS = int(os.getenv('CHANGES_FEED_OVERLAP_SECONDS', 60))
+
+# Lifetime in seconds of the PDFs and videos served by ContentFileView in the browser caches, before they are revalidated
+CONTENT_FILE_MAX_AGE = int(os.getenv('CONTENT_FILE_MAX_AGE', 60 * 60))
+# Lifetime in seconds of the content files whose name holds the digest of their content, never revalidated
+CONTENT_FILE_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+# Content files are served from the local directory ('local') or through redirects to signed URLs of the bucket
+# the files are moved to by move_contents_to_gcs ('bucket'), which keeps the app instance from streaming them
+CONTENT_STORAGE_BACKEND = os.getenv('CONTENT_STORAGE_BACKEND', 'bucket' if IS_GAE else 'local')
+CONTENT_BUCKET_NAME = os.getenv('BUCKET_NAME')
+# Local directory standing in for the bucket, for tests and offline development
+CONTENT_BUCKET_DIRECTORY = os.getenv('CONTENT_BUCKET_DIRECTORY')
+# Lifetime in seconds of the signed URLs, and margin before expiration after which a cached one is renewed
+CONTENT_SIGNED_URL_EXPIRATION = int(os.getenv('CONTENT_SIGNED_URL_EXPIRATION', 15 * 60))
+CONTENT_SIGNED_URL_RENEWAL_MARGIN = 60
+
+# Maximum number of scrape jobs running at the same time, each one drives its own browser
+SCRAPE_JOBS_MAX_CONCURRENCY = int(os.getenv('SCRAPE_JOBS_MAX_CONCURRENCY', 2))
+
+# Refresh schedule of the trainings: an in-progress training is checked every base interval,
+# and the interval doubles each time a check finds no change, up to the maximum interval
+REFRESH_BASE_INTERVAL_HOURS = float(os.getenv('REFRESH_BASE_INTERVAL_HOURS', 24))
+REFRESH_MAX_INTERVAL_DAYS = float(os.getenv('REFRESH_MAX_INTERVAL_DAYS', 60))
+
+# Distributed scraping: a worker extends the lease of its task every third of the lease,
+# a task whose worker stopped sending heartbeats is claimed again once its lease expired
+SCRAPE_TASK_LEASE_SECONDS = int(os.getenv('SCRAPE_TASK_LEASE_SECONDS', 300))
+
+# Directory of the archive of the scraped pages, used by reextract_snapshots, the pages are not archived if unset
+SNAPSHOT_ARCHIVE_DIRECTORY = os.getenv('SNAPSHOT_ARCHIVE_DIRECTORY')
+
+# Expected number of URLs of a scraping run above which its frontier remembers the loaded URLs in a Bloom filter
+# rather than a set, in a fixed amount of memory at the cost of rare false positives
+CRAWL_FRONTIER_BLOOM_THRESHOLD = int(os.getenv('CRAWL_FRONTIER_BLOOM_THRESHOLD', 1_000_000))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -1,6 +1,9 @@
 import os
 from typing import Any
 from platform_new.scrapper.logger import get_logger
+from platform_new.response_cache import invalidate_response_cache
+from platform_new.scrapper.events import publish
+from platform_new.scrapper.records import to_model
 
 # Create logger for this module
 logger = get_logger(__name__)
@@ -27,6 +30,9 @@ def loop_until_get(get_function, loop_limit, error_if_limit_reached=True, *args,
         # and print the state of the progress point
         if (i % max(1, loop_limit // 10) == 0):
             print(f"loop_until_get for the function {get_function.__name__} on loop #{i}")
+            # The first call is not a retry
+            if i > 0:
+                publish('retry', function=get_function.__name__, attempt=i, max_attempts=loop_limit)
 
         get_results = get_function(*args, **kwargs)
         if get_results:
@@ -87,23 +93,31 @@ def check_if_folder_exists(folder_path=None, create_folder=True):
 def bulk_create_or_update(model_class, objects):
     """
     Helper function to perform bulk create or update operations.
+    Rows are matched on platform_id when the model has one, on the primary key otherwise (e.g. Content).
+    The scraped records are converted to model instances here, right before the write.
 
     Args:
         model_class: Django model class (Path, Training, Step, or Content)
-        objects: List of objects to create/update
+        objects: List of records or model instances to create/update
     """
     try:
+        objects = [to_model(obj) for obj in objects]
+        field_names = [field.name for field in model_class._meta.concrete_fields]
+        unique_field = 'platform_id' if 'platform_id' in field_names else model_class._meta.pk.name
         inserted_objects = model_class.objects.bulk_create(
             objs=objects,
             update_conflicts=True,
+            # Concrete fields only, a many-to-many field such as Training.paths is written through its own model
             update_fields=[
-                field.__dict__.get('name')
-                for field in model_class._meta.get_fields()
-                if field.__dict__.get('primary_key') is False and field.__dict__.get('name') != 'platform_id'
+                field.name
+                for field in model_class._meta.concrete_fields
+                if not field.primary_key and field.name != unique_field
             ],
-            unique_fields=['platform_id']
+            unique_fields=[unique_field]
         )
         logger.info(f"Bulk create/update for {model_class.__name__} completed successfully")
+        # bulk_create does not send post_save signals, so the cached responses are invalidated here
+        invalidate_response_cache()
         return inserted_objects
         
     except Exception as e: